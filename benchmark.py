@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+
+# Stages in the order they run; each runs in a fresh process so peak RSS is its own
+STAGES = ("parse", "highlight", "detect", "analyze", "export", "gui")
+DEFAULT_SIZE = "32M"
+DEFAULT_DENSITY = 0.02
+DEFAULT_TOLERANCE = 0.10
+_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """'64M' -> 67108864; plain numbers are bytes"""
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(text)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1048576 if sys.platform == "darwin" else 1024)
+
+
+def _consume(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def run_stage(stage, path, export_format="jsonl"):
+    """Time one stage on ``path`` in this process; returns the measurement dict"""
+    from untils.parser import open_log, parse_logs
+    items = None
+
+    if stage == "parse":
+        with open_log(path) as f:
+            started = time.perf_counter()
+            items = _consume(parse_logs(f))
+    elif stage == "highlight":
+        from untils.highlighter import highlight_keywords
+        with open_log(path) as f:
+            lines = list(parse_logs(f))
+        started = time.perf_counter()
+        items = _consume(highlight_keywords(lines))
+    elif stage == "detect":
+        from untils.analysis import iter_issues
+        with open_log(path) as f:
+            started = time.perf_counter()
+            items = _consume(iter_issues(f))
+    elif stage == "analyze":
+        from untils.analysis import analyze_file
+        started = time.perf_counter()
+        items = len(analyze_file(path))
+    elif stage == "export":
+        from untils.analysis import analyze_file
+        from untils.export import export_issues
+        issues = analyze_file(path)
+        with open(os.devnull, 'w', encoding='utf-8', newline='') as out:
+            started = time.perf_counter()
+            items = export_issues(out, issues, export_format, path)
+    elif stage == "gui":
+        try:
+            import tkinter as tk
+        except ImportError as e:
+            return {"skipped": f"no tkinter ({e})"}
+        from untils.analysis import analyze_file
+        issues = analyze_file(path)
+        try:
+            root = tk.Tk()
+        except tk.TclError as e:
+            return {"skipped": f"no display ({e})"}
+        import run1
+        root.geometry("1200x800")
+        view = run1.VirtualResultList(root)
+        view.pack(fill="both", expand=True)
+        root.update()
+        started = time.perf_counter()
+        view.set_items(issues)
+        root.update()
+        # Page through the first screens, then jump to the end like a user would
+        for _ in range(100):
+            view.scroll_rows(view.visible_rows())
+            root.update()
+        view.scroll_to_end()
+        root.update()
+        items = len(issues)
+        elapsed = time.perf_counter() - started
+        root.destroy()
+        return {"seconds": elapsed, "items": items, "peak_rss_mb": peak_rss_mb()}
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+
+    return {"seconds": time.perf_counter() - started, "items": items, "peak_rss_mb": peak_rss_mb()}
+
+
+def measure(stage, path, repeat, export_format):
+    """Best of ``repeat`` runs of a stage, each in its own interpreter"""
+    best = None
+    peak = None
+    for _ in range(repeat):
+        env = dict(os.environ)
+        # termcolor skips colouring when stdout is not a tty; time the real work
+        env["FORCE_COLOR"] = "1"
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--log", path,
+             "--export-format", export_format],
+            env=env, stdout=subprocess.PIPE, check=True, text=True).stdout
+        result = json.loads(output)
+        if "skipped" in result:
+            return result
+        if result["peak_rss_mb"] is not None:
+            peak = max(peak or 0, result["peak_rss_mb"])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    best["peak_rss_mb"] = peak
+    return best
+
+
+def count_lines(path):
+    count = 0
+    last = b"\n"
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            count += block.count(b"\n")
+            last = block[-1:]
+    return count + (last != b"\n")
+
+
+def compare(results, baseline, tolerance):
+    """Stages more than ``tolerance`` slower (or bigger) than the baseline"""
+    regressions = []
+    for stage, result in results["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old or "seconds" not in old or "seconds" not in result:
+            continue
+        old_rate, new_rate = old["mb_per_s"], result["mb_per_s"]
+        result["vs_baseline"] = new_rate / old_rate - 1 if old_rate else None
+        if old_rate and new_rate < old_rate * (1 - tolerance):
+            regressions.append(f"{stage}: {new_rate:.1f} MB/s vs {old_rate:.1f} MB/s baseline")
+        old_rss, new_rss = old.get("peak_rss_mb"), result.get("peak_rss_mb")
+        if old_rss and new_rss and new_rss > old_rss * (1 + tolerance):
+            regressions.append(f"{stage}: peak RSS {new_rss:.0f} MB vs {old_rss:.0f} MB baseline")
+    return regressions
+
+
+def print_table(results):
+    print(f"📏 {results['bytes'] / 1048576:.1f} MB, {results['lines']} lines "
+          f"(density {results['density']}, seed {results['seed']})")
+    print(f"{'stage':<10} {'seconds':>8} {'MB/s':>8} {'lines/s':>11} {'items':>9} {'peak RSS':>9} {'vs base':>8}")
+    for stage, result in results["stages"].items():
+        if "skipped" in result:
+            print(f"{stage:<10} skipped: {result['skipped']}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] is not None else "?"
+        change = result.get("vs_baseline")
+        change = f"{change:+.0%}" if change is not None else ""
+        print(f"{stage:<10} {result['seconds']:>8.3f} {result['mb_per_s']:>8.1f} "
+              f"{result['lines_per_s']:>11,.0f} {result['items']:>9} {rss:>9} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection throughput benchmark on a synthetic AOSP/kernel build log")
+    parser.add_argument("--size", default=DEFAULT_SIZE, help="Size of the generated log, e.g. 64M (default %(default)s)")
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY, help="Share of generated entries that are issues (default %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed; the same seed gives the same log")
+    parser.add_argument("--log", help="Benchmark this log instead of generating one")
+    parser.add_argument("--keep", metavar="PATH", help="Write the generated log to PATH and keep it")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run (default all: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the fastest is reported")
+    parser.add_argument("--export-format", default="jsonl", help="Format timed by the export stage")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Store the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a baseline; exit 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown/RSS growth before a regression is reported (default %(default)s)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON instead of a table")
+    parser.add_argument("--run-stage", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.log, args.export_format)))
+        return 0
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})")
+
+    from untils.synthlog import write_log
+    from rom_detection_levels import get_detector
+
+    temp_path = None
+    if args.log:
+        path = args.log
+    else:
+        if args.keep:
+            path = args.keep
+        else:
+            fd, temp_path = tempfile.mkstemp(suffix=".log")
+            os.close(fd)
+            path = temp_path
+        with open(path, 'wb') as f:
+            write_log(f, parse_size(args.size), args.density, args.seed)
+
+    try:
+        size = os.path.getsize(path)
+        lines = count_lines(path)
+        results = {
+            "bytes": size,
+            "lines": lines,
+            "density": None if args.log else args.density,
+            "seed": None if args.log else args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "ruleset": get_detector().fingerprint,
+            "created": time.strftime('%Y-%m-%d %H:%M:%S'),
+            "stages": {},
+        }
+        for stage in stages:
+            result = measure(stage, path, max(1, args.repeat), args.export_format)
+            if "seconds" in result:
+                seconds = max(result["seconds"], 1e-9)
+                result["mb_per_s"] = size / 1048576 / seconds
+                result["lines_per_s"] = lines / seconds
+            results["stages"][stage] = result
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get("bytes") != results["bytes"]:
+            print(f"⚠️ Baseline was taken on {baseline.get('bytes')} bytes, this run used {results['bytes']}",
+                  file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline saved to {args.save_baseline}", file=sys.stderr)
+
+    if regressions:
+        print("❌ Regressions against the baseline:", file=sys.stderr)
+        for regression in regressions:
+            print(f"    {regression}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,408 @@
+import os
 import sys
+import json
+import time
 import argparse
-from untils.parser import parse_logs
-from untils.highlighter import highlight_keywords, FAIL_KEYWORDS
+
+# Each mode imports the rest of the engine itself, so a run only loads what it uses
+
+# Exit status of "scan" by the worst severity found; 2 is left for usage and I/O errors
+SEVERITY_EXIT_CODES = {"note": 0, "warning": 1, "error": 3, "critical": 4}
+EXIT_USAGE = 2
+# Rules listed by --profile-rules
+DEFAULT_PROFILE_TOP = 25
+
+def print_lines(issue, out=None):
+    """The issue's line, between its captured context lines if any"""
+    for line in issue.get("context_before", ()):
+        print(f"  | {line}", file=out)
+    print(f"    {issue['line']}", file=out)
+    for line in issue.get("context_after", ()):
+        print(f"  | {line}", file=out)
+
+def print_issue(issue):
+    print(f"{issue['icon']} [{issue['level']}] Line {issue['line_num']}: {issue['message']}")
+    print_lines(issue)
+
+def context_window(lines):
+    """ContextWindow for --context, None when it was not given"""
+    if lines is None:
+        return None
+    from untils.context import ContextWindow
+    return ContextWindow(lines, lines)
+
+def print_signatures(entries):
+    for entry in entries:
+        first, last = entry["first"], entry["last"]
+        print(f"{entry['count']:>9}x in {entry['files']} file(s)  [{entry['level']}] {entry['signature']}")
+        print(f"           first {first['path']}:{first['line_num']}  last {last['path']}:{last['line_num']}")
+
+def known_levels():
+    from rom_detection_levels import get_detector
+    detector = get_detector()
+    return list(detector.levels) + [level for level in detector.context_patterns
+                                    if level not in detector.levels]
+
+def use_rule_packs(parser, paths, use_cache):
+    """Load --rules packs, or those installed in the rules directory when none are given"""
+    from untils.rules import RuleFileError, default_rule_files
+    paths = paths or default_rule_files()
+    if not paths:
+        return
+    from rom_detection_levels import load_rule_packs
+    try:
+        load_rule_packs(paths, use_cache)
+    except RuleFileError as e:
+        parser.error(str(e))
+
+def lint_rules():
+    """Print what the rule compiler found and runs for each pattern; 1 if any is catastrophic"""
+    from rom_detection_levels import MAX_REGEX_LINE, get_detector
+    from untils.regexlint import CATASTROPHIC
+    icons = {CATASTROPHIC: "❌", "slow": "⚠️", "note": "ℹ️"}
+    worst = 0
+    for category, analysis in get_detector().lint():
+        print(f"[{category}] {analysis.pattern}")
+        print(f"    runs as {analysis.rewritten}")
+        if analysis.linear is not None:
+            print(f"    long lines: {analysis.linear}")
+        elif analysis.risky:
+            print(f"    long lines: only the first ~{MAX_REGEX_LINE} characters")
+        for kind, message in analysis.findings:
+            print(f"    {icons.get(kind, '•')} {kind}: {message}")
+            if kind == CATASTROPHIC:
+                worst = 1
+    return worst
+
+def scan(argv):
+    """Headless ROM detector run for CI and cron: filter, summarize, exit by severity"""
+    from rom_detection_levels import (SEVERITIES, enable_profiling, level_severity, rom_build_tips,
+                                      severity_rank)
+    from untils.export import EXPORT_FORMATS, make_writer
+    parser = argparse.ArgumentParser(
+        prog="main.py scan",
+        description="Run the ROM issue detector without the GUI. The exit status is the worst "
+                    "severity found at or above --fail-on: 0 none, 1 warning, 3 error, "
+                    "4 critical (2 = usage or I/O error).")
+    parser.add_argument("files", nargs="*", default=["-"], help="Log files, directories or glob patterns ('-' or none for stdin)")
+    parser.add_argument("--level", action="append", type=str.upper, metavar="LEVEL", help="Only report this detection level (repeatable)")
+    parser.add_argument("--exclude-level", action="append", type=str.upper, default=[], metavar="LEVEL", help="Never report this detection level (repeatable)")
+    parser.add_argument("--min-severity", choices=SEVERITIES, default="note", help="Only report issues of at least this severity")
+    parser.add_argument("--fail-on", choices=SEVERITIES, default="error", help="Lowest severity that makes the exit status non-zero (default error)")
+    parser.add_argument("--format", choices=("list",) + EXPORT_FORMATS, default="list", help="Output format for the reported issues")
+    parser.add_argument("--output", metavar="PATH", help="File for the issues (default stdout)")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Do not list issues; only --stats and the exit status")
+    parser.add_argument("--stats", action="store_true", help="Print per-level counts with fix-it tips and throughput to stderr")
+    parser.add_argument("--list-levels", action="store_true", help="Print the detection levels with their severity and exit")
+    parser.add_argument("--rules", action="append", metavar="PATH", help="YAML/TOML/JSON rule pack or directory of packs to layer over the built-in rules (repeatable; default: packs in ~/.enhanced_log_seeker/rules)")
+    parser.add_argument("--context", type=int, metavar="N", help="Keep N lines before and after each issue, widened to the whole block for clang diagnostics (include chain, caret line) and ninja FAILED: commands; 0 = blocks only")
+    parser.add_argument("--lint-rules", action="store_true", help="Print backtracking risks and rewrites of the detection rules and exit (1 if a rule is catastrophic)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = all CPUs)")
+    parser.add_argument("--no-mmap", action="store_true", help="Decode every line instead of scanning the mapped file as bytes")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the on-disk result cache")
+    parser.add_argument("--profile-rules", action="store_true", help="Time every detection rule and print the most expensive to stderr (single process, no cache)")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP, metavar="N", help="Rules listed by --profile-rules (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    use_rule_packs(parser, args.rules, not args.no_cache)
+    levels = known_levels()
+    if args.list_levels:
+        for level in levels:
+            print(f"{level_severity(level):<9} {level}")
+        return 0
+    if args.lint_rules:
+        return lint_rules()
+    unknown = [level for level in (args.level or []) + args.exclude_level if level not in levels]
+    if unknown:
+        parser.error(f"unknown level(s): {', '.join(unknown)} (see --list-levels)")
+
+    from untils.analysis import default_workers, iter_issues
+    from untils.batch import BatchSummary, analyze_batch, expand_inputs, missing_inputs
+    from untils.cache import ResultCache
+    from untils.results import ResultStore
+
+    profile = None
+    if args.profile_rules:
+        profile = enable_profiling()
+        args.workers, args.no_cache = 1, True
+
+    min_rank = severity_rank(args.min_severity)
+    wanted = [level for level in (args.level or levels)
+              if level not in args.exclude_level and severity_rank(level_severity(level)) >= min_rank]
+    window = context_window(args.context)
+
+    sources = []
+    if "-" in args.files:
+        sources.append("-")
+    paths = expand_inputs(f for f in args.files if f != "-")
+    missing = missing_inputs(f for f in args.files if f != "-")
+    if missing:
+        print(f"error: no such file or no match: {', '.join(missing)}", file=sys.stderr)
+        return EXIT_USAGE
+    if not paths and not sources:
+        print("error: no log files found", file=sys.stderr)
+        return EXIT_USAGE
+
+    def results():
+        if sources:
+            issues = ResultStore(None, iter_issues(sys.stdin, window=window))
+            yield "-", None, issues
+        if paths:
+            workers = args.workers if args.workers > 0 else default_workers()
+            cache = None if args.no_cache else ResultCache()
+            yield from analyze_batch(paths, workers, not args.no_mmap, cache, window=window)
+
+    out = sys.stdout
+    if args.output and not args.quiet:
+        out = open(args.output, 'w', encoding='utf-8', newline='')
+    writer = None
+    if not args.quiet and args.format != "list":
+        writer = make_writer(args.format, out, context=window is not None)
+        writer.begin()
+
+    summary = BatchSummary()
+    reported = {}
+    started = time.perf_counter()
+    try:
+        for file_path, line_count, issues in results():
+            selected = issues.select(wanted)
+            for level in wanted:
+                if issues.count(level):
+                    reported[level] = reported.get(level, 0) + issues.count(level)
+            if file_path != "-":
+                summary.add(file_path, line_count, issues)
+            if writer is not None:
+                writer.write(selected, file_path)
+            elif not args.quiet:
+                for issue in selected:
+                    print(f"{file_path}:{issue['line_num']}: {issue['icon']} [{issue['level']}] "
+                          f"{issue['message']}", file=out)
+                    print_lines(issue, out)
+            out.flush()
+    finally:
+        if writer is not None:
+            writer.end()
+        if out is not sys.stdout:
+            out.close()
+
+    worst = max((level_severity(level) for level in reported), key=severity_rank, default=None)
+    if args.stats:
+        elapsed = time.perf_counter() - started
+        megabytes = summary.total_bytes / 1048576
+        lines = sum(entry["lines"] or 0 for entry in summary.files)
+        print(f"📊 {sum(reported.values())} issues in {len(summary.files) + len(sources)} file(s), "
+              f"{lines} lines, {megabytes:.1f} MB in {elapsed:.2f}s "
+              f"({megabytes / elapsed if elapsed else 0:.1f} MB/s)", file=sys.stderr)
+        for level, count in sorted(reported.items(), key=lambda item: -item[1]):
+            print(f"{count:>9}  {level_severity(level):<9} {level}", file=sys.stderr)
+            for tip in rom_build_tips(level):
+                print(f"{'':>11}💡 {tip}", file=sys.stderr)
+        print(f"worst severity: {worst or 'none'}", file=sys.stderr)
+    if profile is not None:
+        print(profile.format(args.profile_top), file=sys.stderr)
+
+    if worst is None or severity_rank(worst) < severity_rank(args.fail_on):
+        return 0
+    return SEVERITY_EXIT_CODES[worst]
 
 def main():
-    parser = argparse.ArgumentParser(description="Zuan Log Analyzer CLI")
-    parser.add_argument("files", nargs="+", help="Log file(s) to analyze")
+    if sys.argv[1:2] == ["scan"]:
+        return scan(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description="Zuan Log Analyzer CLI",
+        epilog="Use 'main.py scan --help' for the headless detector with severity exit codes.")
+    parser.add_argument("files", nargs="*", default=["-"], help="Log file(s) to analyze ('-' or none for stdin)")
     parser.add_argument("--pattern", help="Custom pattern to filter (optional)")
     parser.add_argument("--fail-only", action="store_true", help="Only show failure-related lines")
+    parser.add_argument("--analyze", action="store_true", help="Run the ROM issue detector instead of printing lines")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --analyze, --batch and --query (0 = all CPUs; default 1, all CPUs for --batch)")
+    parser.add_argument("--no-mmap", action="store_true", help="Decode every line instead of scanning the mapped file as bytes")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the on-disk result cache, checkpoints and line indexes")
+    parser.add_argument("--follow", action="store_true", help="Keep watching a growing log and report new issues as they appear")
+    parser.add_argument("--query", help="Print every line containing this text, using an on-disk line index")
+    parser.add_argument("--batch", action="store_true", help="Analyze files, directories and glob patterns together on one process pool and summarize them")
+    parser.add_argument("--summary-json", metavar="PATH", help="With --batch, write the summary as JSON to PATH ('-' for stdout)")
+    parser.add_argument("--top", type=int, metavar="N", help="With --analyze or --batch, group issues by normalised signature and report the N most frequent")
+    parser.add_argument("--format", type=str.lower, help="With --analyze, write issues as a report, JSON Lines, CSV or SARIF instead of listing them (text, jsonl, csv, sarif)")
+    parser.add_argument("--output", metavar="PATH", help="File for --format output (default stdout)")
+    parser.add_argument("--context", type=int, metavar="N", help="With --analyze or --follow, keep N lines before and after each issue, widened to the whole block for clang diagnostics (include chain, caret line) and ninja FAILED: commands; 0 = blocks only")
+    parser.add_argument("--rules", action="append", metavar="PATH", help="YAML/TOML/JSON rule pack or directory of packs to layer over the built-in rules (repeatable; default: packs in ~/.enhanced_log_seeker/rules)")
+    parser.add_argument("--profile-rules", action="store_true", help="With --analyze, time every detection rule and print the most expensive to stderr (single process, no cache)")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP, metavar="N", help="Rules listed by --profile-rules (default %(default)s)")
     args = parser.parse_args()
 
+    if args.format:
+        from untils.export import EXPORT_FORMATS
+        if args.format not in EXPORT_FORMATS:
+            parser.error(f"argument --format: invalid choice: {args.format!r} "
+                         f"(choose from {', '.join(EXPORT_FORMATS)})")
+    if args.workers is None:
+        args.workers = 0 if args.batch else 1
+
+    if args.follow:
+        from untils.compression import detect_compression
+        from untils.follow import LogFollower
+        if len(args.files) != 1 or args.files[0] == "-":
+            parser.error("--follow needs exactly one log file")
+        if detect_compression(args.files[0]):
+            parser.error("--follow cannot watch a compressed log")
+        use_rule_packs(parser, args.rules, not args.no_cache)
+        follower = LogFollower(args.files[0], use_mmap=not args.no_mmap, window=context_window(args.context))
+        try:
+            for issue in follower.follow():
+                print_issue(issue)
+                sys.stdout.flush()
+        except KeyboardInterrupt:
+            for issue in follower.flush():
+                print_issue(issue)
+        finally:
+            follower.close()
+        return
+
+    if args.batch:
+        from untils.aggregate import IssueAggregator
+        from untils.analysis import default_workers
+        from untils.batch import BatchSummary, analyze_batch, expand_inputs
+        from untils.cache import ResultCache
+        paths = expand_inputs(f for f in args.files if f != "-")
+        if not paths:
+            parser.error("--batch found no log files")
+        use_rule_packs(parser, args.rules, not args.no_cache)
+        workers = args.workers if args.workers > 0 else default_workers()
+        cache = None if args.no_cache else ResultCache()
+        summary = BatchSummary()
+        aggregator = IssueAggregator() if args.top else None
+        report = sys.stderr if args.summary_json == "-" else sys.stdout
+        for file_path, line_count, issues in analyze_batch(paths, workers, not args.no_mmap, cache):
+            entry = summary.add(file_path, line_count, issues)
+            if aggregator is not None:
+                aggregator.add_all(issues, file_path)
+            lines = "?" if line_count is None else line_count
+            print(f"{entry['issues']:>9} issues {lines:>11} lines  {file_path}", file=report)
+            report.flush()
+
+        print(f"\n📊 {summary.total_issues} issues in {len(summary.files)} files "
+              f"({summary.total_bytes / 1048576:.1f} MB, {summary.elapsed:.1f}s)", file=report)
+        for level, count in sorted(summary.levels.items(), key=lambda item: -item[1]):
+            print(f"{count:>9}  {level}", file=report)
+
+        summary_data = summary.to_dict()
+        if aggregator is not None:
+            top = aggregator.top(args.top)
+            summary_data["top_signatures"] = top
+            if report is sys.stdout:
+                print(f"\n🧬 Top {len(top)} of {len(aggregator)} distinct issues")
+                print_signatures(top)
+
+        if args.summary_json:
+            data = json.dumps(summary_data, indent=2, ensure_ascii=False)
+            if args.summary_json == "-":
+                print(data)
+            else:
+                with open(args.summary_json, 'w', encoding='utf-8') as f:
+                    f.write(data + "\n")
+        return
+
+    if args.query is not None:
+        from untils.analysis import default_workers
+        from untils.compression import detect_compression
+        from untils.index import IndexStore, load_index
+        if "-" in args.files:
+            parser.error("--query needs log files, not stdin")
+        if any(detect_compression(file_path) for file_path in args.files):
+            parser.error("--query needs uncompressed logs")
+        workers = args.workers if args.workers > 0 else default_workers()
+        store = None if args.no_cache else IndexStore()
+        for file_path in args.files:
+            if len(args.files) > 1:
+                print(f"==> {file_path} <==")
+            with load_index(file_path, store, workers) as index:
+                for line_num, line in index.search(args.query):
+                    print(f"{line_num}: {line}")
+        return
+
+    if args.analyze:
+        from untils.analysis import analyze_file, default_workers, iter_issues
+        if args.format and args.top:
+            parser.error("--format and --top cannot be combined")
+        use_rule_packs(parser, args.rules, not args.no_cache)
+        profile = None
+        if args.profile_rules:
+            from rom_detection_levels import enable_profiling
+            profile = enable_profiling()
+            args.workers, args.no_cache = 1, True
+        workers = args.workers if args.workers > 0 else default_workers()
+        cache = checkpoints = aggregator = None
+        if not args.no_cache:
+            from untils.cache import CheckpointStore, ResultCache
+            cache, checkpoints = ResultCache(), CheckpointStore()
+        if args.top:
+            from untils.aggregate import IssueAggregator
+            aggregator = IssueAggregator()
+        window = context_window(args.context)
+        writer = None
+        if args.format:
+            from untils.export import make_writer
+            out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+            writer = make_writer(args.format, out, context=window is not None)
+            writer.begin()
+        for file_path in args.files:
+            if len(args.files) > 1 and aggregator is None and writer is None:
+                print(f"==> {file_path} <==")
+            if file_path == "-":
+                issues = iter_issues(sys.stdin, window=window)
+            else:
+                issues = analyze_file(file_path, workers=workers, use_mmap=not args.no_mmap,
+                                      cache=cache, checkpoints=checkpoints, window=window)
+            if aggregator is not None:
+                aggregator.add_all(issues, file_path)
+                continue
+            if writer is not None:
+                writer.write(issues, file_path)
+                continue
+            for issue in issues:
+                print_issue(issue)
+        if writer is not None:
+            writer.end()
+            if out is not sys.stdout:
+                out.close()
+        if aggregator is not None:
+            print(f"🧬 Top {min(args.top, len(aggregator))} of {len(aggregator)} distinct issues "
+                  f"({aggregator.total} total)")
+            print_signatures(aggregator.top(args.top))
+        if profile is not None:
+            print(profile.format(args.profile_top), file=sys.stderr)
+        return
+
+    from untils.highlighter import FAIL_KEYWORDS, highlight_keywords
+    from untils.parser import open_log, parse_logs
+
     for file_path in args.files:
-        with open(file_path, 'r', errors='ignore') as f:
-            content = f.read()
-            lines = parse_logs(content)
+        f = open_log(file_path)
+        try:
+            lines = parse_logs(f)
 
             if args.fail_only:
-                lines = [line for line in lines if any(k in line.lower() for k in FAIL_KEYWORDS)]
+                lines = (line for line in lines if any(k in line.lower() for k in FAIL_KEYWORDS))
             elif args.pattern:
-                lines = [line for line in lines if args.pattern.lower() in line.lower()]
+                pattern = args.pattern.lower()
+                lines = (line for line in lines if pattern in line.lower())
 
-            highlighted = highlight_keywords(lines)
-            for line in highlighted:
+            for line in highlight_keywords(lines):
                 print(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
 
 if __name__ == "__main__":
-    main()
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # Reader went away early (e.g. piped into head); silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except (RuntimeError, OSError) as e:
+        # e.g. a .zst log without the optional zstandard package
+        print(f"error: {e}", file=sys.stderr)
+        sys.exit(EXIT_USAGE)
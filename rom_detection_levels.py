@@ -1,3 +1,13 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from functools import cached_property
+
+from untils.prefilter import LiteralPrefilter
+from untils.regexlint import CATASTROPHIC, analyze_pattern, ordered_in
+
 # ====================== ENHANCED ROM BUILD DETECTION CATEGORIES ======================
 DETECTION_LEVELS = {
     "CRITICAL": {
@@ -218,103 +228,576 @@ DETECTION_LEVELS = {
 }
 
 # ====================== ROM BUILD SPECIFIC MESSAGES ======================
+ROM_MESSAGES = {
+    "CRITICAL": "Critical system failure - build process terminated",
+    "BUILD_FAILED": "Build compilation failed - check dependencies and code",
+    "DEPENDENCY_MISSING": "Missing dependencies or files - may need to sync sources",
+    "KERNEL_ERROR": "Kernel compilation issue - check defconfig and device tree", 
+    "VENDOR_BLOBS": "Proprietary vendor files missing - run extract-files.sh",
+    "MANIFEST_SYNC": "Repository sync issue - check network and manifest",
+    "SEPOLICY_ERROR": "SELinux policy violation - update sepolicy rules",
+    "GAPPS_ISSUES": "Google Apps integration failed - check GApps package compatibility",
+    "TREBLE_COMPATIBILITY": "Project Treble compatibility issue - check VNDK version",
+    "MEMORY_SPACE": "Insufficient disk space or memory - clean build directory",
+    "PERMISSION_DENIED": "Permission error - check file ownership and access rights",
+    "COMPILER_ERROR": "Code compilation error - fix syntax or missing declarations",
+    "CLANG_LLVM": "Clang/LLVM toolchain error - check compiler configuration",
+    "JACK_COMPILATION": "Java compilation failed - may need to increase heap size",
+    "OTA_PACKAGE": "Update package creation failed - check signing keys",
+    "DEVICE_SPECIFIC": "Device-specific configuration error - check BoardConfig.mk",
+    "SOONG_BUILD": "Modern build system error - check Android.bp files",
+    "WARNING": "Potential issue identified",
+    "INFO": "Build process information",
+    "SUCCESS_INDICATORS": "Build step completed successfully"
+}
+
+DEFAULT_ROM_MESSAGE = "ROM build issue detected"
+
 def generate_rom_message(level, line):
     """Generate contextual messages for ROM building issues"""
-    messages = {
-        "CRITICAL": "Critical system failure - build process terminated",
-        "BUILD_FAILED": "Build compilation failed - check dependencies and code",
-        "DEPENDENCY_MISSING": "Missing dependencies or files - may need to sync sources",
-        "KERNEL_ERROR": "Kernel compilation issue - check defconfig and device tree", 
-        "VENDOR_BLOBS": "Proprietary vendor files missing - run extract-files.sh",
-        "MANIFEST_SYNC": "Repository sync issue - check network and manifest",
-        "SEPOLICY_ERROR": "SELinux policy violation - update sepolicy rules",
-        "GAPPS_ISSUES": "Google Apps integration failed - check GApps package compatibility",
-        "TREBLE_COMPATIBILITY": "Project Treble compatibility issue - check VNDK version",
-        "MEMORY_SPACE": "Insufficient disk space or memory - clean build directory",
-        "PERMISSION_DENIED": "Permission error - check file ownership and access rights",
-        "COMPILER_ERROR": "Code compilation error - fix syntax or missing declarations",
-        "CLANG_LLVM": "Clang/LLVM toolchain error - check compiler configuration",
-        "JACK_COMPILATION": "Java compilation failed - may need to increase heap size",
-        "OTA_PACKAGE": "Update package creation failed - check signing keys",
-        "DEVICE_SPECIFIC": "Device-specific configuration error - check BoardConfig.mk",
-        "SOONG_BUILD": "Modern build system error - check Android.bp files",
-        "WARNING": "Potential issue identified",
-        "INFO": "Build process information",
-        "SUCCESS_INDICATORS": "Build step completed successfully"
-    }
-    return messages.get(level, "ROM build issue detected")
+    return get_detector().messages.get(level, DEFAULT_ROM_MESSAGE)
 
-# ====================== ENHANCED PATTERN MATCHING ======================
-def detect_rom_issues(line, line_num):
-    """Enhanced ROM-specific issue detection with context"""
-    issues = []
-    line_lower = line.lower()
+# ====================== SEVERITY ======================
+# How bad an issue of each level is; levels not listed are errors
+SEVERITIES = ("note", "warning", "error", "critical")
+LEVEL_SEVERITY = {
+    "CRITICAL": "critical",
+    "BUILD_FAILED": "critical",
+    "WARNING": "warning",
+    "INFO": "note",
+    "SUCCESS_INDICATORS": "note"
+}
+
+def level_severity(level):
+    """Severity name of a detection level"""
+    return get_detector().severities.get(level, "error")
+
+def severity_rank(severity):
+    """Position of a severity name in SEVERITIES, higher is worse"""
+    return SEVERITIES.index(severity)
+
+# ====================== CONTEXT-AWARE PATTERNS ======================
+# Checked before the standard categories; every matching level is reported
+CONTEXT_PATTERNS = {
+    # Detect specific Android build errors
+    "VENDOR_BLOBS": [
+        r"proprietary.*missing.*extract.*sh",
+        r"vendor.*img.*not.*found", 
+        r"system.*extract.*failed"
+    ],
     
-    # Special context-aware detection
-    context_patterns = {
-        # Detect specific Android build errors
-        "VENDOR_BLOBS": [
-            r"proprietary.*missing.*extract.*sh",
-            r"vendor.*img.*not.*found", 
-            r"system.*extract.*failed"
-        ],
-        
-        # Kernel specific patterns
-        "KERNEL_ERROR": [
-            r"make.*arch.*arm.*failed",
-            r"scripts/dtc.*failed",
-            r"drivers.*\.ko.*failed"
-        ],
-        
-        # Memory related issues during build
-        "MEMORY_SPACE": [
-            r"cc1.*out.*of.*memory",
-            r"ld.*memory.*exhausted",
-            r"ninja.*memory.*allocation"
-        ],
-        
-        # Specific to modern Android builds
-        "SOONG_BUILD": [
-            r"out/soong.*build.*ninja.*failed",
-            r"soong_ui.*Kati.*failed",
-            r"combined.*ninja.*files.*failed"
-        ]
-    }
+    # Kernel specific patterns
+    "KERNEL_ERROR": [
+        r"make.*arch.*arm.*failed",
+        r"scripts/dtc.*failed",
+        r"drivers.*\.ko.*failed"
+    ],
+    
+    # Memory related issues during build
+    "MEMORY_SPACE": [
+        r"cc1.*out.*of.*memory",
+        r"ld.*memory.*exhausted",
+        r"ninja.*memory.*allocation"
+    ],
     
-    # Check context patterns first
-    for level, patterns in context_patterns.items():
-        if any(re.search(pattern, line, re.IGNORECASE) for pattern in patterns):
-            issues.append({
+    # Specific to modern Android builds
+    "SOONG_BUILD": [
+        r"out/soong.*build.*ninja.*failed",
+        r"soong_ui.*Kati.*failed",
+        r"combined.*ninja.*files.*failed"
+    ]
+}
+
+CONTEXT_LABEL = "ROM Build Specific"
+STANDARD_LABEL = "Standard Detection"
+
+# Lines classified before the literal prefilter pays for compiling it
+PREFILTER_WARMUP_LINES = 1000
+
+# Length guard: on longer lines (10 KB clang command lines in ninja logs)
+# keyword and literal-chain rules see the whole line through linear
+# substring checks and other patterns run on the whole line too, except
+# those untils.regexlint flags as slow or catastrophic: they only see about
+# the first MAX_REGEX_LINE characters
+MAX_REGEX_LINE = 8192
+
+# Unicode \s also matches these ASCII separators and re.ASCII does not, so
+# ASCII lines containing them take the Unicode path
+_UNICODE_ONLY_SPACE = re.compile(r"[\x1c-\x1f]")
+
+# ====================== COMPILED DETECTION ENGINE ======================
+def _alternation(patterns):
+    """Join regex sources into one alternation that never matches when empty"""
+    if not patterns:
+        return "(?!)"
+    return "|".join(f"(?:{p})" for p in patterns)
+
+def _line_head(text):
+    """About the first MAX_REGEX_LINE characters of ``text``, cut before
+    whitespace so a word boundary at the cut is one in the whole line too"""
+    cut = max(text.rfind(" ", 0, MAX_REGEX_LINE), text.rfind("\t", 0, MAX_REGEX_LINE))
+    return text[:cut if cut > 0 else MAX_REGEX_LINE]
+
+class RuleGroup:
+    """IGNORECASE patterns (and plain keywords) compiled into faster equal forms.
+
+    untils.regexlint rewrites each pattern into a case-sensitive regex for
+    the lowered line, which is several times faster than IGNORECASE on
+    ASCII lines; untranslatable patterns stay IGNORECASE.  ``search``
+    answers whether any rule of the group matches a line.  Every form is
+    compiled when first needed.
+    """
+
+    def __init__(self, patterns, keywords=()):
+        self.patterns = list(patterns)
+        self.keywords = list(keywords)
+        self._keyword_sources = [re.escape(kw) for kw in self.keywords]
+
+    @cached_property
+    def analyses(self):
+        analyses = [analyze_pattern(p) for p in self.patterns]
+        for analysis in analyses:
+            for kind, message in analysis.findings:
+                if kind == CATASTROPHIC:
+                    logging.getLogger(__name__).warning("Rule %r: %s", analysis.pattern, message)
+        return analyses
+
+    # Keywords are matched against the lowered line as they are
+    @cached_property
+    def lowered_re(self):
+        lowered = [a.lowered for a in self.analyses if a.lowered is not None]
+        return re.compile(_alternation(self._keyword_sources + lowered), re.ASCII)
+
+    @cached_property
+    def residual_re(self):
+        residual = [a.pattern for a in self.analyses if a.lowered is None]
+        return re.compile(_alternation(residual), re.IGNORECASE | re.ASCII) if residual else None
+
+    # Plain forms for non-ASCII lines and warm-up, which need no analysis
+    @cached_property
+    def keyword_re(self):
+        return re.compile(_alternation(self._keyword_sources)) if self._keyword_sources else None
+
+    # Long ASCII lines: literal-only rules stay exact in linear time
+    @cached_property
+    def literal_re(self):
+        return re.compile(_alternation(
+            self._keyword_sources
+            + [re.escape(a.chain[0]) for a in self.analyses if a.chain is not None and len(a.chain) == 1]))
+
+    @cached_property
+    def chains(self):
+        return [a.chain for a in self.analyses if a.chain is not None and len(a.chain) > 1]
+
+    # ``[(regex, on_lowered_line, head_only), ...]`` for the other rules
+    @cached_property
+    def long_ascii_searches(self):
+        searches = []
+        for risky in (False, True):
+            analyses = [a for a in self.analyses if a.chain is None and a.risky == risky]
+            lowered = [a.lowered for a in analyses if a.lowered is not None]
+            residual = [a.pattern for a in analyses if a.lowered is None]
+            if lowered:
+                searches.append((re.compile(_alternation(lowered), re.ASCII), True, risky))
+            if residual:
+                searches.append((re.compile(_alternation(residual), re.IGNORECASE | re.ASCII), False, risky))
+        return searches
+
+    @cached_property
+    def unicode_re(self):
+        return re.compile(_alternation(self.patterns), re.IGNORECASE)
+
+    @cached_property
+    def long_unicode_searches(self):
+        searches = []
+        for risky in (False, True):
+            patterns = [a.pattern for a in self.analyses if a.risky == risky]
+            if patterns:
+                searches.append((re.compile(_alternation(patterns), re.IGNORECASE), False, risky))
+        return searches
+
+    @staticmethod
+    def _search_long(searches, line, line_lower):
+        for regex, on_lowered, head_only in searches:
+            text = line_lower if on_lowered else line
+            if regex.search(_line_head(text) if head_only else text):
+                return True
+        return False
+
+    def search(self, line, line_lower, ascii_only):
+        if not ascii_only:
+            if self.keyword_re is not None and self.keyword_re.search(line_lower):
+                return True
+            if len(line) <= MAX_REGEX_LINE:
+                return self.unicode_re.search(line) is not None
+            return self._search_long(self.long_unicode_searches, line, line_lower)
+        if len(line) <= MAX_REGEX_LINE:
+            return (self.lowered_re.search(line_lower) is not None
+                    or (self.residual_re is not None and self.residual_re.search(line) is not None))
+        if self.literal_re.search(line_lower):
+            return True
+        if any(ordered_in(line_lower, chain) for chain in self.chains):
+            return True
+        return self._search_long(self.long_ascii_searches, line, line_lower)
+
+    def pattern_searches(self, ascii_only):
+        """``[(pattern, regex, on_lowered_line), ...]`` evaluating one pattern each"""
+        if not ascii_only:
+            return [(p, re.compile(p, re.IGNORECASE), False) for p in self.patterns]
+        return [
+            (a.pattern, re.compile(a.lowered, re.ASCII), True) if a.lowered is not None
+            else (a.pattern, re.compile(a.pattern, re.IGNORECASE | re.ASCII), False)
+            for a in self.analyses
+        ]
+
+class RomDetector:
+    """Precompiled ROM issue classifier built once from a ruleset.
+
+    Context patterns are checked first and every matching context level is
+    reported; otherwise the first DETECTION_LEVELS entry whose keywords or
+    patterns match wins, exactly like the original per-line loop.
+
+    Nothing is compiled until the first line is classified.  The first
+    PREFILTER_WARMUP_LINES ASCII lines are checked with the plain
+    IGNORECASE rules; the prefilter and the rewritten rules (and with them
+    the untils.regexlint analysis) are only built after that, so importing
+    the module and checking a short log stay cheap.
+    """
+
+    def __init__(self, levels=None, context_patterns=None, messages=None, severities=None, tips=None):
+        self.levels = DETECTION_LEVELS if levels is None else levels
+        self.context_patterns = CONTEXT_PATTERNS if context_patterns is None else context_patterns
+        self.messages = ROM_MESSAGES if messages is None else messages
+        self.severities = LEVEL_SEVERITY if severities is None else severities
+        self.tips = ROM_BUILD_TIPS if tips is None else tips
+        self._fingerprint = None
+        self._lines_seen = 0
+        # Icon and message depend only on the level
+        self._labels = {
+            level: (config["icon"], self.messages.get(level, DEFAULT_ROM_MESSAGE))
+            for level, config in self.levels.items()
+        }
+
+    # Every rule goes through untils.regexlint once, when its group first
+    # needs a rewritten form
+    @cached_property
+    def _context_any(self):
+        return RuleGroup([p for patterns in self.context_patterns.values() for p in patterns])
+
+    @cached_property
+    def _context_res(self):
+        return [(level, RuleGroup(patterns)) for level, patterns in self.context_patterns.items()]
+
+    @cached_property
+    def _level_res(self):
+        return [
+            (level, RuleGroup(config["patterns"], config["keywords"]))
+            for level, config in self.levels.items()
+        ]
+
+    # Literal prefilter: ASCII lines containing none of the required
+    # literals cannot match any rule and skip the regexes entirely
+    @cached_property
+    def prefilter(self):
+        return LiteralPrefilter.from_rules(
+            [kw for config in self.levels.values() for kw in config["keywords"]],
+            [p for config in self.levels.values() for p in config["patterns"]]
+            + [p for patterns in self.context_patterns.values() for p in patterns])
+
+    @property
+    def fingerprint(self):
+        """Hash of everything that shapes the detector's output"""
+        if self._fingerprint is None:
+            ruleset = {
+                "levels": self.levels,
+                "context_patterns": self.context_patterns,
+                "messages": {level: self._labels[level][1] for level in self.levels},
+            }
+            data = json.dumps(ruleset, sort_keys=True, ensure_ascii=False)
+            self._fingerprint = hashlib.sha256(data.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    @property
+    def lines_skipped(self):
+        """Number of lines rejected by the literal prefilter"""
+        # Not compiled yet means nothing was classified
+        prefilter = self.__dict__.get("prefilter")
+        return prefilter.lines_skipped if prefilter else 0
+
+    def _line_prefilter(self):
+        if self._lines_seen < PREFILTER_WARMUP_LINES:
+            self._lines_seen += 1
+            return None
+        return self.prefilter
+
+    def lint(self):
+        """``[(category, PatternAnalysis), ...]`` for every context and level pattern"""
+        report = [
+            (f"{level} (context)", analysis)
+            for level, group in self._context_res for analysis in group.analyses
+        ]
+        report.extend(
+            (level, analysis) for level, group in self._level_res for analysis in group.analyses)
+        return report
+
+    def _context_levels(self, line, line_lower, ascii_only):
+        if not self._context_any.search(line, line_lower, ascii_only):
+            return []
+        return [level for level, group in self._context_res if group.search(line, line_lower, ascii_only)]
+
+    def _standard_level(self, line, line_lower, ascii_only):
+        for level, group in self._level_res:
+            if group.search(line, line_lower, ascii_only):
+                return level
+        return None
+
+    def _classify_rules(self, line, line_lower, ascii_only):
+        context_levels = self._context_levels(line, line_lower, ascii_only)
+        if context_levels:
+            return [(level, CONTEXT_LABEL) for level in context_levels]
+
+        level = self._standard_level(line, line_lower, ascii_only)
+        if level is None:
+            return []
+        return [(level, STANDARD_LABEL)]
+
+    def classify(self, line):
+        """Return ``[(level, context), ...]`` for a single log line"""
+        line_lower = line.lower()
+        ascii_only = line.isascii()
+        if ascii_only:
+            prefilter = self._line_prefilter()
+            if prefilter is None and len(line) <= MAX_REGEX_LINE:
+                # Warm-up: the plain IGNORECASE forms give the same answer
+                # without analysing and compiling the rewritten ones
+                return self._classify_rules(line, line_lower, False)
+            if prefilter is not None and not prefilter.may_match(line_lower):
+                return []
+            ascii_only = _UNICODE_ONLY_SPACE.search(line) is None
+        return self._classify_rules(line, line_lower, ascii_only)
+
+    def detect(self, line, line_num):
+        """Build issue dicts for a line, same shape as detect_rom_issues"""
+        return [
+            {
                 "line_num": line_num,
                 "line": line.strip(),
                 "level": level,
-                "icon": DETECTION_LEVELS[level]["icon"],
-                "message": generate_rom_message(level, line),
-                "context": "ROM Build Specific"
-            })
-            continue
-    
-    # If no context match, use standard detection
-    if not issues:
-        for level, config in DETECTION_LEVELS.items():
-            # Check keywords
-            keyword_match = any(kw in line_lower for kw in config["keywords"])
-            
-            # Check regex patterns  
-            pattern_match = any(re.search(ptn, line, re.IGNORECASE) for ptn in config["patterns"])
-            
-            if keyword_match or pattern_match:
-                issues.append({
-                    "line_num": line_num,
-                    "line": line.strip(),
-                    "level": level,
-                    "icon": config["icon"],
-                    "message": generate_rom_message(level, line),
-                    "context": "Standard Detection"
-                })
-                break  # Only detect first match to avoid duplicates
-    
-    return issues
+                "icon": self._labels[level][0],
+                "message": self._labels[level][1],
+                "context": context
+            }
+            for level, context in self.classify(line)
+        ]
+
+# ====================== RULE PROFILING ======================
+PREFILTER_CATEGORY = "(prefilter)"
+CONTEXT_GATE_CATEGORY = "(context)"
+LONG_LINE_CATEGORY = "(long lines)"
+KEYWORDS_RULE = "keywords"
+
+class RuleProfile:
+    """Evaluation count, hit count and cumulative time of every rule"""
+
+    def __init__(self):
+        # (category, rule) -> [evaluations, hits, nanoseconds]
+        self.rules = {}
+        self.lines = 0
+
+    def record(self, category, rule, hit, elapsed_ns):
+        entry = self.rules.get((category, rule))
+        if entry is None:
+            entry = self.rules[(category, rule)] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += hit
+        entry[2] += elapsed_ns
+
+    def reset(self):
+        self.rules.clear()
+        self.lines = 0
+
+    @property
+    def total_ns(self):
+        return sum(entry[2] for entry in self.rules.values())
+
+    def rows(self, top=None):
+        """Rules as dicts, most expensive first"""
+        rows = [
+            {"category": category, "rule": rule, "evaluations": evaluations, "hits": hits,
+             "seconds": elapsed_ns / 1e9}
+            for (category, rule), (evaluations, hits, elapsed_ns) in self.rules.items()
+        ]
+        rows.sort(key=lambda row: -row["seconds"])
+        return rows if top is None else rows[:top]
+
+    def format(self, top=25, width=60):
+        """Text table of the ``top`` most expensive rules"""
+        total = self.total_ns / 1e9
+        lines = [
+            f"⏱️ Rule profile: {self.lines} lines classified, {total:.3f}s in rules",
+            f"{'ms':>9} {'%':>5} {'evals':>9} {'hits':>8} {'µs/eval':>8}  category: rule",
+        ]
+        for row in self.rows(top):
+            rule = row["rule"] if len(row["rule"]) <= width else row["rule"][:width - 1] + "…"
+            per_eval = row["seconds"] * 1e6 / row["evaluations"] if row["evaluations"] else 0
+            share = row["seconds"] / total * 100 if total else 0
+            lines.append(f"{row['seconds'] * 1000:>9.1f} {share:>5.1f} {row['evaluations']:>9} "
+                         f"{row['hits']:>8} {per_eval:>8.2f}  {row['category']}: {rule}")
+        return "\n".join(lines)
+
+class ProfilingDetector(RomDetector):
+    """RomDetector that evaluates and times every rule on its own.
+
+    Results are identical, but each level's keywords and each pattern run
+    as separate regexes (in rule order, stopping at the first hit like the
+    merged alternation), so it is much slower; use it to find slow rules.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = RuleProfile()
+
+    @cached_property
+    def _context_rules(self):
+        return [
+            (f"{level} (context)", level, group.pattern_searches(True), group.pattern_searches(False))
+            for level, group in self._context_res
+        ]
+
+    def _level_rules(self, ascii_only):
+        return [(level, group.keyword_re, group.pattern_searches(ascii_only)) for level, group in self._level_res]
+
+    @cached_property
+    def _ascii_rules(self):
+        return self._level_rules(True)
+
+    @cached_property
+    def _unicode_rules(self):
+        return self._level_rules(False)
+
+    def _timed(self, category, rule, search, *args):
+        started = time.perf_counter_ns()
+        hit = bool(search(*args))
+        self.profile.record(category, rule, hit, time.perf_counter_ns() - started)
+        return hit
+
+    def _timed_rules(self, category, rules, line, line_lower):
+        return any(
+            self._timed(category, source, regex.search, line_lower if on_lower else line)
+            for source, regex, on_lower in rules
+        )
+
+    def classify(self, line):
+        self.profile.lines += 1
+        line_lower = line.lower()
+        ascii_only = line.isascii()
+        if ascii_only:
+            prefilter = self._line_prefilter()
+            if prefilter is not None:
+                started = time.perf_counter_ns()
+                passed = prefilter.may_match(line_lower)
+                self.profile.record(PREFILTER_CATEGORY, "literal gate", passed,
+                                    time.perf_counter_ns() - started)
+                if not passed:
+                    return []
+            ascii_only = _UNICODE_ONLY_SPACE.search(line) is None
+
+        if len(line) > MAX_REGEX_LINE:
+            # Guarded lines take the detector's own path, timed as a whole
+            started = time.perf_counter_ns()
+            found = self._classify_rules(line, line_lower, ascii_only)
+            self.profile.record(LONG_LINE_CATEGORY, f"lines over {MAX_REGEX_LINE} chars", bool(found),
+                                time.perf_counter_ns() - started)
+            return found
+
+        if self._timed(CONTEXT_GATE_CATEGORY, "any context pattern", self._context_any.search,
+                       line, line_lower, ascii_only):
+            context_levels = [
+                level for category, level, ascii_rules, unicode_rules in self._context_rules
+                if self._timed_rules(category, ascii_rules if ascii_only else unicode_rules, line, line_lower)
+            ]
+            if context_levels:
+                return [(level, CONTEXT_LABEL) for level in context_levels]
+
+        for level, keyword_re, rules in self._ascii_rules if ascii_only else self._unicode_rules:
+            if ((keyword_re is not None and self._timed(level, KEYWORDS_RULE, keyword_re.search, line_lower))
+                    or self._timed_rules(level, rules, line, line_lower)):
+                return [(level, STANDARD_LABEL)]
+        return []
+
+_default_detector = None
+# Ruleset built from rule packs (None: the built-in dicts) and how it was loaded
+_active_ruleset = None
+_rule_pack_args = None
+
+def _new_detector(cls=RomDetector):
+    return cls() if _active_ruleset is None else cls(**_active_ruleset)
+
+def get_detector():
+    """Return the shared detector compiled from the active ruleset"""
+    global _default_detector
+    if _default_detector is None:
+        _default_detector = _new_detector()
+    return _default_detector
+
+def enable_profiling():
+    """Make the shared detector a ProfilingDetector and return its (reset) profile.
+
+    Only detection in this process is profiled, so callers run single-process
+    and without the result cache while profiling.
+    """
+    global _default_detector
+    if not isinstance(_default_detector, ProfilingDetector):
+        _default_detector = _new_detector(ProfilingDetector)
+    _default_detector.profile.reset()
+    return _default_detector.profile
+
+def disable_profiling():
+    """Go back to the plain shared detector"""
+    global _default_detector
+    if isinstance(_default_detector, ProfilingDetector):
+        _default_detector = None
+
+# ====================== RULE PACKS ======================
+def builtin_ruleset():
+    """The rules defined in this module, in the shape rule packs are merged into"""
+    return {
+        "levels": DETECTION_LEVELS,
+        "context_patterns": CONTEXT_PATTERNS,
+        "messages": ROM_MESSAGES,
+        "severities": LEVEL_SEVERITY,
+        "tips": ROM_BUILD_TIPS,
+    }
+
+def load_rule_packs(paths, use_cache=True):
+    """Layer YAML/TOML/JSON rule packs (files or directories) over the built-in
+    rules and make the result the shared ruleset; returns the pack files.
+
+    Each pack is parsed, validated and analysed once and then served from
+    the compiled-rule cache until its content changes.  An empty ``paths``
+    goes back to the built-in rules.
+    """
+    global _default_detector, _active_ruleset, _rule_pack_args
+    from untils.cache import CompiledRuleCache
+    from untils.rules import build_ruleset
+    ruleset, files = build_ruleset(builtin_ruleset(), paths, CompiledRuleCache() if use_cache else None)
+    _active_ruleset = ruleset if files else None
+    _rule_pack_args = (files, use_cache) if files else None
+    _default_detector = None
+    return files
+
+def rule_pack_args():
+    """Arguments that make ``load_rule_packs`` rebuild the active ruleset (None if built-in)"""
+    return _rule_pack_args
+
+def rom_build_tips(level):
+    """Fix-it tips for a detection level"""
+    return get_detector().tips.get(level, [])
+
+# ====================== ENHANCED PATTERN MATCHING ======================
+def detect_rom_issues(line, line_num):
+    """Enhanced ROM-specific issue detection with context"""
+    return get_detector().detect(line, line_num)
 
 # ====================== ROM BUILD TIPS ======================
 ROM_BUILD_TIPS = {
@@ -1,363 +1,34 @@
-# ===== File: rom_detection_levels.py =====
-# ====================== ENHANCED ROM BUILD DETECTION CATEGORIES ======================
-DETECTION_LEVELS = {
-    "CRITICAL": {
-        "color": "#e17055",
-        "icon": "🔥",
-        "keywords": ["critical", "fatal", "crash", "segfault", "abort", "killed", "terminated"],
-        "patterns": [
-            r"\bcritical\b", r"\bfatal\b", r"\bcrash\b", r"\bsegfault\b", 
-            r"killed by signal", r"terminated", r"abort\(\)"
-        ]
-    },
-    
-    "BUILD_FAILED": {
-        "color": "#d63031",
-        "icon": "💥",
-        "keywords": ["build failed", "compilation failed", "make failed", "ninja failed"],
-        "patterns": [
-            r"build failed", r"compilation.*failed", r"make.*failed", 
-            r"ninja.*failed", r"build/core.*error", r"\[.*FAILED.*\]",
-            r"recipe for target.*failed", r"Stop\.", r"make: \*\*\*"
-        ]
-    },
-    
-    "DEPENDENCY_MISSING": {
-        "color": "#fd79a8", 
-        "icon": "📦",
-        "keywords": ["not found", "no such file", "missing", "undefined reference"],
-        "patterns": [
-            r"No such file or directory", r"not found", r"missing",
-            r"undefined reference", r"cannot find", r"does not exist",
-            r"No rule to make target", r"Nothing to be done",
-            r"ld: cannot find", r"fatal error:.*not found"
-        ]
-    },
-    
-    "KERNEL_ERROR": {
-        "color": "#e84393",
-        "icon": "🔧",
-        "keywords": ["kernel", "dtb", "defconfig", "zimage", "image.gz"],
-        "patterns": [
-            r"kernel.*error", r"defconfig.*not found", r"dtb.*failed",
-            r"zImage.*failed", r"Image\.gz.*failed", r"boot\.img.*failed",
-            r"kernel/.*error", r"arch/arm.*error", r"drivers/.*error",
-            r"CONFIG_.*not set", r"warning: #warning"
-        ]
-    },
-    
-    "VENDOR_BLOBS": {
-        "color": "#a29bfe",
-        "icon": "🏭", 
-        "keywords": ["proprietary", "vendor", "blobs", "extract-files"],
-        "patterns": [
-            r"proprietary.*missing", r"vendor.*not found", r"blobs.*missing",
-            r"extract-files.*failed", r"proprietary-files\.txt.*error",
-            r"vendor/.*not found", r"firmware.*missing"
-        ]
-    },
-    
-    "MANIFEST_SYNC": {
-        "color": "#00cec9",
-        "icon": "🔄",
-        "keywords": ["repo sync", "manifest", "git", "fetch", "checkout"],
-        "patterns": [
-            r"repo sync.*failed", r"manifest.*error", r"git.*failed",
-            r"fatal: .*git", r"error: .*checkout", r"Fetching project",
-            r"Checking out files", r"error: RPC failed"
-        ]
-    },
-    
-    "SEPOLICY_ERROR": {
-        "color": "#fdcb6e",
-        "icon": "🔒",
-        "keywords": ["sepolicy", "selinux", "policy", "security"],
-        "patterns": [
-            r"sepolicy.*error", r"selinux.*denied", r"policy.*failed",
-            r"security.*violation", r"avc:.*denied", r"sepolicy_tests",
-            r"neverallow.*violation", r"checkpolicy.*failed"
-        ]
-    },
-    
-    "GAPPS_ISSUES": {
-        "color": "#fab1a0",
-        "icon": "📱",
-        "keywords": ["gapps", "google", "play store", "gsf", "gms"],
-        "patterns": [
-            r"gapps.*failed", r"google.*service.*failed", r"play.*store.*error",
-            r"gsf.*failed", r"gms.*error", r"com\.google\..*failed",
-            r"GoogleServicesFramework", r"Phonesky.*failed"
-        ]
-    },
-    
-    "TREBLE_COMPATIBILITY": {
-        "color": "#00b894",
-        "icon": "🌳",
-        "keywords": ["treble", "vndk", "vendor interface", "hal"],
-        "patterns": [
-            r"treble.*error", r"vndk.*failed", r"vendor.*interface.*error",
-            r"hal.*failed", r"vintf.*error", r"compatibility.*failed",
-            r"BOARD_VNDK_VERSION", r"system.*as.*root"
-        ]
-    },
-    
-    "MEMORY_SPACE": {
-        "color": "#e17055",
-        "icon": "💾",
-        "keywords": ["no space", "memory", "disk full", "out of memory"],
-        "patterns": [
-            r"no space left", r"disk.*full", r"out of memory", r"malloc.*failed",
-            r"cannot allocate memory", r"virtual memory exhausted",
-            r"No space left on device", r"Disk quota exceeded"
-        ]
-    },
-    
-    "PERMISSION_DENIED": {
-        "color": "#fd79a8",
-        "icon": "🚫", 
-        "keywords": ["permission denied", "access denied", "not permitted"],
-        "patterns": [
-            r"permission denied", r"access denied", r"not permitted",
-            r"operation not permitted", r"insufficient privileges",
-            r"you don't have permission", r"sudo.*required"
-        ]
-    },
-    
-    "COMPILER_ERROR": {
-        "color": "#d63031",  
-        "icon": "⚡",
-        "keywords": ["error:", "undefined", "redefinition", "declaration"],
-        "patterns": [
-            r"error:.*undeclared", r"error:.*undefined", r"error:.*redefinition",
-            r"error:.*declaration", r"error:.*syntax", r"error:.*expected",
-            r"compilation terminated", r"too many errors emitted",
-            r"\berror\b.*:\s*\d+"
-        ]
-    },
-    
-    "CLANG_LLVM": {
-        "color": "#a29bfe",
-        "icon": "🔨",
-        "keywords": ["clang", "llvm", "linker", "ld.lld"],
-        "patterns": [
-            r"clang.*error", r"llvm.*error", r"ld\.lld.*failed",
-            r"linker.*error", r"lld.*failed", r"clang\+\+.*failed",
-            r"undefined symbol", r"duplicate symbol", r"relocation.*failed"
-        ]
-    },
-    
-    "JACK_COMPILATION": {
-        "color": "#fd79a8",
-        "icon": "☕",
-        "keywords": ["jack", "jill", "dex", "r8"],
-        "patterns": [
-            r"jack.*failed", r"jill.*error", r"dex.*failed", 
-            r"r8.*failed", r"proguard.*failed", r"dx.*failed",
-            r"Jack server.*failed", r"OutOfMemoryError.*Jack"
-        ]
-    },
-    
-    "OTA_PACKAGE": {
-        "color": "#00cec9",
-        "icon": "📦",
-        "keywords": ["ota", "update", "recovery", "zip"],
-        "patterns": [
-            r"ota.*failed", r"update.*package.*failed", r"recovery.*failed",
-            r"zip.*alignment.*failed", r"signing.*failed", r"verification.*failed",
-            r"META-INF.*error", r"updater-script.*error"
-        ]
-    },
-    
-    "DEVICE_SPECIFIC": {
-        "color": "#fdcb6e",
-        "icon": "📱",
-        "keywords": ["board", "device", "init", "rc file"],
-        "patterns": [
-            r"BoardConfig.*error", r"device.*mk.*error", r"init.*rc.*error",
-            r"device specific.*failed", r"hardware.*not found", 
-            r"overlay.*failed", r"device tree.*error"
-        ]
-    },
-    
-    "SOONG_BUILD": {
-        "color": "#6c5ce7",
-        "icon": "🏗️", 
-        "keywords": ["soong", "blueprint", "android.bp"],
-        "patterns": [
-            r"soong.*failed", r"blueprint.*error", r"Android\.bp.*error",
-            r"soong_ui.*failed", r"build system.*error", r"bootstrap.*failed",
-            r"ninja.*build.*stopped"
-        ]
-    },
-    
-    "WARNING": {
-        "color": "#fdcb6e",
-        "icon": "⚠️",
-        "keywords": ["warn", "unable", "cannot", "deprecated", "not found"],
-        "patterns": [
-            r"\bwarn(?:ing)?\b", r"\bcannot\b", r"\bdeprecated\b",
-            r"note:", r"warning:", r"deprecated"
-        ]
-    },
-    
-    "INFO": {
-        "color": "#74b9ff",
-        "icon": "ℹ️",
-        "keywords": ["info", "notice", "debug", "trace", "building"],
-        "patterns": [r"\binfo\b", r"\bnotice\b", r"\bdebug\b", r"Building"]
-    },
-    
-    "SUCCESS_INDICATORS": {
-        "color": "#00b894",
-        "icon": "✅",
-        "keywords": ["successful", "completed", "finished", "done"],
-        "patterns": [
-            r"build.*successful", r"compilation.*completed", r"finished",
-            r".*done\.", r"Build completed", r"Package complete"
-        ]
-    }
-}
-
-# ====================== ROM BUILD SPECIFIC MESSAGES ======================
-def generate_rom_message(level, line):
-    """Generate contextual messages for ROM building issues"""
-    messages = {
-        "CRITICAL": "Critical system failure - build process terminated",
-        "BUILD_FAILED": "Build compilation failed - check dependencies and code",
-        "DEPENDENCY_MISSING": "Missing dependencies or files - may need to sync sources",
-        "KERNEL_ERROR": "Kernel compilation issue - check defconfig and device tree", 
-        "VENDOR_BLOBS": "Proprietary vendor files missing - run extract-files.sh",
-        "MANIFEST_SYNC": "Repository sync issue - check network and manifest",
-        "SEPOLICY_ERROR": "SELinux policy violation - update sepolicy rules",
-        "GAPPS_ISSUES": "Google Apps integration failed - check GApps package compatibility",
-        "TREBLE_COMPATIBILITY": "Project Treble compatibility issue - check VNDK version",
-        "MEMORY_SPACE": "Insufficient disk space or memory - clean build directory",
-        "PERMISSION_DENIED": "Permission error - check file ownership and access rights",
-        "COMPILER_ERROR": "Code compilation error - fix syntax or missing declarations",
-        "CLANG_LLVM": "Clang/LLVM toolchain error - check compiler configuration",
-        "JACK_COMPILATION": "Java compilation failed - may need to increase heap size",
-        "OTA_PACKAGE": "Update package creation failed - check signing keys",
-        "DEVICE_SPECIFIC": "Device-specific configuration error - check BoardConfig.mk",
-        "SOONG_BUILD": "Modern build system error - check Android.bp files",
-        "WARNING": "Potential issue identified",
-        "INFO": "Build process information",
-        "SUCCESS_INDICATORS": "Build step completed successfully"
-    }
-    return messages.get(level, "ROM build issue detected")
-
-# ====================== ENHANCED PATTERN MATCHING ======================
-def detect_rom_issues(line, line_num):
-    """Enhanced ROM-specific issue detection with context"""
-    issues = []
-    line_lower = line.lower()
-    
-    # Special context-aware detection
-    context_patterns = {
-        # Detect specific Android build errors
-        "VENDOR_BLOBS": [
-            r"proprietary.*missing.*extract.*sh",
-            r"vendor.*img.*not.*found", 
-            r"system.*extract.*failed"
-        ],
-        
-        # Kernel specific patterns
-        "KERNEL_ERROR": [
-            r"make.*arch.*arm.*failed",
-            r"scripts/dtc.*failed",
-            r"drivers.*\.ko.*failed"
-        ],
-        
-        # Memory related issues during build
-        "MEMORY_SPACE": [
-            r"cc1.*out.*of.*memory",
-            r"ld.*memory.*exhausted",
-            r"ninja.*memory.*allocation"
-        ],
-        
-        # Specific to modern Android builds
-        "SOONG_BUILD": [
-            r"out/soong.*build.*ninja.*failed",
-            r"soong_ui.*Kati.*failed",
-            r"combined.*ninja.*files.*failed"
-        ]
-    }
-    
-    # Check context patterns first
-    for level, patterns in context_patterns.items():
-        if any(re.search(pattern, line, re.IGNORECASE) for pattern in patterns):
-            issues.append({
-                "line_num": line_num,
-                "line": line.strip(),
-                "level": level,
-                "icon": DETECTION_LEVELS[level]["icon"],
-                "message": generate_rom_message(level, line),
-                "context": "ROM Build Specific"
-            })
-            continue
-    
-    # If no context match, use standard detection
-    if not issues:
-        for level, config in DETECTION_LEVELS.items():
-            # Check keywords
-            keyword_match = any(kw in line_lower for kw in config["keywords"])
-            
-            # Check regex patterns  
-            pattern_match = any(re.search(ptn, line, re.IGNORECASE) for ptn in config["patterns"])
-            
-            if keyword_match or pattern_match:
-                issues.append({
-                    "line_num": line_num,
-                    "line": line.strip(),
-                    "level": level,
-                    "icon": config["icon"],
-                    "message": generate_rom_message(level, line),
-                    "context": "Standard Detection"
-                })
-                break  # Only detect first match to avoid duplicates
-    
-    return issues
-
-# ====================== ROM BUILD TIPS ======================
-ROM_BUILD_TIPS = {
-    "DEPENDENCY_MISSING": [
-        "Run 'repo sync --force-sync' to update all repositories",
-        "Check if device-specific repositories are properly added to manifest",
-        "Verify all proprietary files are extracted with extract-files.sh"
-    ],
-    
-    "KERNEL_ERROR": [
-        "Clean kernel with 'make mrproper' in kernel directory", 
-        "Check if correct defconfig is being used for your device",
-        "Verify device tree source files are present and correct"
-    ],
-    
-    "VENDOR_BLOBS": [
-        "Run ./extract-files.sh from device directory",
-        "Use adb pull to manually extract missing proprietary files",
-        "Check if device is properly rooted for blob extraction"
-    ],
-    
-    "MEMORY_SPACE": [
-        "Clean build directory with 'make clean' or 'rm -rf out/'",
-        "Increase swap space or use faster storage",
-        "Use 'make -j$(nproc)' instead of higher parallel jobs"
-    ],
-    
-    "SEPOLICY_ERROR": [
-        "Update sepolicy rules in device/manufacturer/device/sepolicy/",
-        "Check for missing sepolicy entries in system/sepolicy/",
-        "Verify contexts and permissions in file_contexts"
-    ]
-}
-
-# ===== File: run.py =====
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
+from tkinter import ttk, filedialog, messagebox
+from tkinter import font as tkfont
 import logging
 import os
+import queue
 from datetime import datetime
 import re
-from rom_detection_levels import detect_rom_issues, DETECTION_LEVELS
+from rom_detection_levels import (detect_rom_issues, get_detector, enable_profiling, disable_profiling,
+                                  level_severity, load_rule_packs, rom_build_tips)
+from untils.analysis import analyze_file, default_workers
+from untils.worker import AnalysisWorker
+from untils.results import ResultStore
+from untils.cache import ResultCache, CheckpointStore, APP_DIR
+from untils.compression import detect_compression
+# Follow mode, the line index, grouping and export are imported on first use
+
+# Milliseconds between checks of a followed log
+FOLLOW_POLL_MS = 1000
+# Milliseconds between drains of the analysis worker's queue
+ANALYSIS_POLL_MS = 100
+# Queue messages handled per drain so the UI never stalls on a burst
+QUEUE_DRAIN_LIMIT = 50
+# Matching lines listed by "Search Similar"
+SEARCH_RESULT_LIMIT = 1000
+# Signatures listed by "Recurring Issues"
+RECURRING_LIMIT = 100
+# Text exports up to this many issues are also put on the clipboard
+CLIPBOARD_EXPORT_LIMIT = 2000
+# Slowest rules listed in the statistics popup after a profiled analysis
+PROFILE_STATS_LIMIT = 10
 
 # ====================== MODERN UI THEME ======================
 class ModernTheme:
@@ -477,16 +148,203 @@ class ModernCard(tk.Frame):
             )
             title_label.pack(fill="x", padx=16, pady=(16, 8))
 
+class VirtualResultList(tk.Frame):
+    """Scrollable issue list that only materialises the rows on screen.
+
+    ``items`` is any sequence of issue dicts (it is indexed, never copied),
+    so scrolling and swapping filters cost the same for ten issues or ten
+    million.  Each issue takes ROW_LINES lines of the inner Text widget.
+    """
+    ROW_LINES = 3
+    
+    def __init__(self, parent, **kwargs):
+        super().__init__(parent, bg=ModernTheme.COLORS['bg_secondary'], **kwargs)
+        self.items = []
+        self.first = 0
+        self.message = None
+        
+        self.header = tk.Label(
+            self,
+            text="",
+            bg=ModernTheme.COLORS['bg_secondary'],
+            fg=ModernTheme.COLORS['accent'],
+            font=ModernTheme.FONTS['header'],
+            anchor="w"
+        )
+        self.header.pack(fill="x", pady=(0, 8))
+        
+        # Rows are not wrapped, long lines scroll sideways instead
+        self.xscrollbar = ttk.Scrollbar(self, orient="horizontal")
+        self.xscrollbar.pack(side="bottom", fill="x")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.text = tk.Text(
+            self,
+            wrap=tk.NONE,
+            font=ModernTheme.FONTS['mono'],
+            bg=ModernTheme.COLORS['bg_primary'],
+            fg=ModernTheme.COLORS['text_primary'],
+            insertbackground=ModernTheme.COLORS['accent'],
+            relief="flat",
+            bd=0,
+            padx=16,
+            pady=16,
+            selectbackground=ModernTheme.COLORS['accent'],
+            selectforeground=ModernTheme.COLORS['text_primary'],
+            state="disabled",
+            xscrollcommand=self.xscrollbar.set
+        )
+        self.text.pack(side="left", fill="both", expand=True)
+        self.xscrollbar.config(command=self.text.xview)
+        
+        self.line_height = max(
+            tkfont.Font(font=ModernTheme.FONTS['mono']).metrics('linespace'),
+            tkfont.Font(font=ModernTheme.FONTS['mono_bold']).metrics('linespace'))
+        
+        self.text.bind("<Configure>", lambda e: self.render())
+        # A disabled Text is not focused on click by its class binding, and
+        # the keys below only reach a focused widget
+        self.text.bind("<Button-1>", lambda e: self.text.focus_set())
+        self.text.bind("<MouseWheel>", self.on_mousewheel)
+        self.text.bind("<Button-4>", lambda e: self.scroll_rows(-3))
+        self.text.bind("<Button-5>", lambda e: self.scroll_rows(3))
+        self.text.bind("<Prior>", lambda e: self.scroll_rows(-self.visible_rows()))
+        self.text.bind("<Next>", lambda e: self.scroll_rows(self.visible_rows()))
+        self.text.bind("<Up>", lambda e: self.scroll_rows(-1))
+        self.text.bind("<Down>", lambda e: self.scroll_rows(1))
+        self.text.bind("<Control-Home>", lambda e: self.scroll_to(0))
+        self.text.bind("<Control-End>", lambda e: self.scroll_to_end())
+    
+    def visible_rows(self):
+        height = max(self.text.winfo_height() - 32, self.line_height)
+        return max(1, height // (self.line_height * self.ROW_LINES))
+    
+    def set_header(self, text):
+        self.header.config(text=text)
+    
+    def set_items(self, items):
+        """Show a new sequence of issues from the top"""
+        self.items = items
+        self.message = None
+        self.first = 0
+        self.render()
+    
+    def items_appended(self):
+        """Refresh after the shown sequence grew in place"""
+        if self.message is not None:
+            self.message = None
+            self.render()
+        elif self.first + self.visible_rows() >= len(self.items) - 1:
+            self.render()
+        else:
+            self.update_scrollbar()
+    
+    def show_message(self, text, tag="HEADER"):
+        """Replace the list with a plain message"""
+        self.items = []
+        self.first = 0
+        self.message = (text, tag)
+        self.render()
+    
+    def scroll_rows(self, rows):
+        self.scroll_to(self.first + rows)
+        return "break"
+    
+    def scroll_to(self, row):
+        last_first = max(0, len(self.items) - self.visible_rows())
+        row = max(0, min(int(row), last_first))
+        if row != self.first:
+            self.first = row
+            self.render()
+        return "break"
+    
+    def scroll_to_end(self):
+        return self.scroll_to(len(self.items))
+    
+    def on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self.scroll_rows(-3 * step)
+    
+    def yview(self, *args):
+        """Scrollbar callback"""
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.items))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows()
+            self.scroll_rows(amount)
+    
+    def update_scrollbar(self):
+        total = len(self.items)
+        if not total:
+            self.scrollbar.set(0, 1)
+            return
+        self.scrollbar.set(self.first / total,
+                           min(1.0, (self.first + self.visible_rows()) / total))
+    
+    def render(self):
+        """Redraw the rows currently in view"""
+        self.text.config(state="normal")
+        self.text.delete(1.0, tk.END)
+        if self.message is not None:
+            self.text.insert(tk.END, *self.message)
+        else:
+            end = min(len(self.items), self.first + self.visible_rows() + 1)
+            for i in range(self.first, end):
+                issue = self.items[i]
+                # Issue header with icon and level
+                self.text.insert(tk.END, 
+                    f"{issue['icon']} [{issue['level']}] ", 
+                    issue["level"])
+                
+                self.text.insert(tk.END, 
+                    f"Line {issue['line_num']}: {issue['message']}\n", 
+                    "LINE_NUMBER")
+                
+                # Code line with syntax highlighting
+                self.text.insert(tk.END, 
+                    f"    {issue['line']}\n\n", 
+                    issue["level"])
+        self.text.config(state="disabled")
+        self.update_scrollbar()
+
 class EnhancedLogSeeker:
     def __init__(self, root):
         self.root = root
         self.setup_theme()
+        self.rule_files = self.load_rule_packs()
         self.setup_ui()
         self.setup_logging()
         self.current_file = ""
-        self.current_results = []
-        self.animation_after_id = None
-        
+        self.current_results = ResultStore()
+        self.worker = None
+        self.analysis_after_id = None
+        self.analysis_size = 1
+        self.follower = None
+        self.follow_after_id = None
+        # Worker running the current follow poll, if any
+        self.follow_worker = None
+        self.rule_profile = None
+        self.result_cache = ResultCache()
+        self.checkpoints = CheckpointStore()
+        self.index_store = None
+        self.tasks = {}
+        
+    def load_rule_packs(self):
+        """Layer the rule packs installed in the rules directory over the built-in rules"""
+        from untils.rules import RuleFileError, default_rule_files
+        files = default_rule_files()
+        if not files:
+            return []
+        try:
+            return load_rule_packs(files)
+        except (RuleFileError, OSError) as e:
+            messagebox.showerror("📜 Rule Packs", f"Using the built-in rules only:\n{e}")
+            return []
+
     def setup_theme(self):
         """Setup modern dark theme"""
         self.root.configure(bg=ModernTheme.COLORS['bg_primary'])
@@ -523,10 +381,17 @@ class EnhancedLogSeeker:
         style.map('Modern.TCombobox',
             selectbackground=[('focus', ModernTheme.COLORS['accent'])],
             selectforeground=[('focus', ModernTheme.COLORS['text_primary'])])
+        
+        style.configure('Modern.Horizontal.TProgressbar',
+            troughcolor=ModernTheme.COLORS['bg_tertiary'],
+            background=ModernTheme.COLORS['accent'],
+            bordercolor=ModernTheme.COLORS['border'],
+            lightcolor=ModernTheme.COLORS['accent_light'],
+            darkcolor=ModernTheme.COLORS['accent_dark'])
 
     def setup_logging(self):
         """Configure logging"""
-        log_dir = os.path.join(os.path.expanduser('~'), '.enhanced_log_seeker')
+        log_dir = APP_DIR
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
             
@@ -656,7 +521,7 @@ class EnhancedLogSeeker:
         self.filter_menu = ttk.Combobox(
             filter_frame,
             textvariable=self.filter_var,
-            values=["ALL"] + list(DETECTION_LEVELS.keys()),
+            values=["ALL"] + list(get_detector().levels),
             state="readonly",
             style='Modern.TCombobox',
             width=15
@@ -664,6 +529,60 @@ class EnhancedLogSeeker:
         self.filter_menu.pack(side="left")
         self.filter_menu.bind('<<ComboboxSelected>>', lambda e: self.filter_results())
         
+        tk.Label(
+            filter_frame,
+            text="Workers:",
+            bg=ModernTheme.COLORS['bg_secondary'],
+            fg=ModernTheme.COLORS['text_secondary'],
+            font=ModernTheme.FONTS['body']
+        ).pack(side="left", padx=(16, 8))
+        
+        self.workers_var = tk.IntVar(value=default_workers())
+        self.workers_spin = tk.Spinbox(
+            filter_frame,
+            from_=1,
+            to=max(64, default_workers()),
+            textvariable=self.workers_var,
+            width=4,
+            bg=ModernTheme.COLORS['bg_secondary'],
+            fg=ModernTheme.COLORS['text_primary'],
+            buttonbackground=ModernTheme.COLORS['bg_tertiary'],
+            insertbackground=ModernTheme.COLORS['accent'],
+            relief="flat",
+            font=ModernTheme.FONTS['body']
+        )
+        self.workers_spin.pack(side="left")
+        
+        self.follow_var = tk.BooleanVar(value=False)
+        self.follow_check = tk.Checkbutton(
+            filter_frame,
+            text="📡 Follow",
+            variable=self.follow_var,
+            command=self.toggle_follow,
+            bg=ModernTheme.COLORS['bg_secondary'],
+            fg=ModernTheme.COLORS['text_secondary'],
+            selectcolor=ModernTheme.COLORS['bg_tertiary'],
+            activebackground=ModernTheme.COLORS['bg_secondary'],
+            activeforeground=ModernTheme.COLORS['text_primary'],
+            font=ModernTheme.FONTS['body']
+        )
+        self.follow_check.pack(side="left", padx=(16, 0))
+        
+        # Opt-in per-rule timing, reported in the statistics popup
+        self.profile_var = tk.BooleanVar(value=False)
+        self.profile_check = tk.Checkbutton(
+            filter_frame,
+            text="⏱️ Profile Rules",
+            variable=self.profile_var,
+            bg=ModernTheme.COLORS['bg_secondary'],
+            fg=ModernTheme.COLORS['text_secondary'],
+            selectcolor=ModernTheme.COLORS['bg_tertiary'],
+            activebackground=ModernTheme.COLORS['bg_secondary'],
+            activeforeground=ModernTheme.COLORS['text_primary'],
+            font=ModernTheme.FONTS['body']
+        )
+        self.profile_check.pack(side="left", padx=(16, 0))
+        
         # Action buttons
         action_buttons = tk.Frame(action_frame, bg=ModernTheme.COLORS['bg_secondary'])
         action_buttons.pack(side="right")
@@ -676,6 +595,14 @@ class EnhancedLogSeeker:
         )
         self.analyze_btn.pack(side="left", padx=(0, 8))
         
+        # Only packed while an analysis is running
+        self.cancel_btn = ModernButton(
+            action_buttons,
+            text="✖ Cancel",
+            command=self.cancel_analysis,
+            style="secondary"
+        )
+        
         self.export_btn = ModernButton(
             action_buttons,
             text="💾 Export",
@@ -737,28 +664,13 @@ class EnhancedLogSeeker:
         results_card = ModernCard(parent, title="📋 Analysis Results")
         results_card.pack(fill="both", expand=True)
         
-        # Results text area with modern styling
-        text_frame = tk.Frame(results_card, bg=ModernTheme.COLORS['bg_secondary'])
-        text_frame.pack(fill="both", expand=True, padx=16, pady=(0, 16))
-        
-        self.result_text = scrolledtext.ScrolledText(
-            text_frame,
-            wrap=tk.WORD,
-            font=ModernTheme.FONTS['mono'],
-            bg=ModernTheme.COLORS['bg_primary'],
-            fg=ModernTheme.COLORS['text_primary'],
-            insertbackground=ModernTheme.COLORS['accent'],
-            relief="flat",
-            bd=0,
-            padx=16,
-            pady=16,
-            selectbackground=ModernTheme.COLORS['accent'],
-            selectforeground=ModernTheme.COLORS['text_primary']
-        )
-        self.result_text.pack(fill="both", expand=True)
+        # Virtualized results list with modern styling
+        self.results_view = VirtualResultList(results_card)
+        self.results_view.pack(fill="both", expand=True, padx=16, pady=(0, 16))
+        self.result_text = self.results_view.text
         
         # Configure text tags for different levels
-        for level, config in DETECTION_LEVELS.items():
+        for level, config in get_detector().levels.items():
             self.result_text.tag_config(
                 level,
                 foreground=config["color"],
@@ -800,15 +712,26 @@ class EnhancedLogSeeker:
         )
         self.status_label.pack(side="left", padx=16, pady=8)
         
-        # Progress indicator (animated dots)
+        # Progress of the running analysis, in bytes of the file
         self.progress_label = tk.Label(
             status_frame,
             text="",
+            width=5,
             bg=ModernTheme.COLORS['bg_secondary'],
             fg=ModernTheme.COLORS['accent'],
             font=ModernTheme.FONTS['body']
         )
-        self.progress_label.pack(side="right", padx=16, pady=8)
+        self.progress_label.pack(side="right", padx=(8, 16), pady=8)
+        
+        self.progress_bar = ttk.Progressbar(
+            status_frame,
+            style='Modern.Horizontal.TProgressbar',
+            orient="horizontal",
+            mode="determinate",
+            maximum=100,
+            length=200
+        )
+        self.progress_bar.pack(side="right", pady=8)
     
     def browse_file(self):
         """Modern file dialog"""
@@ -816,6 +739,7 @@ class EnhancedLogSeeker:
             title="🔍 Select File to Analyze",
             filetypes=[
                 ("Log Files", "*.log"),
+                ("Compressed Logs", "*.gz *.bgz *.zst *.xz *.bz2"),
                 ("Python Files", "*.py"),
                 ("Text Files", "*.txt"),
                 ("JavaScript Files", "*.js"),
@@ -830,83 +754,250 @@ class EnhancedLogSeeker:
             logging.info(f"File selected: {filepath}")
     
     def analyze_file(self):
-        """Enhanced analysis with progress animation"""
+        """Start a background analysis with live progress"""
         filepath = self.file_var.get()
         if not filepath or not os.path.exists(filepath):
             messagebox.showwarning("❌ Missing File", "Please select a valid file first.")
             return
+        if self.worker:
+            return
+        
+        self.stop_follow()
+        if self.follow_var.get() and detect_compression(filepath):
+            # Archived logs are complete; there is nothing to follow
+            self.follow_var.set(False)
+        self.current_file = filepath
+        self.current_results.close()
+        # A followed log may be rotated or truncated, so keep its lines in
+        # memory; otherwise line text is read back from the file by offset
+        self.current_results = ResultStore(None if self.follow_var.get() else filepath)
+        self.results_view.set_header("")
+        self.results_view.show_message("🔍 Analyzing...\n")
+        
+        # Profiling only sees this process, so it runs without workers or cache
+        profiling = self.profile_var.get()
+        if profiling:
+            self.rule_profile = enable_profiling()
+        else:
+            disable_profiling()
+            self.rule_profile = None
+        self.update_stats()
         
-        self.start_progress_animation()
+        self.analysis_size = max(os.path.getsize(filepath), 1)
+        self.start_progress()
         self.status_var.set("🔍 Analyzing file...")
         self.analyze_btn.label.config(text="Analyzing...")
+        self.cancel_btn.pack(side="left", padx=(0, 8), before=self.export_btn)
         
-        # Use after() to prevent UI blocking
-        self.root.after(100, self.perform_analysis)
-    
-    def perform_analysis(self):
-        """Perform the actual file analysis"""
-        try:
-            filepath = self.file_var.get()
-            self.current_results = []
+        if self.follow_var.get():
+            from untils.follow import LogFollower
+            # The follower does the initial pass so later polls continue from its offset
+            follower = LogFollower(filepath)
+            self.follower = follower
             
-            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-                for line_num, line in enumerate(f, 1):
-                    stripped_line = line.strip()
-                    if not stripped_line:
-                        continue
-                    
-                    detected_issues = self.detect_issues(stripped_line, line_num)
-                    if detected_issues:
-                        self.current_results.extend(detected_issues)
+            def job(progress, cancel):
+                follower.poll(progress, cancel)
+        else:
+            workers = 1 if profiling else self.get_worker_count()
+            cache = None if profiling else self.result_cache
+            checkpoints = None if profiling else self.checkpoints
             
-            self.stop_progress_animation()
+            def job(progress, cancel):
+                analyze_file(filepath, workers=workers, cache=cache,
+                             checkpoints=checkpoints, progress=progress, cancel=cancel)
+        
+        self.worker = AnalysisWorker(job)
+        self.worker.start()
+        self.analysis_after_id = self.root.after(ANALYSIS_POLL_MS, self.drain_analysis_queue)
+    
+    def drain_analysis_queue(self):
+        """Move finished batches from the worker into the UI"""
+        self.analysis_after_id = None
+        if not self.worker:
+            return
+        
+        batch = []
+        finished = None
+        try:
+            for _ in range(QUEUE_DRAIN_LIMIT):
+                kind, payload, position = self.worker.messages.get_nowait()
+                if kind == "batch":
+                    if isinstance(payload, ResultStore):
+                        # Cache and checkpoint hits: merged column by column,
+                        # never turned into dicts on the Tk thread
+                        if batch:
+                            self.append_results(batch)
+                            batch = []
+                        self.append_results(payload)
+                    else:
+                        batch.extend(payload)
+                    self.set_progress(position)
+                else:
+                    finished = (kind, payload)
+                    break
+        except queue.Empty:
+            pass
+        
+        if batch:
+            self.append_results(batch)
+        if finished:
+            self.finish_analysis(*finished)
+        else:
+            self.analysis_after_id = self.root.after(ANALYSIS_POLL_MS, self.drain_analysis_queue)
+    
+    def finish_analysis(self, kind, payload):
+        """Wrap up after the worker reported its outcome"""
+        self.worker = None
+        self.stop_progress()
+        self.cancel_btn.pack_forget()
+        self.analyze_btn.label.config(text="🔍 Analyze")
+        filepath = self.current_file
+        filename = os.path.basename(filepath)
+        total_issues = len(self.current_results)
+        
+        if kind == "error":
+            self.stop_follow()
+            self.handle_error(f"Analysis error: {payload}")
+            return
+        
+        if kind == "cancelled":
+            self.stop_follow()
+            self.status_var.set(f"⏹️ Analysis cancelled: {total_issues} issues found before stopping")
+            logging.info(f"Analysis cancelled: {filepath}")
+            return
+        
+        if not self.current_results:
             self.display_results()
-            self.update_stats()
-            self.analyze_btn.label.config(text="🔍 Analyze")
-            
-            total_issues = len(self.current_results)
-            filename = os.path.basename(filepath)
-            self.status_var.set(f"✅ Analysis complete! Found {total_issues} issues in {filename}")
-            
-            logging.info(f"Analysis completed: {total_issues} issues found in {filepath}")
+        self.status_var.set(f"✅ Analysis complete! Found {total_issues} issues in {filename}")
+        logging.info(f"Analysis completed: {total_issues} issues found in {filepath}")
         
-        except Exception as e:
-            self.stop_progress_animation()
-            self.handle_error(f"Analysis error: {str(e)}")
-            self.analyze_btn.label.config(text="🔍 Analyze")
+        if self.follower:
+            self.status_var.set(f"📡 Following {filename}: {total_issues} issues so far")
+            self.follow_after_id = self.root.after(FOLLOW_POLL_MS, self.poll_follow)
+    
+    def cancel_analysis(self):
+        """Ask the running analysis to stop"""
+        if self.worker:
+            self.worker.cancel()
+            self.status_var.set("⏹️ Cancelling analysis...")
+    
+    def get_worker_count(self):
+        """Worker processes requested in the control panel"""
+        try:
+            return max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            return 1
+    
+    def toggle_follow(self):
+        """Start or stop following the selected log"""
+        if not self.follow_var.get():
+            self.stop_follow()
+            self.status_var.set("⏹️ Stopped following")
+            return
+        
+        filepath = self.file_var.get()
+        if filepath and os.path.exists(filepath):
+            self.analyze_file()
+    
+    def poll_follow(self):
+        """Analyze bytes appended to the followed log since the last poll, off the Tk thread"""
+        self.follow_after_id = None
+        if not self.follower:
+            return
+        follower = self.follower
+        
+        def job(progress, cancel):
+            try:
+                follower.poll(progress, cancel)
+            finally:
+                # Stopped while polling: the file is released here, not under the poll
+                if cancel.is_set():
+                    follower.close()
+        
+        self.follow_worker = AnalysisWorker(job)
+        self.follow_worker.start()
+        self.follow_after_id = self.root.after(ANALYSIS_POLL_MS, self.drain_follow_queue)
+    
+    def drain_follow_queue(self):
+        """Show issues found by the running follow poll; schedule the next poll when it is done"""
+        self.follow_after_id = None
+        worker = self.follow_worker
+        if not worker:
+            return
+        
+        new_issues = []
+        finished = None
+        try:
+            for _ in range(QUEUE_DRAIN_LIMIT):
+                kind, payload, _ = worker.messages.get_nowait()
+                if kind == "batch":
+                    new_issues.extend(payload)
+                else:
+                    finished = (kind, payload)
+                    break
+        except queue.Empty:
+            pass
+        
+        if new_issues:
+            self.append_results(new_issues)
+            self.results_view.scroll_to_end()
+            filename = os.path.basename(self.follower.path)
+            self.status_var.set(
+                f"📡 Following {filename}: {len(new_issues)} new, {len(self.current_results)} total")
+        if not finished:
+            self.follow_after_id = self.root.after(ANALYSIS_POLL_MS, self.drain_follow_queue)
+            return
+        
+        self.follow_worker = None
+        kind, payload = finished
+        if kind == "error":
+            self.stop_follow()
+            self.handle_error(f"Follow error: {payload}")
+        elif kind == "done":
+            self.follow_after_id = self.root.after(FOLLOW_POLL_MS, self.poll_follow)
+    
+    def stop_follow(self):
+        """Stop polling and release the followed file"""
+        if self.follow_after_id:
+            self.root.after_cancel(self.follow_after_id)
+            self.follow_after_id = None
+        if self.follow_worker:
+            # The poll's job closes the follower once it sees the cancel
+            self.follow_worker.cancel()
+            self.follow_worker = None
+            self.follower = None
+        if self.follower:
+            # A follower still doing its first pass in the worker is left to it
+            if not self.worker:
+                self.follower.close()
+            self.follower = None
+    
+    def append_results(self, issues):
+        """Add newly detected issues without redrawing existing ones"""
+        was_empty = not self.current_results
+        self.current_results.extend(issues)
+        if was_empty:
+            self.display_results()
+        else:
+            # The shown view is indexed by the store and grows with it
+            self.results_view.items_appended()
+        self.update_stats()
     
     def detect_issues(self, line, line_num):
         return detect_rom_issues(line, line_num)
     
-    def generate_message(self, level, line):
-        """Generate contextual messages"""
-        messages = {
-            "CRITICAL": "System critical error detected",
-            "ERROR": "Error condition found",
-            "WARNING": "Potential issue identified", 
-            "INFO": "Informational message",
-            "CODE_SMELL": "Code quality issue",
-            "PERFORMANCE": "Performance concern detected"
-        }
-        return messages.get(level, "Issue detected")
-    
     def display_results(self):
         """Display results with modern formatting"""
-        self.result_text.delete(1.0, tk.END)
-        
         if not self.current_results:
-            self.result_text.insert(tk.END, 
+            self.results_view.set_header("")
+            self.results_view.show_message(
                 "🎉 No issues found in the file!\n\n"
-                "Your file appears to be clean and well-structured.", 
-                "HEADER")
+                "Your file appears to be clean and well-structured.")
             return
         
         # Header
         filename = os.path.basename(self.current_file)
-        self.result_text.insert(tk.END, 
-            f"📊 Analysis Results for: {filename}\n"
-            f"{'='*50}\n\n", 
-            "HEADER")
+        self.results_view.set_header(f"📊 Analysis Results for: {filename}")
         
         # Apply current filter
         self.filter_results()
@@ -917,36 +1008,14 @@ class EnhancedLogSeeker:
             return
             
         filter_level = self.filter_var.get()
-        filtered_results = [
-            r for r in self.current_results 
-            if filter_level == "ALL" or r["level"] == filter_level
-        ]
+        visible_results = self.current_results.filtered(filter_level)
         
-        # Clear results area but keep header
-        content = self.result_text.get(1.0, tk.END)
-        header_end = content.find('\n\n') + 2
-        if header_end > 1:
-            self.result_text.delete(f"1.{header_end}", tk.END)
-        
-        # Display filtered results
-        for i, issue in enumerate(filtered_results, 1):
-            # Issue header with icon and level
-            self.result_text.insert(tk.END, 
-                f"{issue['icon']} [{issue['level']}] ", 
-                issue["level"])
-            
-            self.result_text.insert(tk.END, 
-                f"Line {issue['line_num']}: {issue['message']}\n", 
-                "LINE_NUMBER")
-            
-            # Code line with syntax highlighting
-            self.result_text.insert(tk.END, 
-                f"    {issue['line']}\n\n", 
-                issue["level"])
+        # Only the rows on screen are drawn
+        self.results_view.set_items(visible_results)
         
         # Update filter status
         total = len(self.current_results)
-        filtered = len(filtered_results)
+        filtered = len(visible_results)
         
         if filter_level != "ALL":
             self.status_var.set(f"📋 Showing {filtered} of {total} issues (filtered by {filter_level})")
@@ -960,12 +1029,14 @@ class EnhancedLogSeeker:
                 widget.config(text="0")
             return
         
-        # Count by level
+        # Count by level; Errors covers every level of error severity or worse
+        counts = self.current_results.counts()
         stats = {
             "total": len(self.current_results),
-            "critical": len([r for r in self.current_results if r["level"] == "CRITICAL"]),
-            "errors": len([r for r in self.current_results if r["level"] == "ERROR"]),
-            "warnings": len([r for r in self.current_results if r["level"] == "WARNING"])
+            "critical": counts.get("CRITICAL", 0),
+            "errors": sum(count for level, count in counts.items()
+                          if level_severity(level) in ("error", "critical")),
+            "warnings": counts.get("WARNING", 0)
         }
         
         # Update widgets
@@ -973,102 +1044,80 @@ class EnhancedLogSeeker:
             if key in self.stat_widgets:
                 self.stat_widgets[key].config(text=str(count))
     
-    def start_progress_animation(self):
-        """Start animated progress indicator"""
-        self.progress_dots = 0
-        self.animate_progress()
+    def start_progress(self):
+        """Reset the progress bar for a new analysis"""
+        self.set_progress(0)
     
-    def animate_progress(self):
-        """Animate progress dots"""
-        dots = "." * (self.progress_dots % 4)
-        self.progress_label.config(text=dots)
-        self.progress_dots += 1
-        self.animation_after_id = self.root.after(500, self.animate_progress)
+    def set_progress(self, position):
+        """Show how many bytes of the file have been analyzed"""
+        percentage = min(100.0, position * 100.0 / self.analysis_size)
+        self.progress_bar['value'] = percentage
+        self.progress_label.config(text=f"{percentage:.0f}%")
     
-    def stop_progress_animation(self):
-        """Stop progress animation"""
-        if self.animation_after_id:
-            self.root.after_cancel(self.animation_after_id)
-            self.animation_after_id = None
+    def stop_progress(self):
+        """Clear the progress indicator"""
+        self.progress_bar['value'] = 0
         self.progress_label.config(text="")
     
     def export_results(self):
-        """Export results with modern formatting"""
+        """Stream every issue to a report, JSON Lines, CSV or SARIF file"""
         if not self.current_results:
             messagebox.showwarning("❌ No Results", "Nothing to export yet!")
             return
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = os.path.basename(self.current_file) if self.current_file else "unknown"
+        save_dir = os.path.dirname(self.current_file) if self.current_file else os.path.expanduser('~')
+        save_path = filedialog.asksaveasfilename(
+            title="💾 Export Results",
+            initialdir=save_dir,
+            initialfile=f"log_analysis_{filename}_{timestamp}.txt",
+            defaultextension=".txt",
+            filetypes=[
+                ("Text Report", "*.txt"),
+                ("JSON Lines", "*.jsonl"),
+                ("CSV", "*.csv"),
+                ("SARIF", "*.sarif"),
+                ("All Files", "*.*")
+            ]
+        )
+        if not save_path:
+            return
         
-        export_text = f"""
-🔍 Enhanced Log Seeker Analysis Report
-=====================================
-File: {self.current_file}
-Analysis Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-Total Issues Found: {len(self.current_results)}
-
-"""
-        
-        # Group by level
-        by_level = {}
-        for issue in self.current_results:
-            level = issue["level"]
-            if level not in by_level:
-                by_level[level] = []
-            by_level[level].append(issue)
-        
-        # Export by level
-        for level in ["CRITICAL", "ERROR", "WARNING", "INFO", "CODE_SMELL", "PERFORMANCE"]:
-            if level in by_level:
-                issues = by_level[level]
-                export_text += f"\n{DETECTION_LEVELS[level]['icon']} {level} ({len(issues)} issues)\n"
-                export_text += "-" * 40 + "\n"
-                
-                for issue in issues:
-                    export_text += f"Line {issue['line_num']}: {issue['message']}\n"
-                    export_text += f"    {issue['line']}\n\n"
-        
-        # Copy to clipboard
-        self.root.clipboard_clear()
-        self.root.clipboard_append(export_text)
-        
-        # Save to file
+        from untils.export import export_issues, format_for_path
+        fmt = format_for_path(save_path)
         try:
-            save_dir = os.path.dirname(self.current_file) if self.current_file else os.path.expanduser('~')
-            save_path = os.path.join(save_dir, f"log_analysis_{filename}_{timestamp}.txt")
-            
-            with open(save_path, 'w', encoding='utf-8') as f:
-                f.write(export_text)
-                
-            messagebox.showinfo(
-                "✅ Export Complete", 
-                f"Results exported successfully!\n\n"
-                f"📋 Copied to clipboard\n"
-                f"💾 Saved to: {save_path}"
-            )
-            
-            logging.info(f"Results exported to {save_path}")
-            
+            with open(save_path, 'w', encoding='utf-8', newline='') as f:
+                written = export_issues(f, self.current_results, fmt, self.current_file)
         except Exception as e:
-            messagebox.showinfo(
-                "⚠️ Partial Export", 
-                f"Results copied to clipboard but couldn't save file:\n{str(e)}"
-            )
+            messagebox.showerror("💥 Export Failed", f"Couldn't save file:\n{str(e)}")
+            return
+        
+        # Only small reports go to the clipboard as well
+        copied = fmt == "text" and written <= CLIPBOARD_EXPORT_LIMIT
+        if copied:
+            with open(save_path, encoding='utf-8') as f:
+                self.root.clipboard_clear()
+                self.root.clipboard_append(f.read())
+        
+        messagebox.showinfo(
+            "✅ Export Complete", 
+            f"{written} issues exported as {fmt.upper()}!\n\n"
+            + ("📋 Copied to clipboard\n" if copied else "")
+            + f"💾 Saved to: {save_path}"
+        )
+        logging.info(f"Results exported to {save_path}")
     
     def handle_error(self, error_msg):
         """Enhanced error handling with modern UI"""
-        self.stop_progress_animation()
+        self.stop_progress()
         
         messagebox.showerror("💥 Error", error_msg)
         self.status_var.set(f"❌ {error_msg}")
         
         # Display error in results area
-        self.result_text.delete(1.0, tk.END)
-        self.result_text.insert(tk.END, 
-            "💥 Analysis Error\n"
-            "================\n\n", "HEADER")
-        self.result_text.insert(tk.END, 
+        self.results_view.set_header("💥 Analysis Error")
+        self.results_view.show_message(
             f"Error: {error_msg}\n\n"
             "Please check:\n"
             "• File exists and is readable\n"
@@ -1089,6 +1138,7 @@ Total Issues Found: {len(self.current_results)}
         
         self.context_menu.add_command(label="📋 Copy Line", command=self.copy_selected_line)
         self.context_menu.add_command(label="🔍 Search Similar", command=self.search_similar)
+        self.context_menu.add_command(label="🧬 Recurring Issues", command=self.show_recurring_issues)
         self.context_menu.add_separator()
         self.context_menu.add_command(label="📊 Show Statistics", command=self.show_detailed_stats)
         
@@ -1113,16 +1163,136 @@ Total Issues Found: {len(self.current_results)}
             self.status_var.set("⚠️ No text selected")
     
     def search_similar(self):
-        """Search for similar issues"""
+        """Search the whole log for lines containing the selection"""
         try:
-            selection = self.result_text.selection_get().strip()
-            if selection:
-                # Simple similarity search
-                similar_count = sum(1 for issue in self.current_results 
-                                  if selection.lower() in issue['line'].lower())
-                self.status_var.set(f"🔍 Found {similar_count} similar issues")
+            selection = self.result_text.selection_get()
         except tk.TclError:
             self.status_var.set("⚠️ No text selected for search")
+            return
+        
+        query = next((line.strip() for line in selection.splitlines() if line.strip()), "")
+        if not query:
+            self.status_var.set("⚠️ No text selected for search")
+            return
+        if not self.current_file or not os.path.exists(self.current_file):
+            self.status_var.set("⚠️ Analyze a file before searching it")
+            return
+        if detect_compression(self.current_file):
+            self.status_var.set("⚠️ Search needs an uncompressed log")
+            return
+        
+        from untils.index import IndexStore, load_index
+        if self.index_store is None:
+            self.index_store = IndexStore()
+        filepath = self.current_file
+        workers = self.get_worker_count()
+        
+        def search():
+            # The line index is built on first use and kept on disk
+            with load_index(filepath, self.index_store, workers) as index:
+                return list(index.search(query, limit=SEARCH_RESULT_LIMIT))
+        
+        def show(matches):
+            if len(matches) >= SEARCH_RESULT_LIMIT:
+                self.status_var.set(f"🔍 Showing the first {len(matches)} lines matching \"{query}\"")
+            else:
+                self.status_var.set(f"🔍 Found {len(matches)} lines matching \"{query}\"")
+            if matches:
+                self.show_lines_popup(f"🔍 Lines matching \"{query}\"",
+                                      [f"Line {line_num}: {line}" for line_num, line in matches])
+        
+        if self.run_task("Search", search, show):
+            self.status_var.set(f"🔍 Searching {os.path.basename(filepath)} for \"{query}\"...")
+    
+    def show_recurring_issues(self):
+        """Group issues by normalised signature and list the most frequent"""
+        if not self.current_results:
+            messagebox.showinfo("🧬 Recurring Issues", "No analysis results available")
+            return
+        
+        # The worker reads lines through its own copy of the store
+        snapshot = ResultStore(self.current_results.path)
+        snapshot.extend(self.current_results)
+        
+        from untils.aggregate import IssueAggregator
+        
+        def aggregate():
+            aggregator = IssueAggregator()
+            try:
+                aggregator.add_all(snapshot)
+            finally:
+                snapshot.close()
+            return aggregator
+        
+        def show(aggregator):
+            top = aggregator.top(RECURRING_LIMIT)
+            self.status_var.set(
+                f"🧬 {aggregator.total} issues collapse into {len(aggregator)} distinct signatures")
+            self.show_lines_popup(
+                f"🧬 Top {len(top)} recurring issues",
+                [f"{entry['count']:>7}x  [{entry['level']}] {entry['signature']}   "
+                 f"(lines {entry['first']['line_num']}–{entry['last']['line_num']})"
+                 for entry in top])
+        
+        if self.run_task("Aggregation", aggregate, show):
+            self.status_var.set("🧬 Grouping recurring issues...")
+    
+    def run_task(self, name, compute, on_done):
+        """Run ``compute()`` on a worker thread and hand its result to ``on_done``"""
+        if name in self.tasks:
+            return False
+        worker = AnalysisWorker(lambda progress, cancel: progress(compute(), None))
+        worker.result = None
+        self.tasks[name] = worker
+        worker.start()
+        self.root.after(ANALYSIS_POLL_MS, self.poll_task, name, on_done)
+        return True
+    
+    def poll_task(self, name, on_done):
+        """Deliver a background task's result once its worker is done"""
+        worker = self.tasks[name]
+        try:
+            while True:
+                kind, payload, _ = worker.messages.get_nowait()
+                if kind == "batch":
+                    worker.result = payload
+                elif kind == "error":
+                    del self.tasks[name]
+                    self.status_var.set(f"❌ {name} failed: {payload}")
+                    return
+                else:
+                    break
+        except queue.Empty:
+            self.root.after(ANALYSIS_POLL_MS, self.poll_task, name, on_done)
+            return
+        
+        del self.tasks[name]
+        on_done(worker.result)
+    
+    def show_lines_popup(self, title, rows):
+        """List lines of text in a popup window"""
+        window = tk.Toplevel(self.root)
+        window.title(title)
+        window.geometry("900x500")
+        window.configure(bg=ModernTheme.COLORS['bg_primary'])
+        
+        scrollbar = ttk.Scrollbar(window, orient="vertical")
+        scrollbar.pack(side="right", fill="y")
+        listbox = tk.Listbox(
+            window,
+            font=ModernTheme.FONTS['mono'],
+            bg=ModernTheme.COLORS['bg_primary'],
+            fg=ModernTheme.COLORS['text_primary'],
+            selectbackground=ModernTheme.COLORS['accent'],
+            relief="flat",
+            bd=0,
+            yscrollcommand=scrollbar.set
+        )
+        listbox.pack(side="left", fill="both", expand=True)
+        scrollbar.config(command=listbox.yview)
+        
+        for row in rows:
+            listbox.insert(tk.END, row)
     
     def show_detailed_stats(self):
         """Show detailed statistics in popup"""
@@ -1130,14 +1300,11 @@ Total Issues Found: {len(self.current_results)}
             messagebox.showinfo("📊 Statistics", "No analysis results available")
             return
         
-        # Calculate detailed stats
-        stats_by_level = {}
-        total_lines_analyzed = max(issue['line_num'] for issue in self.current_results) if self.current_results else 0
-        
-        for level in DETECTION_LEVELS.keys():
-            count = len([r for r in self.current_results if r['level'] == level])
-            if count > 0:
-                stats_by_level[level] = count
+        # Running counters kept by the result store
+        counts = self.current_results.counts()
+        levels = get_detector().levels
+        stats_by_level = {level: counts[level] for level in levels if level in counts}
+        total_lines_analyzed = self.current_results.max_line_num
         
         # Create stats message
         stats_msg = f"📊 Detailed Analysis Statistics\n"
@@ -1148,7 +1315,7 @@ Total Issues Found: {len(self.current_results)}
         
         stats_msg += "Issue Breakdown:\n"
         for level, count in stats_by_level.items():
-            icon = DETECTION_LEVELS[level]['icon']
+            icon = levels[level]['icon']
             percentage = (count / len(self.current_results)) * 100
             stats_msg += f"{icon} {level}: {count} ({percentage:.1f}%)\n"
         
@@ -1156,6 +1323,22 @@ Total Issues Found: {len(self.current_results)}
             issue_density = (len(self.current_results) / total_lines_analyzed) * 100
             stats_msg += f"\n📈 Issue Density: {issue_density:.2f}% of lines"
         
+        tips = [(level, rom_build_tips(level)) for level in stats_by_level if rom_build_tips(level)]
+        if tips:
+            stats_msg += "\n\n💡 Fix-it Tips:\n"
+            for level, level_tips in tips:
+                stats_msg += f"{levels[level]['icon']} {level}:\n"
+                stats_msg += "".join(f"  • {tip}\n" for tip in level_tips)
+        
+        if self.rule_profile is not None and self.rule_profile.rules:
+            total = self.rule_profile.total_ns / 1e9
+            stats_msg += (f"\n\n⏱️ Slowest Rules ({total:.2f}s in rules, "
+                          f"{self.rule_profile.lines} lines classified):\n")
+            for row in self.rule_profile.rows(PROFILE_STATS_LIMIT):
+                rule = row["rule"] if len(row["rule"]) <= 40 else row["rule"][:39] + "…"
+                stats_msg += (f"{row['seconds'] * 1000:.1f} ms  {row['category']}: {rule} "
+                              f"({row['evaluations']} evals, {row['hits']} hits)\n")
+        
         messagebox.showinfo("📊 Detailed Statistics", stats_msg)
     
     def setup_keyboard_shortcuts(self):
@@ -0,0 +1,39 @@
+"""The original per-line detection loop, kept as the reference the compiled
+detector is checked against."""
+import re
+
+from rom_detection_levels import DEFAULT_ROM_MESSAGE
+
+
+def baseline_detect(line, line_num, detector):
+    """``detect_rom_issues`` as it was before RomDetector, over ``detector``'s rules"""
+    issues = []
+    line_lower = line.lower()
+
+    for level, patterns in detector.context_patterns.items():
+        if any(re.search(pattern, line, re.IGNORECASE) for pattern in patterns):
+            issues.append({
+                "line_num": line_num,
+                "line": line.strip(),
+                "level": level,
+                "icon": detector.levels[level]["icon"],
+                "message": detector.messages.get(level, DEFAULT_ROM_MESSAGE),
+                "context": "ROM Build Specific"
+            })
+
+    if not issues:
+        for level, config in detector.levels.items():
+            keyword_match = any(kw in line_lower for kw in config["keywords"])
+            pattern_match = any(re.search(ptn, line, re.IGNORECASE) for ptn in config["patterns"])
+            if keyword_match or pattern_match:
+                issues.append({
+                    "line_num": line_num,
+                    "line": line.strip(),
+                    "level": level,
+                    "icon": config["icon"],
+                    "message": detector.messages.get(level, DEFAULT_ROM_MESSAGE),
+                    "context": "Standard Detection"
+                })
+                break
+
+    return issues
@@ -0,0 +1,39 @@
+from rom_detection_levels import PREFILTER_CATEGORY, disable_profiling, enable_profiling
+from untils.analysis import analyze_file, analyze_lines
+from untils.synthlog import write_log
+
+
+def summary(issues):
+    return [(issue["line_num"], issue["level"], issue["context"], issue["line"]) for issue in issues]
+
+
+def test_sharded_analysis_matches_serial(tmp_path):
+    path = tmp_path / "build.log"
+    with open(path, 'wb') as f:
+        write_log(f, 2 * 1024 * 1024, density=0.05, seed=3)
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        line_count, serial = analyze_lines(f)
+    expected = summary(serial)
+    assert expected
+
+    assert summary(analyze_file(str(path))) == expected
+    assert summary(analyze_file(str(path), use_mmap=False)) == expected
+    sharded = analyze_file(str(path), workers=2, min_shard_size=64 * 1024)
+    assert summary(sharded) == expected
+    assert sharded.line_count == line_count
+
+
+def test_profiled_scan_sees_every_line(tmp_path):
+    path = tmp_path / "build.log"
+    with open(path, 'wb') as f:
+        _, line_count = write_log(f, 256 * 1024, density=0.05, seed=5)
+        f.write(b"\n\n")
+    profile = enable_profiling()
+    try:
+        profiled = analyze_file(str(path))
+    finally:
+        disable_profiling()
+    assert profile.lines == line_count + 2
+    assert summary(profiled) == summary(analyze_file(str(path)))
+    evaluations, hits, _ = profile.rules[(PREFILTER_CATEGORY, "literal gate")]
+    assert hits < evaluations
@@ -0,0 +1,68 @@
+import os
+import shutil
+
+from untils import cache as cache_module
+from untils.analysis import analyze_file, results_fingerprint
+from untils.cache import CheckpointStore, ResultCache
+from untils.context import ContextWindow
+
+
+def summary(issues):
+    return [(issue["line_num"], issue["level"], issue["line"]) for issue in issues]
+
+
+def test_checkpoint_resume_stores_only_new_issues(tmp_path, monkeypatch):
+    path = tmp_path / "build.log"
+    path.write_bytes(b"ok line\nmake: *** [Makefile:12: all] Error 2\n")
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints"))
+    analyze_file(str(path), checkpoints=checkpoints)
+
+    with open(path, 'ab') as f:
+        f.write(b"next line\nerror: use of undeclared identifier 'x'\n")
+    resumed = analyze_file(str(path), checkpoints=checkpoints)
+    assert summary(resumed) == summary(analyze_file(str(path)))
+
+    checkpoint = checkpoints.get(checkpoints.key_for(str(path), results_fingerprint()))
+    segments = checkpoints.segments(checkpoint)
+    assert [summary(segment) for segment in segments] == [summary(resumed)[:1], summary(resumed)[1:]]
+
+    # Past the segment limit everything is merged into one
+    monkeypatch.setattr(cache_module, "MAX_CHECKPOINT_SEGMENTS", 2)
+    with open(path, 'ab') as f:
+        f.write(b"fatal: unable to access git repository\n")
+    resumed = analyze_file(str(path), checkpoints=checkpoints)
+    assert summary(resumed) == summary(analyze_file(str(path)))
+    checkpoint = checkpoints.get(checkpoints.key_for(str(path), results_fingerprint()))
+    assert [summary(segment) for segment in checkpoints.segments(checkpoint)] == [summary(resumed)]
+
+
+def test_cache_hit_reads_lines_from_the_analysed_copy(tmp_path):
+    original = tmp_path / "a.log"
+    original.write_bytes(b"ok line\nmake: *** [Makefile:12: all] Error 2\nerror: expected ';'\n")
+    cache = ResultCache(str(tmp_path / "cache"))
+    expected = summary(analyze_file(str(original), cache=cache))
+
+    copy = tmp_path / "b.log"
+    shutil.copy2(original, copy)
+    original.unlink()
+    results = analyze_file(str(copy), cache=cache)
+    assert results.path == os.path.abspath(copy)
+    assert summary(results) == expected
+    assert all(issue["line"] for issue in results)
+
+
+def test_checkpoint_resume_completes_context_after(tmp_path):
+    path = tmp_path / "build.log"
+    path.write_bytes(b"ok line\nmake: *** [Makefile:12: all] Error 2\n")
+    checkpoints = CheckpointStore(str(tmp_path / "checkpoints"))
+    window = ContextWindow(2, 2)
+    analyze_file(str(path), checkpoints=checkpoints, window=window)
+
+    with open(path, 'ab') as f:
+        f.write(b"next line one\nnext line two\n")
+    resumed = analyze_file(str(path), checkpoints=checkpoints, window=window)
+    fresh = analyze_file(str(path), window=window)
+    assert [issue["context_after"] for issue in resumed] == [["next line one", "next line two"]]
+    assert [(issue["context_before"], issue["context_after"]) for issue in resumed] == \
+        [(issue["context_before"], issue["context_after"]) for issue in fresh]
+    assert summary(resumed) == summary(fresh)
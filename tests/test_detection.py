@@ -0,0 +1,62 @@
+import itertools
+import random
+
+from rom_detection_levels import MAX_REGEX_LINE, PREFILTER_WARMUP_LINES, RomDetector
+from untils.synthlog import generate_lines
+
+from baseline_detection import baseline_detect
+
+# Pieces of rule literals, separators the ASCII and Unicode regexes treat
+# differently, and non-ASCII letters that case-fold onto ASCII ones
+FRAGMENTS = (
+    "error", "Error:", "failed", "FAILED", "make", "ninja", "kernel", "vendor", "missing",
+    "not found", "warning", "notice", "undefined", "abort()", "killed by signal", "avc:",
+    "denied", "soong", "out/soong", "build", "proprietary", "extract", "sh", "[", "]",
+    ":", " : ", "12", "0x1f", "\t", " ", "  ", "\x1c", "\x1d", "\x1e", "\x1f", "\x0b",
+    "É", "ſ", "K", "İ", "ß", "ǅ", "文件", "x", "_", "-", "/", ".", "*",
+)
+
+
+def fuzzed_lines(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 16)))
+
+
+def assert_same_as_baseline(lines):
+    # Enough lines to get past the prefilter warm-up
+    detector = RomDetector()
+    for line_num, line in enumerate(lines, 1):
+        assert detector.detect(line, line_num) == baseline_detect(line, line_num, detector), repr(line)
+
+
+def test_synthetic_log_matches_baseline():
+    lines = list(itertools.islice(generate_lines(density=0.1, seed=7), 20000))
+    assert len(lines) > PREFILTER_WARMUP_LINES
+    assert_same_as_baseline(lines)
+
+
+def test_fuzzed_lines_match_baseline():
+    assert_same_as_baseline(list(fuzzed_lines(8000)))
+
+
+def test_unicode_only_separator_keeps_unicode_semantics():
+    detector = RomDetector()
+    line = "xx error foo:\x1f12"
+    assert [issue["level"] for issue in detector.detect(line, 1)] == ["COMPILER_ERROR"]
+    assert detector.detect(line, 1) == baseline_detect(line, 1, detector)
+
+
+def test_long_lines_match_baseline():
+    padding = "x" * (MAX_REGEX_LINE + 800)
+    lines = [
+        "error " + padding + " : 12",
+        "x" * (MAX_REGEX_LINE - 7) + " notices",
+        padding + " make: *** [all] Error 2",
+        "É " + padding + " error foo: 12",
+        "É" + "x" * (MAX_REGEX_LINE - 8) + " notices",
+    ]
+    lines += [line + " " + padding + " " + line for line in fuzzed_lines(40, seed=1)]
+    detector = RomDetector()
+    assert [issue["level"] for issue in detector.detect(lines[0], 1)] == ["COMPILER_ERROR"]
+    assert_same_as_baseline(lines)
@@ -0,0 +1,31 @@
+import io
+import json
+
+from untils.export import make_writer
+
+ISSUE = {"line_num": 3, "line": "make: *** [all] Error 2", "level": "BUILD_FAILED", "icon": "💥",
+         "message": "Build compilation failed", "context": "Standard Detection"}
+
+
+def sarif_results(path):
+    out = io.StringIO()
+    writer = make_writer("sarif", out)
+    writer.begin()
+    writer.write([ISSUE], path)
+    writer.end()
+    return json.loads(out.getvalue())["runs"][0]["results"]
+
+
+def test_sarif_uri_is_percent_encoded(tmp_path):
+    path = tmp_path / "my logs#1" / "build.log"
+    (result,) = sarif_results(str(path))
+    location = result["locations"][0]["physicalLocation"]
+    assert location["artifactLocation"]["uri"] == path.resolve().as_uri()
+    assert "%20" in location["artifactLocation"]["uri"] and "%23" in location["artifactLocation"]["uri"]
+    assert location["region"]["startLine"] == 3
+
+
+def test_sarif_stdin_has_no_artifact():
+    (result,) = sarif_results("-")
+    assert "locations" not in result
+    assert result["properties"]["lineNumber"] == 3
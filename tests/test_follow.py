@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+from untils import follow
+from untils.analysis import AnalysisCancelled, analyze_file
+from untils.context import ContextWindow
+from untils.follow import LogFollower
+from untils.synthlog import write_log
+
+
+def test_overlong_line_counts_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(follow, "READ_BLOCK_SIZE", 1024)
+    path = tmp_path / "build.log"
+    with open(path, 'wb') as f:
+        f.write(b"ok line\n" + b"x" * 3000 + b" fatal error\n" + b"make: *** [all] Error 2\n")
+
+    follower = LogFollower(str(path))
+    try:
+        issues = follower.poll()
+    finally:
+        follower.close()
+    assert [(issue["line_num"], issue["level"]) for issue in issues] == [(3, "BUILD_FAILED")]
+    assert follower.line_count == 3
+
+
+def test_context_reaches_across_polls(tmp_path, monkeypatch):
+    monkeypatch.setattr(follow, "READ_BLOCK_SIZE", 256)
+    path = tmp_path / "build.log"
+    head = b"".join(b"filler line %d\n" % i for i in range(40))
+    tail = b"".join(b"more filler %d\n" % i for i in range(40))
+    path.write_bytes(head + b"ok line\nmake: *** [Makefile:12: all] Error 2\n")
+    window = ContextWindow(2, 2)
+
+    follower = LogFollower(str(path), window=window)
+    try:
+        assert follower.poll() == []
+        with open(path, 'ab') as f:
+            f.write(b"next line one\nnext line two\n" + tail)
+        issues = follower.poll()
+    finally:
+        follower.close()
+    expected = analyze_file(str(path), window=window)
+    assert [(issue["line_num"], issue["context_before"], issue["context_after"]) for issue in issues] == \
+        [(issue["line_num"], issue["context_before"], issue["context_after"]) for issue in expected]
+    assert issues[0]["context_after"] == ["next line one", "next line two"]
+
+
+def test_context_matches_single_pass_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr(follow, "READ_BLOCK_SIZE", 4096)
+    path = tmp_path / "build.log"
+    with open(path, 'wb') as f:
+        write_log(f, 256 * 1024, density=0.05, seed=11)
+    window = ContextWindow(2, 2)
+
+    follower = LogFollower(str(path), window=window)
+    try:
+        issues = follower.poll() + follower.flush()
+    finally:
+        follower.close()
+    expected = analyze_file(str(path), window=window)
+    assert len(issues) == len(expected)
+    assert [(issue["line_num"], issue["context_before"], issue["context_after"]) for issue in issues] == \
+        [(issue["line_num"], issue["context_before"], issue["context_after"]) for issue in expected]
+
+
+
+def test_poll_reports_blocks_and_stops_when_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(follow, "READ_BLOCK_SIZE", 1024)
+    path = tmp_path / "build.log"
+    with open(path, 'wb') as f:
+        write_log(f, 16 * 1024, density=0.05, seed=13)
+    size = path.stat().st_size
+    cancel = threading.Event()
+    reported = []
+    positions = []
+
+    def progress(issues, position):
+        reported.extend(issues)
+        positions.append(position)
+        cancel.set()
+
+    follower = LogFollower(str(path))
+    try:
+        with pytest.raises(AnalysisCancelled):
+            follower.poll(progress, cancel)
+        assert positions == [follower.offset] and follower.offset < size
+
+        cancel.clear()
+        follower.poll(lambda issues, position: (reported.extend(issues), positions.append(position)))
+    finally:
+        follower.close()
+    assert len(positions) > 2 and positions[-1] == size
+    assert [(issue["line_num"], issue["level"]) for issue in reported] == \
+        [(issue["line_num"], issue["level"]) for issue in analyze_file(str(path))]
@@ -0,0 +1,28 @@
+from untils.index import MAX_TOKEN, IndexStore, LineIndex, load_index
+
+
+def test_lines_with_overlong_tokens_are_found(tmp_path):
+    path = tmp_path / "build.log"
+    long_line = "prefix_" + "a" * (MAX_TOKEN + 6) + "_suffix marker"
+    path.write_text(f"first line\n{long_line}\nsuffix only here\nmarker\n")
+    index = LineIndex.build(str(path))
+    try:
+        assert list(index.search("suffix")) == [(2, long_line), (3, "suffix only here")]
+        assert list(index.search("suffix marker")) == [(2, long_line)]
+        assert list(index.search("marker")) == [(2, long_line), (4, "marker")]
+        assert list(index.search("only here")) == [(3, "suffix only here")]
+    finally:
+        index.close()
+
+
+def test_stored_index_is_unmapped_on_close(tmp_path):
+    path = tmp_path / "build.log"
+    path.write_text("first line\nerror: missing marker\nmarker again\n")
+    store = IndexStore(str(tmp_path / "index"))
+    with load_index(str(path), store):
+        pass
+    with load_index(str(path), store) as index:
+        mapped = index._map
+        assert mapped is not None
+        assert list(index.search("marker")) == [(2, "error: missing marker"), (3, "marker again")]
+    assert mapped.closed
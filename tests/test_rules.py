@@ -0,0 +1,27 @@
+import json
+
+import pytest
+
+from rom_detection_levels import builtin_ruleset
+from untils.rules import RuleFileError, build_ruleset
+
+
+def write_pack(path, levels):
+    path.write_text(json.dumps({"levels": levels}), encoding='utf-8')
+    return str(path)
+
+
+def test_before_naming_its_own_level_is_rejected(tmp_path):
+    path = write_pack(tmp_path / "self.json", {"SELF": {"keywords": ["boom"], "before": "SELF"}})
+    with pytest.raises(RuleFileError, match="another level"):
+        build_ruleset(builtin_ruleset(), [path])
+
+
+def test_pack_tips_and_placement(tmp_path):
+    base = builtin_ruleset()
+    first = next(iter(base["levels"]))
+    path = write_pack(tmp_path / "pack.json", {
+        "NEW_LEVEL": {"keywords": ["boom"], "before": first, "tips": ["Try again"]}})
+    ruleset, _ = build_ruleset(base, [path])
+    assert list(ruleset["levels"])[:2] == ["NEW_LEVEL", first]
+    assert ruleset["tips"]["NEW_LEVEL"] == ["Try again"]
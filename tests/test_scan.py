@@ -0,0 +1,26 @@
+import main
+
+
+def test_scan_accepts_globs_and_directories(tmp_path, capsys):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    (logs / "a.log").write_bytes(b"ok line\nmake: *** [Makefile:12: all] Error 2\n")
+    (logs / "b.log").write_bytes(b"ok line\nwarning: unused variable 'x'\n")
+    nested = tmp_path / "nested"
+    nested.mkdir()
+    (nested / "c.log").write_bytes(b"error: use of undeclared identifier 'x'\n")
+
+    status = main.scan([str(logs / "*.log"), str(nested), "--no-cache", "--workers", "1",
+                        "--fail-on", "critical"])
+    out = capsys.readouterr().out
+    assert status == main.SEVERITY_EXIT_CODES["critical"]
+    assert "a.log:2:" in out and "c.log:1:" in out
+
+
+def test_scan_reports_missing_files_and_empty_globs(tmp_path, capsys):
+    (tmp_path / "a.log").write_bytes(b"ok line\n")
+    status = main.scan([str(tmp_path / "a.log"), str(tmp_path / "gone.log"),
+                        str(tmp_path / "*.txt"), "--no-cache"])
+    err = capsys.readouterr().err
+    assert status == main.EXIT_USAGE
+    assert "gone.log" in err and "*.txt" in err and "a.log" not in err
@@ -0,0 +1,4 @@
+import os
+
+# Per-user data: caches, checkpoints, line indexes, logs and rule packs
+APP_DIR = os.path.join(os.path.expanduser('~'), '.enhanced_log_seeker')
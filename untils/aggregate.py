@@ -0,0 +1,75 @@
+import heapq
+import re
+from functools import lru_cache
+
+# Variable parts of a log line, masked in this order to build its signature
+_MASKS = (
+    ("TIME", r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+             r"|\b\d{1,2}:\d{2}:\d{2}(?:[.,]\d+)?\b"
+             r"|\[\s*\d+\.\d+\]"),
+    ("HASH", r"\b0x[0-9a-fA-F]+\b|\b(?=[a-fA-F]*\d)[0-9a-fA-F]{8,}\b"),
+    # Absolute paths and relative ones with at least two components
+    ("PATH", r"(?<![\w.+-])/[\w.+-]+(?:/[\w.+-]*)*|(?:[\w.+-]+/){2,}[\w.+-]*"),
+    ("NUM", r"\d+"),
+)
+_MASK_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _MASKS))
+_SPACE_RE = re.compile(r"\s+")
+
+# Distinct lines whose signature is remembered; build logs repeat a lot
+SIGNATURE_CACHE_SIZE = 65536
+DEFAULT_TOP = 20
+
+
+@lru_cache(maxsize=SIGNATURE_CACHE_SIZE)
+def signature(line):
+    """Normalise a log line so recurring messages compare equal.
+
+    Timestamps, hashes, paths and numbers become ``<TIME>``, ``<HASH>``,
+    ``<PATH>`` and ``<NUM>``, and runs of whitespace a single space.
+    """
+    masked = _MASK_RE.sub(lambda m: f"<{m.lastgroup}>", line)
+    return _SPACE_RE.sub(" ", masked).strip()
+
+
+class IssueAggregator:
+    """Counts issues per ``(level, signature)`` across lines and files.
+
+    Each entry remembers the first and last occurrence.  Issues of one file
+    should be added together (see :meth:`add_all`) so ``files`` counts
+    distinct files correctly.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.total = 0
+
+    def add(self, issue, path=None):
+        key = (issue["level"], signature(issue["line"]))
+        occurrence = {"path": path, "line_num": issue["line_num"], "line": issue["line"]}
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = {
+                "level": key[0],
+                "signature": key[1],
+                "count": 1,
+                "files": 1,
+                "first": occurrence,
+                "last": occurrence,
+            }
+        else:
+            entry["count"] += 1
+            if entry["last"]["path"] != path:
+                entry["files"] += 1
+            entry["last"] = occurrence
+        self.total += 1
+
+    def add_all(self, issues, path=None):
+        for issue in issues:
+            self.add(issue, path)
+
+    def top(self, n=DEFAULT_TOP):
+        """The ``n`` most frequent signatures, most frequent first"""
+        return heapq.nlargest(n, self.entries.values(), key=lambda entry: entry["count"])
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,627 @@
+import collections
+import io
+import mmap
+import os
+import re
+import weakref
+
+from rom_detection_levels import (ProfilingDetector, detect_rom_issues, get_detector, load_rule_packs,
+                                  rule_pack_args)
+from untils.compression import decompress, detect_compression, find_frames, open_decompressed
+from untils.context import ContextCapture
+from untils.results import ResultStore
+
+# Files smaller than this are never split; the pool start-up would cost more
+MIN_SHARD_SIZE = 8 * 1024 * 1024
+# Extra shards per worker so a slow shard does not leave the others idle
+SHARDS_PER_WORKER = 4
+# Granularity of progress reports when analysing in a single process
+PROGRESS_BLOCK_SIZE = 16 * 1024 * 1024
+# Bytes handed to the byte-level scanner at a time
+SCAN_CHUNK_SIZE = 4 * 1024 * 1024
+# Decompressed bytes analysed at a time when streaming a compressed log
+DECOMPRESS_BLOCK_SIZE = 8 * 1024 * 1024
+# Smallest run of compressed frames handed to one worker
+MIN_FRAME_GROUP_SIZE = 1024 * 1024
+# Ranges up to this size are classified line by line; compiling the byte
+# gate would take longer than scanning them
+SMALL_SCAN_SIZE = 64 * 1024
+
+# Text-mode reading also breaks lines on a bare CR; such files use the str path
+_LONE_CR = re.compile(rb"\r(?!\n)")
+
+_byte_gates = weakref.WeakKeyDictionary()
+
+
+class AnalysisCancelled(Exception):
+    """Raised when an analysis is stopped through its cancel event"""
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def process_pool(workers):
+    """A ProcessPoolExecutor; imported here since single-process runs never need one"""
+    from concurrent.futures import ProcessPoolExecutor
+    # Workers started with spawn do not inherit loaded rule packs
+    rule_packs = rule_pack_args()
+    if rule_packs is None:
+        return ProcessPoolExecutor(max_workers=workers)
+    return ProcessPoolExecutor(max_workers=workers, initializer=load_rule_packs, initargs=rule_packs)
+
+
+def find_shards(path, count, min_size=MIN_SHARD_SIZE, start=0, end=None):
+    """Split ``[start, end)`` of a file into at most ``count`` newline-aligned ranges"""
+    if end is None:
+        end = os.path.getsize(path)
+    count = max(1, min(count, (end - start) // max(min_size, 1)))
+    if count <= 1:
+        return [(start, end)]
+
+    step = (end - start) // count
+    bounds = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, count):
+            f.seek(max(start + i * step, bounds[-1]))
+            f.readline()
+            pos = f.tell()
+            if pos >= end:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(end)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def last_line_end(path, size=None):
+    """Offset just past the last newline of a file (0 if there is none)"""
+    if size is None:
+        size = os.path.getsize(path)
+    block = 64 * 1024
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > 0:
+            read_from = max(0, pos - block)
+            f.seek(read_from)
+            newline = f.read(pos - read_from).rfind(b'\n')
+            if newline >= 0:
+                return read_from + newline + 1
+            pos = read_from
+    return 0
+
+
+def line_start_back(path, end, lines):
+    """Offset of the line starting ``lines`` lines before line start ``end``"""
+    block = 64 * 1024
+    with open(path, 'rb') as f:
+        pos = end - 1
+        while lines and pos > 0:
+            read_from = max(0, pos - block)
+            f.seek(read_from)
+            data = f.read(pos - read_from)
+            while lines:
+                newline = data.rfind(b'\n')
+                if newline < 0:
+                    break
+                data = data[:newline]
+                lines -= 1
+                if not lines:
+                    return read_from + newline + 1
+            pos = read_from
+    return 0 if lines else end
+
+
+def analyze_lines(lines, first_line_num=1, window=None):
+    """Run the detector over an iterable of text lines.
+
+    Returns ``(line_count, issues)``; blank lines are counted but not checked
+    (except by a profiling detector, so its profile covers every line).
+    With a :class:`untils.context.ContextWindow` the issues carry the lines
+    around them.
+    """
+    issues = []
+    capture = ContextCapture(window) if window is not None else None
+    check_blank = isinstance(get_detector(), ProfilingDetector)
+    line_num = first_line_num - 1
+    for line_num, line in enumerate(lines, first_line_num):
+        stripped_line = line.strip()
+        detected = detect_rom_issues(stripped_line, line_num) if stripped_line or check_blank else None
+        if capture is not None:
+            issues.extend(capture.push(line.rstrip('\r\n'), detected))
+        elif detected:
+            issues.extend(detected)
+    if capture is not None:
+        issues.extend(capture.flush())
+    return line_num - first_line_num + 1, issues
+
+
+def iter_issues(lines, first_line_num=1, window=None):
+    """Lazily detect issues in an iterable of text lines, e.g. a pipe.
+
+    With a ``window`` each issue is yielded once the lines after it have
+    been read.
+    """
+    capture = ContextCapture(window) if window is not None else None
+    check_blank = isinstance(get_detector(), ProfilingDetector)
+    for line_num, line in enumerate(lines, first_line_num):
+        stripped_line = line.strip()
+        detected = detect_rom_issues(stripped_line, line_num) if stripped_line or check_blank else None
+        if capture is not None:
+            yield from capture.push(line.rstrip('\r\n'), detected)
+        elif detected:
+            yield from detected
+    if capture is not None:
+        yield from capture.flush()
+
+
+def _byte_gate_for(detector, non_ascii=False):
+    """Compiled byte gate of a detector; the non-ASCII one only when needed"""
+    gates = _byte_gates.get(detector)
+    if gates is None:
+        gates = _byte_gates[detector] = {}
+    gate = gates.get(non_ascii)
+    if gate is None:
+        if detector.prefilter is None:
+            # Rules without literals: every non-empty line has to be looked at
+            gate = re.compile(rb"[^\n]")
+        else:
+            gate = detector.prefilter.bytes_regex(non_ascii=non_ascii)
+        gates[non_ascii] = gate
+    return gate
+
+
+def scan_buffer(buf, start, end, detector=None, chunk_size=SCAN_CHUNK_SIZE, window=None):
+    """Detect issues in ``buf[start:end]`` without decoding every line.
+
+    The range is read in newline-aligned chunks; the literal prefilter runs
+    over each lowercased chunk and only lines it hits are decoded and
+    classified.  ``buf`` may be bytes or an mmap; ``start`` must be a line
+    start.  Returns ``(line_count, issues)`` with line numbers local to the
+    range, like :func:`analyze_lines`; each issue also carries the
+    ``offset`` of its line in ``buf``.  A ``window`` takes the context
+    lines from ``buf`` around each hit, also across ``start`` and ``end``.
+    """
+    detector = detector or get_detector()
+    # A profiling detector has to see the lines the byte gate would skip,
+    # or its profile leaves them (and the prefilter's work) out
+    if end - start <= SMALL_SCAN_SIZE or isinstance(detector, ProfilingDetector):
+        return _scan_lines(buf, start, end, detector, window)
+    issues = []
+    examined = 0
+    line_count = 0
+
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = buf.find(b'\n', min(chunk_start + chunk_size, end) - 1, end) + 1 or end
+        chunk = buf[chunk_start:chunk_end]
+        search = _byte_gate_for(detector, not chunk.isascii()).search
+        lowered = chunk.lower()
+
+        line_num = line_count + 1
+        pos = 0
+        size = len(chunk)
+        while pos < size:
+            match = search(lowered, pos)
+            if match is None:
+                break
+            hit = match.start()
+            line_start = chunk.rfind(b'\n', pos, hit) + 1 or pos
+            line_num += chunk.count(b'\n', pos, line_start)
+            line_end = chunk.find(b'\n', hit)
+            if line_end < 0:
+                line_end = size
+
+            stripped_line = chunk[line_start:line_end].decode('utf-8', errors='ignore').strip()
+            if stripped_line:
+                examined += 1
+                detected = detector.detect(stripped_line, line_num)
+                if detected:
+                    for issue in detected:
+                        issue["offset"] = chunk_start + line_start
+                    if window is not None:
+                        window.attach(detected, *window.from_buffer(
+                            buf, chunk_start + line_start, chunk_start + line_end, stripped_line))
+                    issues.extend(detected)
+            pos = line_end + 1
+            line_num += 1
+
+        line_count += chunk.count(b'\n')
+        if not chunk.endswith(b'\n'):
+            line_count += 1
+        chunk_start = chunk_end
+
+    # Lines the byte gate never handed over count as prefiltered
+    if detector.prefilter is not None:
+        detector.prefilter.lines_checked += line_count - examined
+        detector.prefilter.lines_skipped += line_count - examined
+    return line_count, issues
+
+
+def _scan_lines(buf, start, end, detector, window=None):
+    """scan_buffer for small ranges: every line goes straight to the detector"""
+    issues = []
+    check_blank = isinstance(detector, ProfilingDetector)
+    line_count = 0
+    line_start = start
+    while line_start < end:
+        line_end = buf.find(b'\n', line_start, end)
+        if line_end < 0:
+            line_end = end
+        line_count += 1
+        stripped_line = buf[line_start:line_end].decode('utf-8', errors='ignore').strip()
+        if stripped_line or check_blank:
+            detected = detector.detect(stripped_line, line_count)
+            for issue in detected:
+                issue["offset"] = line_start
+            if detected and window is not None:
+                window.attach(detected, *window.from_buffer(buf, line_start, line_end, stripped_line))
+            issues.extend(detected)
+        line_start = line_end + 1
+    return line_count, issues
+
+
+def _can_scan_bytes(buf, start, end):
+    return _LONE_CR.search(buf, start, end) is None
+
+
+def analyze_bytes(data, use_mmap=True, window=None):
+    """Analyze raw log bytes that start on a line boundary.
+
+    Returns ``(line_count, issues)`` with line numbers starting at 1.
+    """
+    if use_mmap and _can_scan_bytes(data, 0, len(data)):
+        return scan_buffer(data, 0, len(data), window=window)
+    # Same decoding and newline handling as iterating the file in text mode
+    text = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8', errors='ignore')
+    return analyze_lines(text, window=window)
+
+
+def analyze_shard(path, start, end, use_mmap=True, window=None):
+    """Analyze one byte range with shard-local line numbers starting at 1"""
+    with open(path, 'rb') as f:
+        if use_mmap and end > start:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if _can_scan_bytes(mm, start, end):
+                    return scan_buffer(mm, start, end, window=window)
+        f.seek(start)
+        data = f.read(end - start)
+    return analyze_bytes(data, use_mmap=False, window=window)
+
+
+def _analyze_shard_args(args):
+    return analyze_shard(*args)
+
+
+def _analyze_bytes_args(args):
+    return analyze_bytes(*args)
+
+
+def _merge_batches(path, shards, batches, line_offset, progress, cancel):
+    """Renumber per-range results into one store, reporting each batch as it lands"""
+    results = ResultStore(path)
+    line_count = 0
+    for (_, end), (batch_lines, issues) in zip(shards, batches):
+        for issue in issues:
+            issue["line_num"] += line_offset + line_count
+        results.extend(issues)
+        line_count += batch_lines
+        if progress is not None:
+            progress(issues, end)
+        if cancel is not None and cancel.is_set():
+            raise AnalysisCancelled()
+    results.line_count = line_count
+    return line_count, results
+
+
+def analyze_range(path, start, end, workers=1, min_shard_size=MIN_SHARD_SIZE, use_mmap=True,
+                  line_offset=0, progress=None, cancel=None, window=None):
+    """Analyze ``[start, end)`` of a file, sharding it across processes if asked.
+
+    ``start`` must be a line start.  Returns ``(line_count, issues)`` with
+    the issues in a :class:`untils.results.ResultStore`; line numbers count
+    from ``start`` and are shifted by ``line_offset``.
+    ``progress(issues, position)`` is called as each range is finished and
+    a set ``cancel`` event (``threading.Event``) raises AnalysisCancelled.
+    A :class:`untils.context.ContextWindow` as ``window`` adds the lines
+    around each issue; with mmap scanning it reaches across shard borders,
+    otherwise it stops at them.
+    """
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled()
+
+    workers = max(1, int(workers or 1))
+    if workers > 1:
+        shards = find_shards(path, workers * SHARDS_PER_WORKER, min_shard_size, start, end)
+    elif progress is not None or cancel is not None:
+        shards = find_shards(path, (end - start) // PROGRESS_BLOCK_SIZE + 1,
+                             PROGRESS_BLOCK_SIZE, start, end)
+    else:
+        shards = [(start, end)]
+
+    if workers == 1 or len(shards) == 1:
+        if len(shards) == 1 and not use_mmap and not start and end == os.path.getsize(path):
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                batches = [analyze_lines(f, window=window)]
+        else:
+            batches = (analyze_shard(path, s, e, use_mmap, window) for s, e in shards)
+        return _merge_batches(path, shards, batches, line_offset, progress, cancel)
+
+    pool = process_pool(min(workers, len(shards)))
+    try:
+        batches = pool.map(_analyze_shard_args, [(path, s, e, use_mmap, window) for s, e in shards])
+        result = _merge_batches(path, shards, batches, line_offset, progress, cancel)
+    except BaseException:
+        # Do not wait for shards nobody will look at
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return result
+
+
+def _ordered_map(pool, fn, items, depth):
+    """``pool.map`` over ``(arg, tag)`` pairs with at most ``depth`` tasks in flight.
+
+    Yields ``(tag, result)`` in input order; unlike ``Executor.map`` the
+    input is consumed lazily, so a long stream is never held in memory.
+    """
+    pending = collections.deque()
+    for arg, tag in items:
+        pending.append((pool.submit(fn, arg), tag))
+        if len(pending) >= depth:
+            future, tag = pending.popleft()
+            yield tag, future.result()
+    while pending:
+        future, tag = pending.popleft()
+        yield tag, future.result()
+
+
+def _stream_blocks(path, kind, block_size=DECOMPRESS_BLOCK_SIZE):
+    """Yield newline-aligned decompressed blocks with the compressed position reached"""
+    with open(path, 'rb') as raw, open_decompressed(raw, kind) as stream:
+        carry = b''
+        while True:
+            data = stream.read(block_size)
+            if not data:
+                break
+            data = carry + data
+            cut = data.rfind(b'\n') + 1
+            if not cut:
+                carry = data
+                continue
+            carry = data[cut:]
+            yield data[:cut], raw.tell()
+        if carry:
+            yield carry, raw.tell()
+
+
+def _group_frames(frames, count):
+    """Join consecutive frames into about ``count`` ranges of compressed bytes"""
+    target = max(MIN_FRAME_GROUP_SIZE, (frames[-1][1] - frames[0][0]) // max(count, 1))
+    groups = []
+    start, end = frames[0]
+    for frame_start, frame_end in frames[1:]:
+        if end - start >= target:
+            groups.append((start, end))
+            start = frame_start
+        end = frame_end
+    groups.append((start, end))
+    return groups
+
+
+def _analyze_frames(args):
+    """Decompress a run of frames and analyze the lines wholly inside it.
+
+    Returns ``(head, line_count, issues, tail)``: the bytes up to and
+    including the first newline, the results for the complete lines after
+    it and whatever follows the last newline.  ``head`` is None when the
+    run has no newline at all.  Head and tail belong to lines shared with
+    the neighbouring runs.
+    """
+    path, kind, start, end, use_mmap, window = args
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = decompress(f.read(end - start), kind)
+    first = data.find(b'\n')
+    if first < 0:
+        return None, 0, [], data
+    last = data.rfind(b'\n')
+    line_count, issues = analyze_bytes(data[first + 1:last + 1], use_mmap, window)
+    return data[:first + 1], line_count, issues, data[last + 1:]
+
+
+def _stitch_frame_groups(groups, use_mmap, window=None):
+    """Analyze the lines split between frame runs, yielding ordinary batches"""
+    carry = b''
+    position = 0
+    for position, (head, body_lines, body_issues, tail) in groups:
+        if head is None:
+            carry += tail
+            continue
+        head_lines, head_issues = analyze_bytes(carry + head, use_mmap, window)
+        for issue in body_issues:
+            issue["line_num"] += head_lines
+        yield position, (head_lines + body_lines, head_issues + body_issues)
+        carry = tail
+    if carry:
+        yield position, analyze_bytes(carry, use_mmap, window)
+
+
+def _merge_compressed(batches, progress, cancel):
+    """Like :func:`_merge_batches` for ``(position, (line_count, issues))`` batches"""
+    results = ResultStore()
+    line_count = 0
+    for position, (batch_lines, issues) in batches:
+        for issue in issues:
+            issue["line_num"] += line_count
+            # Offsets point into the decompressed stream, not into the file
+            issue.pop("offset", None)
+        results.extend(issues)
+        line_count += batch_lines
+        if progress is not None:
+            progress(issues, position)
+        if cancel is not None and cancel.is_set():
+            raise AnalysisCancelled()
+    results.line_count = line_count
+    return line_count, results
+
+
+def analyze_compressed(path, kind, workers=1, use_mmap=True, progress=None, cancel=None, window=None):
+    """Analyze a gzip/zstd/xz/bz2 log while it is being decompressed.
+
+    BGZF and multi-frame zstd files are cut into runs of frames that worker
+    processes decompress and analyze in parallel.  Other files are
+    decompressed as a stream, with the blocks analyzed in worker processes
+    when ``workers`` > 1.  Returns ``(line_count, issues)``; progress
+    positions are offsets into the compressed file.  Context captured with
+    a ``window`` stops at the edges of decompressed blocks.
+    """
+    if cancel is not None and cancel.is_set():
+        raise AnalysisCancelled()
+
+    workers = max(1, int(workers or 1))
+    if workers == 1:
+        batches = ((position, analyze_bytes(block, use_mmap, window))
+                   for block, position in _stream_blocks(path, kind))
+        return _merge_compressed(batches, progress, cancel)
+
+    frames = find_frames(path, kind)
+    pool = process_pool(workers)
+    try:
+        if frames and len(frames) > 1:
+            groups = _group_frames(frames, workers * SHARDS_PER_WORKER)
+            tasks = (((path, kind, start, end, use_mmap, window), end) for start, end in groups)
+            batches = _stitch_frame_groups(
+                _ordered_map(pool, _analyze_frames, tasks, workers * 2), use_mmap, window)
+        else:
+            # Decompression stays serial, detection is spread over the pool
+            tasks = (((block, use_mmap, window), position) for block, position in _stream_blocks(path, kind))
+            batches = _ordered_map(pool, _analyze_bytes_args, tasks, workers * 2)
+        result = _merge_compressed(batches, progress, cancel)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    return result
+
+
+def _analyze_appended(path, checkpoints, workers, min_shard_size, use_mmap, progress, cancel, window):
+    """Resume from the stored checkpoint when the file only grew since then"""
+    key = checkpoints.key_for(path, results_fingerprint(window))
+    size = os.path.getsize(path)
+    checkpoint = checkpoints.get(key)
+    segments = None
+    if checkpoint is not None and checkpoints.is_valid(checkpoint, path, size):
+        segments = checkpoints.segments(checkpoint)
+    if segments is None:
+        if checkpoint is not None:
+            checkpoints.discard(checkpoint)
+        checkpoint = {"offset": 0, "line_count": 0, "stats": {}, "segments": []}
+        segments = []
+
+    # Only complete lines go into the checkpoint; a partial last line may
+    # still be growing and is analysed separately below
+    boundary = last_line_end(path, size)
+    offset = checkpoint["offset"]
+    line_count = checkpoint["line_count"]
+    stored = ResultStore(path)
+    for segment in segments:
+        stored.extend(segment)
+    results = ResultStore(path, stored)
+    if progress is not None and offset:
+        # Report the stored issues as their own object; ``results`` keeps growing
+        progress(stored, offset)
+
+    if boundary > offset:
+        new_lines, new_issues = analyze_range(path, offset, boundary, workers, min_shard_size,
+                                              use_mmap, line_count, progress, cancel, window)
+        # Issues on the last lines may still get context lines once the log
+        # grows, so those lines stay out of the checkpoint and are analysed
+        # again on the next resume
+        held = min(window.lookahead, new_lines) if window is not None else 0
+        saved_issues = new_issues
+        all_issues = results
+        if held:
+            last_saved = line_count + new_lines - held
+            saved_issues = ResultStore(path, (issue for issue in new_issues
+                                              if issue["line_num"] <= last_saved))
+            all_issues = ResultStore(path, stored)
+            all_issues.extend(saved_issues)
+        results.extend(new_issues)
+        if new_lines > held:
+            stats = dict(checkpoint["stats"])
+            for level, count in saved_issues.counts().items():
+                stats[level] = stats.get(level, 0) + count
+            # Only the new issues are written; earlier segments stay as they are
+            checkpoints.save(key, checkpoint, path, line_start_back(path, boundary, held),
+                             line_count + new_lines - held, stats, saved_issues, all_issues)
+        line_count += new_lines
+
+    if size > boundary:
+        tail_lines, tail_issues = analyze_range(path, boundary, size, use_mmap=use_mmap,
+                                                line_offset=line_count, progress=progress,
+                                                cancel=cancel, window=window)
+        results.extend(tail_issues)
+        line_count += tail_lines
+    results.line_count = line_count
+    return results
+
+
+def cached_results(cache, key, path):
+    """Results stored under ``key`` as a ResultStore reading from ``path``, or None.
+
+    Cache keys hold no path, so a copy of an analysed log hits the entry of
+    the original; the line text then has to come from the copy.
+    """
+    results = cache.get(key)
+    if results is None:
+        return None
+    if not isinstance(results, ResultStore):
+        return ResultStore(path, results)
+    results.relocate(path)
+    return results
+
+
+def results_fingerprint(window=None):
+    """Cache key part for results of the shared detector, captured with ``window``"""
+    fingerprint = get_detector().fingerprint
+    return fingerprint if window is None else f"{fingerprint}:{window.key}"
+
+
+def analyze_file(path, workers=1, min_shard_size=MIN_SHARD_SIZE, use_mmap=True, cache=None,
+                 checkpoints=None, progress=None, cancel=None, window=None):
+    """Detect ROM issues in a file, optionally sharded across processes.
+
+    Shards are cut on newlines and merged back in line order, so the result
+    holds the same issues ``detect_rom_issues`` produces when walking the
+    file line by line, in a compact :class:`untils.results.ResultStore`.  With ``use_mmap`` the file is memory-mapped and scanned
+    as bytes, decoding only the lines that can match a rule.  A
+    :class:`untils.cache.ResultCache` passed as ``cache`` is consulted first
+    and filled on a miss.  With a :class:`untils.cache.CheckpointStore` as
+    ``checkpoints``, a file that was only appended to since its last
+    analysis has just the new bytes scanned.  Compressed logs are detected
+    by their magic bytes and go through :func:`analyze_compressed`.  ``progress``, ``cancel``
+    and ``window`` work as in :func:`analyze_range`.
+    """
+    if cache is not None:
+        key = cache.key_for(path, results_fingerprint(window))
+        results = cached_results(cache, key, path)
+        if results is None:
+            results = analyze_file(path, workers, min_shard_size, use_mmap,
+                                   checkpoints=checkpoints, progress=progress, cancel=cancel,
+                                   window=window)
+            cache.put(key, results)
+        elif progress is not None:
+            progress(results, os.path.getsize(path))
+        return results
+
+    kind = detect_compression(path)
+    if kind is not None:
+        return analyze_compressed(path, kind, workers, use_mmap, progress, cancel, window)[1]
+
+    if checkpoints is not None:
+        return _analyze_appended(path, checkpoints, workers, min_shard_size, use_mmap,
+                                 progress, cancel, window)
+
+    return analyze_range(path, 0, os.path.getsize(path), workers, min_shard_size, use_mmap,
+                         progress=progress, cancel=cancel, window=window)[1]
@@ -0,0 +1,177 @@
+import glob
+import os
+import time
+
+from untils.analysis import (MIN_SHARD_SIZE, SHARDS_PER_WORKER, _merge_batches, analyze_compressed,
+                             analyze_range, analyze_shard, cached_results, default_workers,
+                             find_shards, process_pool, results_fingerprint)
+from untils.compression import detect_compression
+
+_GLOB_CHARS = '*?['
+
+
+def expand_inputs(inputs):
+    """Turn files, directories and glob patterns into a list of unique files"""
+    paths = []
+    seen = set()
+
+    def add(path):
+        real = os.path.realpath(path)
+        if real not in seen and os.path.isfile(path):
+            seen.add(real)
+            paths.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    add(os.path.join(root, name))
+        elif any(c in item for c in _GLOB_CHARS):
+            for path in sorted(glob.glob(item, recursive=True)):
+                add(path)
+        else:
+            add(item)
+    return paths
+
+
+def missing_inputs(inputs):
+    """The files and directories in ``inputs`` that do not exist and the glob
+    patterns that match nothing"""
+    missing = []
+    for item in inputs:
+        if any(c in item for c in _GLOB_CHARS):
+            if not glob.glob(item, recursive=True):
+                missing.append(item)
+        elif not os.path.exists(item):
+            missing.append(item)
+    return missing
+
+
+def _analyze_compressed_file(path, kind, use_mmap, window=None):
+    return analyze_compressed(path, kind, use_mmap=use_mmap, window=window)
+
+
+def analyze_batch(paths, workers=None, use_mmap=True, cache=None, min_shard_size=MIN_SHARD_SIZE,
+                  window=None):
+    """Analyze many logs on one process pool.
+
+    Files are scheduled largest first, and large ones are split into shards
+    like :func:`untils.analysis.analyze_file` does, so the pool stays busy
+    until the very end.  Yields ``(path, line_count, issues)`` for each file
+    as soon as all of its shards are done; ``line_count`` is None for cache
+    hits that predate line counting.  A ``window`` captures context lines
+    as in :func:`untils.analysis.analyze_range`.
+    """
+    workers = max(1, int(workers or default_workers()))
+    fingerprint = results_fingerprint(window)
+
+    pending = []
+    for path in sorted(paths, key=os.path.getsize, reverse=True):
+        key = None
+        if cache is not None:
+            key = cache.key_for(path, fingerprint)
+            results = cached_results(cache, key, path)
+            if results is not None:
+                yield path, getattr(results, "line_count", None), results
+                continue
+        pending.append((path, key))
+
+    def finish(path, key, line_count, results):
+        if cache is not None:
+            cache.put(key, results)
+        return path, line_count, results
+
+    if workers == 1:
+        for path, key in pending:
+            kind = detect_compression(path)
+            if kind is not None:
+                line_count, results = analyze_compressed(path, kind, use_mmap=use_mmap, window=window)
+            else:
+                line_count, results = analyze_range(path, 0, os.path.getsize(path), use_mmap=use_mmap,
+                                                    window=window)
+            yield finish(path, key, line_count, results)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, wait
+    pool = process_pool(workers)
+    try:
+        # Every file's tasks go in up front, biggest file first
+        jobs = {}
+        owner = {}
+        for path, key in pending:
+            kind = detect_compression(path)
+            if kind is not None:
+                shards = None
+                futures = [pool.submit(_analyze_compressed_file, path, kind, use_mmap, window)]
+            else:
+                shards = find_shards(path, workers * SHARDS_PER_WORKER, min_shard_size)
+                futures = [pool.submit(analyze_shard, path, start, end, use_mmap, window)
+                           for start, end in shards]
+            jobs[path] = (key, shards, futures)
+            for future in futures:
+                owner[future] = path
+
+        remaining = {path: len(futures) for path, (_, _, futures) in jobs.items()}
+        not_done = set(owner)
+        while not_done:
+            done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = owner[future]
+                remaining[path] -= 1
+                if remaining[path]:
+                    continue
+                key, shards, futures = jobs.pop(path)
+                if shards is None:
+                    line_count, results = futures[0].result()
+                else:
+                    line_count, results = _merge_batches(
+                        path, shards, [f.result() for f in futures], 0, None, None)
+                yield finish(path, key, line_count, results)
+    except BaseException:
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+
+class BatchSummary:
+    """Per-file and per-level totals of a batch run"""
+
+    def __init__(self):
+        self.files = []
+        self.levels = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, path, line_count, issues):
+        counts = issues.counts()
+        for level, count in counts.items():
+            self.levels[level] = self.levels.get(level, 0) + count
+        entry = {
+            "path": path,
+            "size": os.path.getsize(path),
+            "lines": line_count,
+            "issues": len(issues),
+            "levels": counts,
+        }
+        self.files.append(entry)
+        self.elapsed = time.perf_counter() - self.started
+        return entry
+
+    @property
+    def total_issues(self):
+        return sum(entry["issues"] for entry in self.files)
+
+    @property
+    def total_bytes(self):
+        return sum(entry["size"] for entry in self.files)
+
+    def to_dict(self):
+        return {
+            "files": sorted(self.files, key=lambda entry: entry["path"]),
+            "levels": dict(sorted(self.levels.items(), key=lambda item: -item[1])),
+            "total_files": len(self.files),
+            "total_issues": self.total_issues,
+            "total_bytes": self.total_bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
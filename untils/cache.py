@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from untils import APP_DIR
+
+CACHE_DIR = os.path.join(APP_DIR, 'cache')
+CHECKPOINT_DIR = os.path.join(APP_DIR, 'checkpoints')
+INDEX_DIR = os.path.join(APP_DIR, 'index')
+COMPILED_RULES_DIR = os.path.join(APP_DIR, 'compiled_rules')
+# Total size of cached results before the least recently used are evicted
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+MAX_COMPILED_RULES_BYTES = 64 * 1024 * 1024
+# Appended issue segments a checkpoint keeps before they are merged into one
+MAX_CHECKPOINT_SEGMENTS = 32
+
+# Content sampling for the fast hash: head, tail and evenly spaced blocks
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCKS = 16
+
+
+def fast_content_hash(path, size=None):
+    """Hash the size plus sampled blocks of a file, without reading all of it.
+
+    With ``size`` only that many leading bytes are considered, which lets a
+    prefix be recognised after more data was appended.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if size is None:
+        size = os.path.getsize(path)
+    digest.update(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= SAMPLE_BLOCK_SIZE * SAMPLE_BLOCKS:
+            digest.update(f.read(size))
+        else:
+            step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for i in range(SAMPLE_BLOCKS):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of analysis results with size-bounded LRU eviction.
+
+    Entries are keyed by file size, mtime and a sampled content hash plus the
+    detector's ruleset fingerprint, so an edited log or changed rules never
+    reuse stale results.  Reads bump an entry's mtime, which is what the
+    eviction order goes by.
+    """
+
+    suffix = '.pickle'
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key_for(self, path, fingerprint):
+        st = os.stat(path)
+        digest = hashlib.blake2b(digest_size=20)
+        for part in (st.st_size, st.st_mtime_ns, fast_content_hash(path), fingerprint):
+            digest.update(str(part).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None"""
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cache entry {entry}: {e}")
+            self._remove(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store ``value`` atomically, then evict down to ``max_bytes``"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until the cache fits"""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            entry = os.path.join(self.directory, name)
+            try:
+                st = os.stat(entry)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= max_bytes:
+                break
+            self._remove(entry)
+            total -= size
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class CheckpointStore(ResultCache):
+    """Per-file analysis checkpoints for logs that keep being appended to.
+
+    A checkpoint records how far a file was analysed (byte offset and line
+    count), a sampled hash of that prefix and per-level counts.  The issues
+    found so far live in separate segment entries, one per analysed range,
+    so a resume writes only what the new bytes produced.  It is keyed by
+    the file's real path and the ruleset fingerprint, and only reused while
+    the stored prefix is unchanged.
+    """
+
+    def __init__(self, directory=CHECKPOINT_DIR, max_bytes=MAX_CACHE_BYTES):
+        super().__init__(directory, max_bytes)
+
+    def key_for(self, path, fingerprint):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(os.path.realpath(path).encode('utf-8', 'surrogateescape'))
+        digest.update(b'\0')
+        digest.update(fingerprint.encode())
+        return digest.hexdigest()
+
+    def is_valid(self, checkpoint, path, size):
+        offset = checkpoint["offset"]
+        return ("segments" in checkpoint and offset <= size
+                and checkpoint["prefix_hash"] == fast_content_hash(path, offset))
+
+    def segments(self, checkpoint):
+        """The stored issue segments in order, or None if one was evicted"""
+        segments = []
+        for segment_key in checkpoint["segments"]:
+            segment = self.get(segment_key)
+            if segment is None:
+                return None
+            segments.append(segment)
+        return segments
+
+    def discard(self, checkpoint):
+        """Delete the segments of a checkpoint that will not be resumed"""
+        for segment_key in checkpoint.get("segments", ()):
+            self._remove(self._entry_path(segment_key))
+
+    def save(self, key, checkpoint, path, offset, line_count, stats, issues, all_issues):
+        """Record progress up to ``offset``; ``issues`` were found since ``checkpoint``.
+
+        ``issues`` becomes a new segment; once MAX_CHECKPOINT_SEGMENTS are
+        stored they are replaced by a single one holding ``all_issues``.
+        """
+        segment_keys = list(checkpoint.get("segments", ()))
+        start = checkpoint["offset"]
+        if len(segment_keys) >= MAX_CHECKPOINT_SEGMENTS:
+            self.discard(checkpoint)
+            segment_keys = []
+            start = 0
+            issues = all_issues
+        segment_key = f"{key}-{start}-{offset}"
+        self.put(segment_key, issues)
+        segment_keys.append(segment_key)
+        self.put(key, {
+            "offset": offset,
+            "line_count": line_count,
+            "prefix_hash": fast_content_hash(path, offset),
+            "stats": stats,
+            "segments": segment_keys,
+        })
+
+
+class CompiledRuleCache(ResultCache):
+    """Parsed, validated and analysed rule packs, keyed by the rule file's content hash"""
+
+    def __init__(self, directory=COMPILED_RULES_DIR, max_bytes=MAX_COMPILED_RULES_BYTES):
+        super().__init__(directory, max_bytes)
+
+    def key_for(self, data, version):
+        digest = hashlib.blake2b(data, digest_size=20)
+        digest.update(b'\0')
+        digest.update(str(version).encode())
+        return digest.hexdigest()
@@ -0,0 +1,160 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import struct
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_MAGICS = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'BZh', 'bz2'),
+)
+COMPRESSED_EXTENSIONS = ('.gz', '.bgz', '.zst', '.xz', '.bz2')
+
+_ZSTD_MAGIC = 0xFD2FB528
+_ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+_ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+
+
+def detect_compression(path):
+    """Return 'gzip', 'zstd', 'xz', 'bz2' or None, judged by the magic bytes"""
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, kind in _MAGICS:
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def _zstd_decompressor():
+    if zstandard is None:
+        raise RuntimeError("Reading .zst logs needs the 'zstandard' package (pip install zstandard)")
+    return zstandard.ZstdDecompressor()
+
+
+def open_decompressed(fileobj, kind):
+    """Wrap a binary file object in a streaming decompressor"""
+    if kind == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode='rb')
+    if kind == 'xz':
+        return lzma.LZMAFile(fileobj)
+    if kind == 'bz2':
+        return bz2.BZ2File(fileobj)
+    if kind == 'zstd':
+        return _zstd_decompressor().stream_reader(fileobj, read_across_frames=True)
+    raise ValueError(f"Unknown compression: {kind}")
+
+
+def open_compressed(path, kind):
+    """Open a compressed file as a binary stream that owns the file handle"""
+    if kind == 'gzip':
+        return gzip.open(path, 'rb')
+    if kind == 'xz':
+        return lzma.open(path, 'rb')
+    if kind == 'bz2':
+        return bz2.open(path, 'rb')
+    if kind == 'zstd':
+        return _zstd_decompressor().stream_reader(open(path, 'rb'), read_across_frames=True,
+                                                 closefd=True)
+    raise ValueError(f"Unknown compression: {kind}")
+
+
+def decompress(data, kind):
+    """Decompress a complete buffer of one or more gzip members / zstd frames"""
+    if kind == 'gzip':
+        return gzip.decompress(data)
+    if kind == 'zstd':
+        with _zstd_decompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as reader:
+            return reader.read()
+    if kind == 'xz':
+        return lzma.decompress(data)
+    if kind == 'bz2':
+        return bz2.decompress(data)
+    raise ValueError(f"Unknown compression: {kind}")
+
+
+def _bgzf_blocks(buf):
+    """Member boundaries of a BGZF file (bgzip), or None if it is plain gzip.
+
+    Every BGZF member carries its own compressed size in the 'BC' extra
+    subfield, so members can be located without inflating anything.
+    """
+    size = len(buf)
+    pos = 0
+    bounds = []
+    while pos < size:
+        if size - pos < 18 or buf[pos:pos + 4] != b'\x1f\x8b\x08\x04':
+            return None
+        xlen = struct.unpack_from('<H', buf, pos + 10)[0]
+        extra = pos + 12
+        block_size = None
+        while extra < pos + 12 + xlen:
+            si, slen = buf[extra:extra + 2], struct.unpack_from('<H', buf, extra + 2)[0]
+            if si == b'BC' and slen == 2:
+                block_size = struct.unpack_from('<H', buf, extra + 4)[0] + 1
+            extra += 4 + slen
+        if block_size is None:
+            return None
+        bounds.append((pos, pos + block_size))
+        pos += block_size
+    return bounds
+
+
+def _zstd_frames(buf):
+    """Frame boundaries of a zstd file, found by walking the block headers"""
+    size = len(buf)
+    pos = 0
+    bounds = []
+    while pos < size:
+        magic = struct.unpack_from('<I', buf, pos)[0]
+        if magic & _ZSTD_SKIPPABLE_MASK == _ZSTD_SKIPPABLE_MAGIC:
+            pos += 8 + struct.unpack_from('<I', buf, pos + 4)[0]
+            continue
+        if magic != _ZSTD_MAGIC:
+            return None
+        start = pos
+        descriptor = buf[pos + 4]
+        single_segment = descriptor >> 5 & 1
+        fcs_size = (1 if single_segment else 0, 2, 4, 8)[descriptor >> 6]
+        pos += 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 3] + fcs_size
+        while True:
+            if pos + 3 > size:
+                return None
+            header = int.from_bytes(buf[pos:pos + 3], 'little')
+            block_type = header >> 1 & 3
+            pos += 3 + (1 if block_type == 1 else header >> 3)
+            if header & 1:
+                break
+        if descriptor >> 2 & 1:
+            pos += 4
+        if pos > size:
+            return None
+        bounds.append((start, pos))
+    return bounds
+
+
+def find_frames(path, kind):
+    """Independently decompressible ``(start, end)`` ranges of a file.
+
+    Only BGZF gzip and zstd expose frame boundaries without decompressing;
+    for anything else (or a malformed file) None is returned.
+    """
+    if kind not in ('gzip', 'zstd'):
+        return None
+    with open(path, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+        with buf:
+            try:
+                return _bgzf_blocks(buf) if kind == 'gzip' else _zstd_frames(buf)
+            except (struct.error, IndexError):
+                return None
@@ -0,0 +1,138 @@
+import re
+from collections import deque
+
+# Bounds of the smart blocks: "In file included from" lines above a clang
+# diagnostic and source/caret lines below it
+MAX_INCLUDE_CHAIN = 16
+MAX_SNIPPET_LINES = 3
+
+_DIAGNOSTIC = re.compile(r"\S+:\d+:(?:\d+:)? (?:fatal error|error|warning|note):")
+_INCLUDED_FROM = re.compile(r"(?:In file included from|\s+from) \S+:\d+[:,]\s*$")
+_CARET = re.compile(r"\s*[~^][~^ ]*$")
+_NINJA_FAILED = "FAILED: "
+
+
+def _decode(data):
+    return data.decode('utf-8', errors='ignore').rstrip('\r')
+
+
+class ContextWindow:
+    """How much of the log to keep around each issue.
+
+    ``before`` and ``after`` plain lines, like ``grep -B/-A``; with
+    ``blocks`` the window widens for known multi-line formats: the
+    ``In file included from`` chain above a clang/gcc diagnostic and the
+    source and caret lines below it, and the command following a ninja
+    ``FAILED:`` line.  Captured lines are stored on the issue as
+    ``context_before`` and ``context_after`` (newline removed, indentation
+    kept so carets still line up).
+    """
+
+    def __init__(self, before=0, after=0, blocks=True):
+        self.before = max(0, before)
+        self.after = max(0, after)
+        self.blocks = blocks
+        # Lines a scanner has to look at to decide
+        self.lookbehind = max(self.before, MAX_INCLUDE_CHAIN if blocks else 0)
+        self.lookahead = max(self.after, MAX_SNIPPET_LINES if blocks else 0)
+
+    @property
+    def key(self):
+        """Part of the cache key of results captured with this window"""
+        return f"context:{self.before}:{self.after}:{int(self.blocks)}"
+
+    def select(self, line, before_lines, after_lines):
+        """Pick ``(before, after)`` for stripped issue ``line`` from its neighbours"""
+        before, after = self.before, self.after
+        if self.blocks:
+            if _DIAGNOSTIC.match(line):
+                chain = 0
+                for previous in reversed(before_lines):
+                    if not _INCLUDED_FROM.match(previous):
+                        break
+                    chain += 1
+                before = max(before, chain)
+                # Source and caret lines, only when a caret actually follows
+                for count, following in enumerate(after_lines[:MAX_SNIPPET_LINES], 1):
+                    if _DIAGNOSTIC.match(following.strip()) or _INCLUDED_FROM.match(following):
+                        break
+                    if '^' in following and _CARET.match(following):
+                        after = max(after, count)
+                        break
+            elif line.startswith(_NINJA_FAILED) and after_lines and after_lines[0].strip():
+                after = max(after, 1)
+        before_lines = before_lines[max(0, len(before_lines) - before):] if before else []
+        return before_lines, after_lines[:after]
+
+    def from_buffer(self, buf, line_start, line_end, line):
+        """Context of the line at ``buf[line_start:line_end]``, read from the buffer around it"""
+        before_lines = []
+        pos = line_start
+        while pos > 0 and len(before_lines) < self.lookbehind:
+            start = buf.rfind(b'\n', 0, pos - 1) + 1
+            before_lines.append(_decode(buf[start:pos - 1]))
+            pos = start
+        before_lines.reverse()
+
+        after_lines = []
+        pos = line_end + 1
+        size = len(buf)
+        while pos < size and len(after_lines) < self.lookahead:
+            end = buf.find(b'\n', pos)
+            if end < 0:
+                end = size
+            after_lines.append(_decode(buf[pos:end]))
+            pos = end + 1
+        return self.select(line, before_lines, after_lines)
+
+    def attach(self, issues, before, after):
+        for issue in issues:
+            issue["context_before"] = before
+            issue["context_after"] = after
+        return issues
+
+
+class ContextCapture:
+    """Context for a stream of lines, with no second pass over the log.
+
+    The last ``window.lookbehind`` lines are kept in a ring buffer; issues
+    wait until ``window.lookahead`` more lines have arrived (or the stream
+    ends), so memory stays bounded however long the log is.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.history = deque(maxlen=window.lookbehind)
+        # [issues, before lines, after lines] in line order
+        self.pending = deque()
+
+    def push(self, line, issues):
+        """Feed the next line (newline removed) and the issues found on it.
+
+        Returns the issues whose context is now complete, in line order.
+        """
+        done = []
+        for entry in self.pending:
+            entry[2].append(line)
+        while self.pending and len(self.pending[0][2]) >= self.window.lookahead:
+            done.extend(self._finish(self.pending.popleft()))
+        if issues:
+            entry = [issues, list(self.history), []]
+            if self.window.lookahead:
+                self.pending.append(entry)
+            else:
+                done.extend(self._finish(entry))
+        self.history.append(line)
+        return done
+
+    def flush(self):
+        """Issues still waiting for lines that will never come"""
+        done = []
+        while self.pending:
+            done.extend(self._finish(self.pending.popleft()))
+        return done
+
+    def _finish(self, entry):
+        issues, before_lines, after_lines = entry
+        before, after = self.window.select(issues[0]["line"], before_lines, after_lines)
+        return self.window.attach(issues, before, after)
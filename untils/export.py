@@ -0,0 +1,211 @@
+import csv
+import json
+import os
+import pathlib
+import time
+
+from rom_detection_levels import generate_rom_message, get_detector, level_severity
+from untils.results import ResultStore
+
+EXPORT_FORMATS = ("text", "jsonl", "csv", "sarif")
+FORMAT_EXTENSIONS = {
+    ".txt": "text",
+    ".jsonl": "jsonl",
+    ".csv": "csv",
+    ".sarif": "sarif",
+}
+CSV_FIELDS = ("file", "line_num", "level", "severity", "message", "context", "line")
+# Extra columns when context lines were captured; their lines are joined with newlines
+CSV_CONTEXT_FIELDS = ("context_before", "context_after")
+
+_SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+_SARIF_LEVELS = {"critical": "error", "error": "error", "warning": "warning", "note": "note"}
+
+
+def format_for_path(path, default="text"):
+    """Export format implied by a file name's extension"""
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower(), default)
+
+
+def issue_record(issue, path=None):
+    """Flat, serialisable view of an issue"""
+    record = {
+        "file": path,
+        "line_num": issue["line_num"],
+        "level": issue["level"],
+        "severity": level_severity(issue["level"]),
+        "message": issue["message"],
+        "context": issue["context"],
+        "line": issue["line"],
+    }
+    if "context_before" in issue:
+        record["context_before"] = issue["context_before"]
+        record["context_after"] = issue["context_after"]
+    return record
+
+
+class JsonLinesWriter:
+    """One JSON object per issue and line"""
+
+    def __init__(self, f, context=False):
+        self.f = f
+        self.context = context
+        self.written = 0
+
+    def begin(self):
+        pass
+
+    def write(self, issues, path=None):
+        for issue in issues:
+            self.f.write(json.dumps(issue_record(issue, path), ensure_ascii=False))
+            self.f.write("\n")
+            self.written += 1
+
+    def end(self):
+        pass
+
+
+class CsvWriter(JsonLinesWriter):
+    """One CSV row per issue, with a header row"""
+
+    def __init__(self, f, context=False):
+        super().__init__(f, context)
+        fields = CSV_FIELDS + CSV_CONTEXT_FIELDS if context else CSV_FIELDS
+        self.writer = csv.DictWriter(f, fieldnames=fields, lineterminator="\n", extrasaction="ignore")
+
+    def begin(self):
+        self.writer.writeheader()
+
+    def write(self, issues, path=None):
+        for issue in issues:
+            record = issue_record(issue, path)
+            for field in CSV_CONTEXT_FIELDS:
+                if field in record:
+                    record[field] = "\n".join(record[field])
+            self.writer.writerow(record)
+            self.written += 1
+
+
+class SarifWriter(JsonLinesWriter):
+    """A SARIF 2.1.0 log with one run; results are streamed into its array"""
+
+    def begin(self):
+        rules = [
+            {
+                "id": level,
+                "shortDescription": {"text": generate_rom_message(level, "")},
+                "defaultConfiguration": {"level": _SARIF_LEVELS[level_severity(level)]},
+            }
+            for level in get_detector().levels
+        ]
+        head = json.dumps({
+            "$schema": _SARIF_SCHEMA,
+            "version": "2.1.0",
+            "runs": [{
+                "tool": {"driver": {"name": "Enhanced Log Seeker", "rules": rules}},
+                "results": [],
+            }],
+        }, ensure_ascii=False)
+        # Everything up to the empty results array; results go in between
+        self.tail = head[head.rindex("[]") + 1:]
+        self.f.write(head[:head.rindex("[]") + 1])
+
+    def write(self, issues, path=None):
+        # A physical location needs an artifact, which stdin does not have;
+        # its line numbers go into the properties instead
+        uri = pathlib.Path(path).resolve().as_uri() if path and path != "-" else None
+        for issue in issues:
+            result = {
+                "ruleId": issue["level"],
+                "level": _SARIF_LEVELS[level_severity(issue["level"])],
+                "message": {"text": f"{issue['message']}: {issue['line']}"},
+                "properties": {"context": issue["context"]},
+            }
+            if uri is None:
+                result["properties"]["lineNumber"] = issue["line_num"]
+                self._write_result(result)
+                continue
+            result["locations"] = [{
+                "physicalLocation": {
+                    "artifactLocation": {"uri": uri},
+                    "region": {
+                        "startLine": issue["line_num"],
+                        "snippet": {"text": issue["line"]},
+                    },
+                },
+            }]
+            if issue.get("context_before") or issue.get("context_after"):
+                before, after = issue["context_before"], issue["context_after"]
+                result["locations"][0]["physicalLocation"]["contextRegion"] = {
+                    "startLine": issue["line_num"] - len(before),
+                    "endLine": issue["line_num"] + len(after),
+                    "snippet": {"text": "\n".join(before + [issue["line"]] + after)},
+                }
+            self._write_result(result)
+
+    def _write_result(self, result):
+        if self.written:
+            self.f.write(",")
+        self.f.write("\n")
+        self.f.write(json.dumps(result, ensure_ascii=False))
+        self.written += 1
+
+    def end(self):
+        self.f.write("\n" if self.written else "")
+        self.f.write(self.tail)
+        self.f.write("\n")
+
+
+class TextReportWriter(JsonLinesWriter):
+    """Human-readable report grouped by level, for every level found"""
+
+    def write(self, issues, path=None):
+        if not isinstance(issues, ResultStore):
+            issues = ResultStore(None, issues)
+        self.f.write(
+            f"\n🔍 Enhanced Log Seeker Analysis Report\n"
+            f"=====================================\n"
+            f"File: {path}\n"
+            f"Analysis Date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"Total Issues Found: {len(issues)}\n\n")
+
+        counts = issues.counts()
+        levels = [level for level in get_detector().levels if level in counts]
+        levels += [level for level in counts if level not in levels]
+        for level in levels:
+            by_level = issues.filtered(level)
+            self.f.write(f"\n{by_level[0]['icon']} {level} ({counts[level]} issues)\n")
+            self.f.write("-" * 40 + "\n")
+            for issue in by_level:
+                self.f.write(f"Line {issue['line_num']}: {issue['message']}\n")
+                self.f.write("".join(f"  | {line}\n" for line in issue.get("context_before", ())))
+                self.f.write(f"    {issue['line']}\n")
+                self.f.write("".join(f"  | {line}\n" for line in issue.get("context_after", ())))
+                self.f.write("\n")
+                self.written += 1
+
+
+_WRITERS = {
+    "text": TextReportWriter,
+    "jsonl": JsonLinesWriter,
+    "csv": CsvWriter,
+    "sarif": SarifWriter,
+}
+
+
+def make_writer(fmt, f, context=False):
+    """Streaming writer for an export format; call begin(), write()... and end().
+
+    ``context`` adds columns for captured context lines where the format
+    has a fixed set of them (CSV); the others include them when present.
+    """
+    return _WRITERS[fmt](f, context)
+
+
+def export_issues(f, issues, fmt, path=None):
+    """Write one file's issues to ``f`` in ``fmt``; returns the number written"""
+    writer = make_writer(fmt, f, context=bool(getattr(issues, "context_lines", None)))
+    writer.begin()
+    writer.write(issues, path)
+    writer.end()
+    return writer.written
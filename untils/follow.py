@@ -0,0 +1,192 @@
+import os
+import time
+
+from untils.analysis import AnalysisCancelled, analyze_bytes
+from untils.context import ContextCapture
+
+# Largest slice of newly appended data analysed in one go
+READ_BLOCK_SIZE = 8 * 1024 * 1024
+# Seconds between checks for new data in follow()
+POLL_INTERVAL = 1.0
+# Quiet polls after which follow() gives up waiting for context lines
+PENDING_IDLE_POLLS = 5
+
+
+def _decode(line):
+    return line.decode('utf-8', errors='ignore').rstrip('\r')
+
+
+class LogFollower:
+    """Incrementally analyse a log that is still being written.
+
+    Every :meth:`poll` reads only the bytes appended since the previous call
+    and returns the issues found in newly completed lines.  A partial last
+    line is left for the next poll.  If the file shrinks (truncated) or the
+    path now points at a different file (rotated), analysis restarts at the
+    top of the new content, after draining what was left of the old one.
+    A line longer than READ_BLOCK_SIZE is analysed by its first block only
+    and the rest of it is skipped.
+    With a ``window``, issues near the edges of the data read by a poll get
+    their context through a ContextCapture kept across polls: the lines
+    before them may come from an earlier poll, and an issue whose lines
+    after have not been written yet is held back until they have (or
+    :meth:`flush` is called).
+    """
+
+    def __init__(self, path, use_mmap=True, window=None):
+        self.path = path
+        self.use_mmap = use_mmap
+        self.window = window
+        self.file = None
+        self.offset = 0
+        self.line_count = 0
+        self.restarts = 0
+        # Inside an over-long line whose head was already analysed
+        self.skip_line = False
+        self.capture = None
+
+    def _open(self):
+        self.file = open(self.path, 'rb')
+        self._restart()
+
+    def _restart(self):
+        self.offset = 0
+        self.line_count = 0
+        self.skip_line = False
+        self.capture = ContextCapture(self.window) if self.window is not None else None
+
+    def _carry_context(self, chunk, line_count, found):
+        """Redo the context of issues near the edges of ``chunk`` with the
+        capture kept across polls; returns the issues that are complete"""
+        window = self.window
+        edge = window.lookbehind + window.lookahead
+        if not edge:
+            return found
+        if chunk.endswith(b'\n'):
+            chunk = chunk[:-1]
+        if line_count <= 2 * edge:
+            spans = [(1, chunk.split(b'\n'))]
+        else:
+            spans = [(1, chunk.split(b'\n', edge)[:edge]),
+                     (line_count - edge + 1, chunk.rsplit(b'\n', edge)[-edge:])]
+
+        by_line = {}
+        issues = []
+        for issue in found:
+            line_num = issue["line_num"] - self.line_count
+            if (line_count <= 2 * edge or line_num <= window.lookbehind
+                    or line_num > line_count - window.lookahead):
+                by_line.setdefault(line_num, []).append(issue)
+            else:
+                issues.append(issue)
+        for first, lines in spans:
+            for line_num, line in enumerate(lines, first):
+                issues.extend(self.capture.push(_decode(line), by_line.get(line_num)))
+        issues.sort(key=lambda issue: issue["line_num"])
+        return issues
+
+    def _read_new(self, progress=None, cancel=None):
+        """Analyse complete lines past ``offset`` in the open file, block by block"""
+        issues = []
+        while True:
+            self.file.seek(self.offset)
+            data = self.file.read(READ_BLOCK_SIZE)
+            if self.skip_line:
+                newline = data.find(b'\n')
+                if newline < 0:
+                    self.offset += len(data)
+                    if len(data) < READ_BLOCK_SIZE:
+                        return issues
+                    continue
+                self.offset += newline + 1
+                self.skip_line = False
+                continue
+            end = data.rfind(b'\n') + 1
+            if not end:
+                if len(data) < READ_BLOCK_SIZE:
+                    return issues
+                # A single line longer than a block: its head counts as the line
+                end = len(data)
+                self.skip_line = True
+            line_count, found = analyze_bytes(data[:end], use_mmap=self.use_mmap, window=self.window)
+            for issue in found:
+                issue["line_num"] += self.line_count
+                if "offset" in issue:
+                    issue["offset"] += self.offset
+            if self.capture is not None:
+                found = self._carry_context(data[:end], line_count, found)
+            issues.extend(found)
+            self.line_count += line_count
+            self.offset += end
+            if progress is not None:
+                progress(found, self.offset)
+            if cancel is not None and cancel.is_set():
+                raise AnalysisCancelled()
+
+    def _rotated(self):
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        opened = os.fstat(self.file.fileno())
+        return (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev)
+
+    def poll(self, progress=None, cancel=None):
+        """Return issues from lines completed since the last call.
+
+        ``progress`` and ``cancel`` work as for ``analyze_file``: the issues
+        of every block read are reported with the offset reached, and a set
+        ``cancel`` event raises AnalysisCancelled between blocks (the
+        follower stays usable and continues from there).
+        """
+        if self.file is None:
+            if not os.path.exists(self.path):
+                return []
+            self._open()
+
+        issues = []
+        if self._rotated():
+            issues.extend(self._read_new(progress, cancel))
+            issues.extend(self._flush_pending(progress))
+            self.file.close()
+            self._open()
+            self.restarts += 1
+        elif os.fstat(self.file.fileno()).st_size < self.offset:
+            issues.extend(self._flush_pending(progress))
+            self._restart()
+            self.restarts += 1
+
+        issues.extend(self._read_new(progress, cancel))
+        return issues
+
+    def _flush_pending(self, progress):
+        issues = self.flush()
+        if issues and progress is not None:
+            progress(issues, self.offset)
+        return issues
+
+    def flush(self):
+        """Issues still waiting for context lines, with the context seen so far"""
+        return self.capture.flush() if self.capture is not None else []
+
+    def follow(self, interval=POLL_INTERVAL):
+        """Yield issues forever as the log grows.
+
+        Issues held back for context lines are given up on once the log
+        has been quiet for PENDING_IDLE_POLLS polls.
+        """
+        idle = 0
+        while True:
+            offset = self.offset
+            issues = self.poll()
+            idle = idle + 1 if self.offset == offset else 0
+            if idle == PENDING_IDLE_POLLS:
+                issues.extend(self.flush())
+            yield from issues
+            if not issues:
+                time.sleep(interval)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -1,3 +1,4 @@
+import re
 
 from termcolor import colored
 
@@ -5,11 +6,21 @@ FAIL_KEYWORDS = ["fail", "error", "crash", "recovery", "panic", "timeout"]
 
 KEYWORDS = ["error", "fail", "boot", "recovery", "panic", "timeout", "crash"]
 
+# ANSI codes around a highlighted hit, computed once
+_HIGHLIGHT_START, _HIGHLIGHT_END = colored("\0", "red", attrs=["bold"]).split("\0")
+
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(kw) for kw in sorted(KEYWORDS, key=len, reverse=True)),
+    re.IGNORECASE)
+_KEYWORD_REPL = (_HIGHLIGHT_START.replace("\\", "\\\\") + r"\g<0>"
+                 + _HIGHLIGHT_END.replace("\\", "\\\\"))
+
 def highlight_keywords(lines):
-    highlighted_lines = []
+    """Colour every keyword hit, in any case, with one regex pass per line"""
+    if not _HIGHLIGHT_START and not _HIGHLIGHT_END:
+        # termcolor decided against colour (not a tty, NO_COLOR, ...)
+        yield from lines
+        return
+    sub = _KEYWORD_RE.sub
     for line in lines:
-        for kw in KEYWORDS:
-            if kw in line.lower():
-                line = line.replace(kw, colored(kw, "red", attrs=["bold"]))
-        highlighted_lines.append(line)
-    return highlighted_lines
+        yield sub(_KEYWORD_REPL, line)
@@ -0,0 +1,385 @@
+import bisect
+import mmap
+import os
+import pickle
+import re
+import struct
+import tempfile
+from array import array
+
+from untils.analysis import MIN_SHARD_SIZE, SCAN_CHUNK_SIZE, SHARDS_PER_WORKER, find_shards, process_pool
+from untils.cache import INDEX_DIR, ResultCache
+
+# Bump when the on-disk layout or tokenisation changes
+INDEX_VERSION = 'line-index-2'
+MAX_INDEX_BYTES = 4 * 1024 * 1024 * 1024
+# Tokens are lowercased runs of ASCII letters and underscores; digits split
+# them, so counters, timestamps and hashes do not bloat the vocabulary
+MIN_TOKEN = 3
+MAX_TOKEN = 64
+# Offset of every Nth line start is kept to find lines by number
+SAMPLE_LINES = 64
+
+_MAGIC = b'ELSIDX1\0'
+_TOKEN_RE = re.compile(rb"[a-z_]+")
+_LONG_TOKEN_RE = re.compile(rb"[a-z_]{%d,}" % (MAX_TOKEN + 1))
+_HEADER = struct.Struct('<Q')
+
+
+def _tokens(line_lower):
+    return {tok for tok in _TOKEN_RE.findall(line_lower) if MIN_TOKEN <= len(tok) <= MAX_TOKEN}
+
+
+def _index_range(buf, start, end, first_line=1):
+    """Postings, line samples and lines with over-long tokens for ``buf[start:end]``;
+    lines numbered from ``first_line``"""
+    postings = {}
+    samples = array('Q')
+    long_lines = array('I')
+    line_num = first_line
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = buf.find(b'\n', min(chunk_start + SCAN_CHUNK_SIZE, end) - 1, end) + 1 or end
+        lines = buf[chunk_start:chunk_end].lower().split(b'\n')
+        if lines[-1] == b'':
+            # Chunks end on a newline; nothing follows it
+            lines.pop()
+        line_start = chunk_start
+        for line in lines:
+            if (line_num - 1) % SAMPLE_LINES == 0:
+                samples.append(line_start)
+            for tok in _tokens(line):
+                posting = postings.get(tok)
+                if posting is None:
+                    posting = postings[tok] = array('I')
+                posting.append(line_num)
+            if _LONG_TOKEN_RE.search(line):
+                long_lines.append(line_num)
+            line_start += len(line) + 1
+            line_num += 1
+        chunk_start = chunk_end
+    return line_num - first_line, postings, samples, long_lines
+
+
+def _index_shard(args):
+    path, start, end, first_line = args
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _index_range(mm, start, end, first_line)
+
+
+def _count_lines(path, start, end):
+    count = 0
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(SCAN_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            count += block.count(b'\n')
+            remaining -= len(block)
+    return count
+
+
+class LineIndex:
+    """Inverted index from tokens to the numbers of the lines containing them.
+
+    Queries are case-insensitive (ASCII) substring searches.  Tokens of the
+    query narrow the candidate lines through their posting lists; a token
+    cut off by the start or end of the query matches every indexed token
+    that contains it, and lines with a token longer than MAX_TOKEN (which
+    is not indexed) are always candidates for it.  Candidates are then
+    read back from the log and checked, so results are exact.  Queries
+    without a usable token fall back to scanning the file.
+
+    Lines are split on ``\\n`` only and numbered from 1.
+    """
+
+    def __init__(self, path, size, line_count, samples, tokens, starts, counts, blob, long_lines):
+        self.path = os.path.abspath(path) if path is not None else None
+        self.size = size
+        self.line_count = line_count
+        self.samples = samples
+        self.long_lines = long_lines
+        self.tokens = tokens
+        self.starts = starts
+        self.counts = counts
+        self.blob = blob
+        self._file = None
+        # Mapped index file behind ``blob`` when loaded from disk
+        self._map = None
+
+    @classmethod
+    def build(cls, path, workers=1, min_shard_size=MIN_SHARD_SIZE):
+        """Index a log, sharding the work across processes if asked"""
+        size = os.path.getsize(path)
+        workers = max(1, int(workers or 1))
+        shards = find_shards(path, workers * SHARDS_PER_WORKER, min_shard_size) if workers > 1 else [(0, size)]
+
+        if len(shards) == 1:
+            with open(path, 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+                try:
+                    parts = [_index_range(data, 0, size)]
+                finally:
+                    if size:
+                        data.close()
+        else:
+            # Line numbers of each shard are known up front from a newline count
+            args = []
+            first_line = 1
+            for start, end in shards:
+                args.append((path, start, end, first_line))
+                first_line += _count_lines(path, start, end)
+            with process_pool(min(workers, len(shards))) as pool:
+                parts = list(pool.map(_index_shard, args))
+
+        line_count = 0
+        postings = {}
+        samples = array('Q')
+        long_lines = array('I')
+        for part_lines, part_postings, part_samples, part_long_lines in parts:
+            line_count += part_lines
+            samples.extend(part_samples)
+            long_lines.extend(part_long_lines)
+            for tok, posting in part_postings.items():
+                merged = postings.get(tok)
+                if merged is None:
+                    postings[tok] = posting
+                else:
+                    merged.extend(posting)
+
+        tokens = sorted(postings)
+        starts = array('Q')
+        counts = array('Q')
+        position = 0
+        for tok in tokens:
+            starts.append(position)
+            counts.append(len(postings[tok]))
+            position += len(postings[tok])
+        blob = b''.join(postings[tok].tobytes() for tok in tokens)
+        return cls(path, size, line_count, samples, tokens, starts, counts, blob, long_lines)
+
+    def save(self, f):
+        """Write the index to a binary file object"""
+        directory = pickle.dumps({
+            "size": self.size,
+            "line_count": self.line_count,
+            "samples": self.samples,
+            "long_lines": self.long_lines,
+            "tokens": self.tokens,
+            "starts": self.starts,
+            "counts": self.counts,
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(_MAGIC)
+        f.write(_HEADER.pack(len(directory)))
+        f.write(directory)
+        f.write(self.blob)
+
+    @classmethod
+    def load(cls, filename, path=None):
+        """Open a saved index; posting lists stay on disk and are mapped on demand"""
+        with open(filename, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{filename} is not a line index")
+            (length,) = _HEADER.unpack(f.read(_HEADER.size))
+            directory = pickle.loads(f.read(length))
+            blob_start = f.tell()
+            mapped = None
+            blob = b''
+            if directory["tokens"]:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                blob = memoryview(mapped)[blob_start:]
+        index = cls(path, directory["size"], directory["line_count"], directory["samples"],
+                    directory["tokens"], directory["starts"], directory["counts"], blob,
+                    directory["long_lines"])
+        index._map = mapped
+        return index
+
+    def posting(self, token):
+        """Sorted line numbers containing ``token`` (bytes)"""
+        i = bisect.bisect_left(self.tokens, token)
+        if i == len(self.tokens) or self.tokens[i] != token:
+            return array('I')
+        return self._posting_at(i)
+
+    def _posting_at(self, i):
+        itemsize = array('I').itemsize
+        start = self.starts[i] * itemsize
+        posting = array('I')
+        posting.frombytes(self.blob[start:start + self.counts[i] * itemsize])
+        return posting
+
+    def _matching_tokens(self, token, open_left, open_right):
+        """Indexes of indexed tokens a query token can stand for"""
+        if not open_left and not open_right:
+            i = bisect.bisect_left(self.tokens, token)
+            return [i] if i < len(self.tokens) and self.tokens[i] == token else []
+        if not open_left:
+            # Cut off at the end of the query: a prefix of an indexed token
+            i = bisect.bisect_left(self.tokens, token)
+            j = i
+            while j < len(self.tokens) and self.tokens[j].startswith(token):
+                j += 1
+            return list(range(i, j))
+        if not open_right:
+            return [i for i, tok in enumerate(self.tokens) if tok.endswith(token)]
+        return [i for i, tok in enumerate(self.tokens) if token in tok]
+
+    def candidates(self, query):
+        """Sorted candidate line numbers for a query, or None if it cannot be narrowed"""
+        needle = query.encode('utf-8', errors='ignore').lower()
+        groups = []
+        for match in _TOKEN_RE.finditer(needle):
+            token = match.group()
+            if len(token) < MIN_TOKEN or len(token) > MAX_TOKEN:
+                continue
+            open_left, open_right = match.start() == 0, match.end() == len(needle)
+            matches = self._matching_tokens(token, open_left, open_right)
+            # A token cut off by the query may be part of one too long to index
+            unindexed = self.long_lines if open_left or open_right else array('I')
+            if not matches and not unindexed:
+                return []
+            groups.append((matches, unindexed))
+        if not groups:
+            return None
+
+        # Cheapest group first, so the running set only ever shrinks
+        groups.sort(key=lambda group: sum(self.counts[i] for i in group[0]) + len(group[1]))
+        lines = None
+        for group, unindexed in groups:
+            found = set(unindexed)
+            for i in group:
+                found.update(self._posting_at(i))
+            lines = found if lines is None else lines & found
+            if not lines:
+                return []
+        return sorted(lines)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    def _read_lines(self, line_nums):
+        """Yield ``(line_num, raw_bytes)`` for sorted line numbers"""
+        f = self._open()
+        block_no = None
+        block = []
+        for line_num in line_nums:
+            if (line_num - 1) // SAMPLE_LINES != block_no:
+                block_no = (line_num - 1) // SAMPLE_LINES
+                f.seek(self.samples[block_no])
+                block = [f.readline() for _ in range(SAMPLE_LINES)]
+            yield line_num, block[(line_num - 1) % SAMPLE_LINES]
+
+    def _scan(self, needle):
+        """Yield ``(line_num, raw_bytes)`` of every line containing ``needle``"""
+        f = self._open()
+        f.seek(0)
+        line_num = 1
+        carry = b''
+        while True:
+            data = f.read(SCAN_CHUNK_SIZE)
+            if not data:
+                break
+            data = carry + data
+            cut = data.rfind(b'\n') + 1
+            data, carry = data[:cut], data[cut:]
+            lowered = data.lower()
+            pos = 0
+            while True:
+                hit = lowered.find(needle, pos)
+                if hit < 0:
+                    break
+                line_start = lowered.rfind(b'\n', 0, hit) + 1
+                line_end = lowered.find(b'\n', hit) + 1
+                line_num += data.count(b'\n', pos, line_start)
+                yield line_num, data[line_start:line_end]
+                line_num += 1
+                pos = line_end
+            line_num += data.count(b'\n', pos)
+        if carry and needle in carry.lower():
+            yield line_num, carry
+
+    def search(self, query, limit=None):
+        """Yield ``(line_num, line)`` of lines containing ``query``, in order"""
+        needle = query.encode('utf-8', errors='ignore').lower()
+        if not needle:
+            return
+        candidates = self.candidates(query)
+        if candidates is None:
+            lines = self._scan(needle)
+        else:
+            lines = ((n, raw) for n, raw in self._read_lines(candidates) if needle in raw.lower())
+        found = 0
+        for line_num, raw in lines:
+            yield line_num, raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+            found += 1
+            if limit is not None and found >= limit:
+                return
+
+    def close(self):
+        """Close the log and unmap the index file (which stays locked on Windows while mapped)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._map is not None:
+            self.blob.release()
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class IndexStore(ResultCache):
+    """Saved line indexes, keyed and evicted like the result cache"""
+
+    suffix = '.idx'
+
+    def __init__(self, directory=INDEX_DIR, max_bytes=MAX_INDEX_BYTES):
+        super().__init__(directory, max_bytes)
+
+    def get(self, key):
+        entry = self._entry_path(key)
+        try:
+            index = LineIndex.load(entry)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._remove(entry)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return index
+
+    def put(self, key, index):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                index.save(f)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+
+def load_index(path, store=None, workers=1):
+    """Return the line index of a log, building (and storing) it if needed"""
+    if store is None:
+        return LineIndex.build(path, workers)
+    key = store.key_for(path, INDEX_VERSION)
+    index = store.get(key)
+    if index is None:
+        index = LineIndex.build(path, workers)
+        store.put(key, index)
+    index.path = os.path.abspath(path)
+    return index
@@ -1,3 +1,34 @@
+import io
+import sys
 
-def parse_logs(content):
-    return content.splitlines()
+from untils.compression import detect_compression, open_compressed
+
+# Read buffer for log files; lines are still yielded one at a time
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def open_log(path):
+    """Open a log for streaming text reads; ``-`` is stdin.
+
+    gzip, zstd, xz and bz2 files are decompressed on the fly.
+    """
+    if path == "-":
+        return sys.stdin
+    kind = detect_compression(path)
+    if kind is not None:
+        return io.TextIOWrapper(io.BufferedReader(open_compressed(path, kind), READ_CHUNK_SIZE),
+                                errors='ignore')
+    return open(path, 'r', errors='ignore', buffering=READ_CHUNK_SIZE)
+
+
+def parse_logs(source):
+    """Lazily yield log lines from a string or a text stream.
+
+    Lines are split exactly like ``str.splitlines()`` on the whole content,
+    but a stream is consumed chunk by chunk, so memory stays flat and the
+    first lines come out before the input is complete.
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    for line in source:
+        yield from line.splitlines()
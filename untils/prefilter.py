@@ -0,0 +1,162 @@
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants  # Python 3.11+
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+def _best(requirements):
+    """Pick the requirement whose shortest alternative is longest"""
+    return max(requirements, key=lambda alts: (min(len(a) for a in alts), -len(alts)))
+
+
+def _requirements(items):
+    """Collect literal sets of which at least one member must occur in any match"""
+    requirements = []
+    run = []
+
+    def flush():
+        if run:
+            requirements.append({"".join(run)})
+            run.clear()
+
+    for op, av in items:
+        if op is sre_constants.LITERAL and chr(av).isascii():
+            run.append(chr(av).lower())
+            continue
+
+        flush()
+        if op is sre_constants.SUBPATTERN:
+            requirements.extend(_requirements(av[-1]))
+        elif op in _REPEATS and av[0] >= 1:
+            requirements.extend(_requirements(av[2]))
+        elif op is sre_constants.BRANCH:
+            alternatives = set()
+            for branch in av[1]:
+                branch_requirements = _requirements(branch)
+                if not branch_requirements:
+                    alternatives = None
+                    break
+                alternatives |= _best(branch_requirements)
+            if alternatives:
+                requirements.append(alternatives)
+    flush()
+    return requirements
+
+
+# pattern -> literals (or None); rule packs seed it from their compiled cache
+_required = {}
+
+
+def required_literals(pattern):
+    """Lowercase literals, one of which occurs in every line the pattern matches.
+
+    Returns None when the pattern has no usable literal (e.g. ``\\d+``), in
+    which case it cannot be prefiltered.
+    """
+    if pattern in _required:
+        return _required[pattern]
+    requirements = _requirements(sre_parse.parse(pattern, re.IGNORECASE))
+    literals = _best(requirements) if requirements else None
+    _required[pattern] = literals
+    return literals
+
+
+def seed_required_literals(required):
+    """Reuse ``{pattern: required_literals(pattern)}`` computed earlier (e.g. unpickled)"""
+    _required.update(required)
+
+
+def minimal_literals(literals):
+    """Drop literals that contain another literal of the set"""
+    literals = set(literals)
+    return sorted(lit for lit in literals
+                  if not any(other != lit and other in lit for other in literals))
+
+
+def _trie_regex(literals):
+    """Build a prefix-factored alternation so the regex engine walks a trie"""
+    trie = {}
+    for literal in literals:
+        node = trie
+        for ch in literal:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        if "" in node:
+            # A literal ends here, anything longer is redundant
+            return ""
+        branches = []
+        chars = []
+        for ch in sorted(node):
+            sub = build(node[ch])
+            if sub:
+                branches.append(re.escape(ch) + sub)
+            else:
+                chars.append(re.escape(ch))
+        if len(chars) == 1:
+            branches.append(chars[0])
+        elif chars:
+            branches.append("[" + "".join(chars) + "]")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return build(trie)
+
+
+class LiteralPrefilter:
+    """Multi-literal gate that rejects lines which cannot match any rule.
+
+    Works on lowercased ASCII text; all literals are searched in one scan of
+    a trie-shaped regex.  ``lines_checked`` and ``lines_skipped`` count the
+    calls to :meth:`may_match` and the lines it rejected.
+    """
+
+    def __init__(self, literals):
+        self.literals = minimal_literals(literals)
+        self.source = _trie_regex(self.literals) if self.literals else None
+        self._regex = re.compile(self.source) if self.source is not None else None
+        self.lines_checked = 0
+        self.lines_skipped = 0
+
+    @classmethod
+    def from_rules(cls, keywords, patterns):
+        """Build from plain keywords and regex sources; None if a regex has no literal"""
+        literals = set(kw.lower() for kw in keywords)
+        for pattern in patterns:
+            required = required_literals(pattern)
+            if required is None:
+                return None
+            literals |= required
+        return cls(literals)
+
+    def may_match(self, line_lower):
+        """False when no literal occurs in the (lowercased, ASCII) line"""
+        self.lines_checked += 1
+        if self._regex is not None and self._regex.search(line_lower):
+            return True
+        self.lines_skipped += 1
+        return False
+
+    def bytes_regex(self, non_ascii=False):
+        """Compile the gate for lowercased bytes (``bytes.lower()`` folds ASCII only).
+
+        With ``non_ascii`` every byte >= 0x80 is a hit too, so lines that
+        need Unicode case folding are left to the exact str path.
+        """
+        source = self.source.encode('ascii') if self.source is not None else b"(?!)"
+        if non_ascii:
+            source += rb"|[\x80-\xff]"
+        return re.compile(source)
+
+    def reset_counters(self):
+        self.lines_checked = 0
+        self.lines_skipped = 0
@@ -0,0 +1,360 @@
+import re
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants  # Python 3.11+
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+_MAXREPEAT = sre_constants.MAXREPEAT
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+_AT_SOURCES = {
+    sre_constants.AT_BEGINNING: "^",
+    sre_constants.AT_BEGINNING_STRING: r"\A",
+    sre_constants.AT_END: "$",
+    sre_constants.AT_END_STRING: r"\Z",
+    sre_constants.AT_BOUNDARY: r"\b",
+    sre_constants.AT_NON_BOUNDARY: r"\B",
+}
+_CATEGORY_SOURCES = {
+    sre_constants.CATEGORY_DIGIT: r"\d",
+    sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+    sre_constants.CATEGORY_SPACE: r"\s",
+    sre_constants.CATEGORY_NOT_SPACE: r"\S",
+    sre_constants.CATEGORY_WORD: r"\w",
+    sre_constants.CATEGORY_NOT_WORD: r"\W",
+}
+
+# Findings, worst first
+CATASTROPHIC = "catastrophic"
+SLOW = "slow"
+NOTE = "note"
+
+# Character sets for the ambiguity check: ASCII characters, with non-ASCII
+# ones stood in for by one digit, space, word and other character
+_NON_ASCII_KINDS = (
+    ("\u0660", re.compile(r"\d")),
+    ("\u00a0", re.compile(r"\s")),
+    ("\u00e9", re.compile(r"\w")),
+    ("\u00a7", re.compile(r"[^\w\s]")),
+)
+_NON_ASCII = frozenset(stand_in for stand_in, _ in _NON_ASCII_KINDS)
+_ALL_CHARS = frozenset(chr(code) for code in range(128)) | _NON_ASCII
+_CATEGORY_CHARS = {
+    category: frozenset(ch for ch in _ALL_CHARS if re.match(source, ch))
+    for category, source in _CATEGORY_SOURCES.items()
+}
+
+
+def _is_wildcard_repeat(op, av):
+    """``.*`` / ``.*?``: a repeat of any character with no lower bound"""
+    return (op in _REPEATS and av[0] == 0 and av[1] == _MAXREPEAT
+            and list(av[2]) == [(sre_constants.ANY, None)])
+
+
+def _unbounded(op, av):
+    return op in _REPEATS and av[1] == _MAXREPEAT
+
+
+def _contains_unbounded(items):
+    for op, av in items:
+        if _unbounded(op, av):
+            return True
+        if op is sre_constants.SUBPATTERN and _contains_unbounded(av[-1]):
+            return True
+        if op in _REPEATS and _contains_unbounded(av[2]):
+            return True
+        if op is sre_constants.BRANCH and any(_contains_unbounded(b) for b in av[1]):
+            return True
+    return False
+
+
+def _strip_wildcard_ends(items):
+    """Leading and trailing ``.*`` never change whether a search finds a match"""
+    items = list(items)
+    stripped = 0
+    while items and _is_wildcard_repeat(*items[0]):
+        items.pop(0)
+        stripped += 1
+    while items and _is_wildcard_repeat(*items[-1]):
+        items.pop()
+        stripped += 1
+    return items, stripped
+
+
+def _lower_char(code):
+    ch = chr(code)
+    return ch.lower() if ch.isascii() else None
+
+
+def _class_source(items):
+    parts = []
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            parts.insert(0, "^")
+        elif op is sre_constants.LITERAL:
+            ch = _lower_char(av)
+            if ch is None:
+                return None
+            parts.append(re.escape(ch))
+        elif op is sre_constants.RANGE:
+            low, high = chr(av[0]), chr(av[1])
+            if not (low.isascii() and high.isascii()):
+                return None
+            if low.isalpha() or high.isalpha():
+                # Only whole-case letter ranges survive lowercasing unchanged
+                if not (low.isupper() == high.isupper() and low.isalpha() and high.isalpha()):
+                    return None
+                low, high = low.lower(), high.lower()
+            parts.append(f"{re.escape(low)}-{re.escape(high)}")
+        elif op is sre_constants.CATEGORY and av in _CATEGORY_SOURCES:
+            parts.append(_CATEGORY_SOURCES[av])
+        else:
+            return None
+    return "[" + "".join(parts) + "]"
+
+
+def _lower_source(items):
+    """Case-sensitive source that matches ``line.lower()`` of an ASCII line
+    exactly when ``items`` match the line with IGNORECASE; None if unsupported.
+
+    Compiled with re.ASCII, so ``\\s`` misses \\x1c-\\x1f: callers keep
+    lines containing those on the Unicode patterns.
+    """
+    parts = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            ch = _lower_char(av)
+            if ch is None:
+                return None
+            parts.append(re.escape(ch))
+        elif op is sre_constants.ANY:
+            parts.append(".")
+        elif op is sre_constants.AT and av in _AT_SOURCES:
+            parts.append(_AT_SOURCES[av])
+        elif op is sre_constants.IN and len(av) == 1 and av[0][0] is sre_constants.CATEGORY:
+            source = _CATEGORY_SOURCES.get(av[0][1])
+            if source is None:
+                return None
+            parts.append(source)
+        elif op is sre_constants.IN:
+            source = _class_source(av)
+            if source is None:
+                return None
+            parts.append(source)
+        elif op is sre_constants.CATEGORY and av in _CATEGORY_SOURCES:
+            parts.append(_CATEGORY_SOURCES[av])
+        elif op is sre_constants.SUBPATTERN:
+            if av[1] or av[2]:
+                return None  # inline flags
+            source = _lower_source(av[-1])
+            if source is None:
+                return None
+            parts.append(f"(?:{source})")
+        elif op is sre_constants.BRANCH:
+            branches = [_lower_source(branch) for branch in av[1]]
+            if any(branch is None for branch in branches):
+                return None
+            parts.append("(?:" + "|".join(branches) + ")")
+        elif op in _REPEATS:
+            low, high, body = av
+            source = _lower_source(body)
+            if source is None:
+                return None
+            if high == _MAXREPEAT:
+                quantifier = {0: "*", 1: "+"}.get(low, f"{{{low},}}")
+            elif (low, high) == (0, 1):
+                quantifier = "?"
+            else:
+                quantifier = f"{{{low},{high}}}"
+            if op is sre_constants.MIN_REPEAT:
+                quantifier += "?"
+            elif op is not sre_constants.MAX_REPEAT:
+                quantifier += "+"
+            # Single items need no group
+            single = len(body) == 1 and body[0][0] is not sre_constants.BRANCH
+            parts.append(f"{source}{quantifier}" if single else f"(?:{source}){quantifier}")
+        else:
+            return None
+    return "".join(parts)
+
+
+def _literal_chain(items):
+    """``('a', 'b')`` for ``a.*b``: literals that must appear in this order"""
+    chain = []
+    run = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            ch = _lower_char(av)
+            if ch is None:
+                return None
+            run.append(ch)
+        elif _is_wildcard_repeat(op, av):
+            if run:
+                chain.append("".join(run))
+                run = []
+        else:
+            return None
+    if run:
+        chain.append("".join(run))
+    return tuple(chain) or None
+
+
+def _literal_chars(code):
+    ch = chr(code)
+    if ch.isascii():
+        return {ch.lower(), ch.upper()}
+    return {stand_in for stand_in, kind in _NON_ASCII_KINDS if kind.match(ch)}
+
+
+def _class_chars(items):
+    chars = set()
+    negate = False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            chars |= _literal_chars(av)
+        elif op is sre_constants.RANGE:
+            for code in range(av[0], min(av[1], 127) + 1):
+                chars |= _literal_chars(code)
+            if av[1] > 127:
+                chars.update(_NON_ASCII)
+        elif op is sre_constants.CATEGORY and av in _CATEGORY_CHARS:
+            chars |= _CATEGORY_CHARS[av]
+        else:
+            return _ALL_CHARS
+    return _ALL_CHARS - chars if negate else frozenset(chars)
+
+
+def _item_chars(op, av):
+    """Characters one item can consume (all of them when unsure)"""
+    if op is sre_constants.LITERAL:
+        return frozenset(_literal_chars(av))
+    if op is sre_constants.NOT_LITERAL:
+        return _ALL_CHARS - _literal_chars(av)
+    if op is sre_constants.ANY:
+        return _ALL_CHARS - {"\n"}
+    if op is sre_constants.IN:
+        return _class_chars(av)
+    if op is sre_constants.CATEGORY and av in _CATEGORY_CHARS:
+        return _CATEGORY_CHARS[av]
+    if op in _REPEATS and len(av[2]) == 1:
+        return _item_chars(*av[2][0])
+    return _ALL_CHARS
+
+
+def _ambiguous_repeats(items):
+    """Unbounded repeats that each multiply the backtracking of a failing search.
+
+    A repeat counts unless it is separated from the previous one: their
+    characters do not overlap, or an item between them takes characters the
+    later repeat cannot, so each of its runs starts at a distinct place
+    (``.*:\\s*\\d+`` is linear per start, ``a.*b.*c`` is not).
+    """
+    count = 0
+    previous = None
+    between = []
+    for op, av in items:
+        if _unbounded(op, av):
+            chars = _item_chars(op, av)
+            if previous is None or (chars & previous and all(
+                    item & previous and item & chars for item in between)):
+                count += 1
+            previous, between = chars, []
+        elif previous is not None and op is not sre_constants.AT:
+            # Optional items never separate anything
+            if not (op in _REPEATS and av[0] == 0):
+                between.append(_item_chars(op, av))
+    return count
+
+
+def _lint(items, top_level=True):
+    findings = []
+    for op, av in items:
+        if op in _REPEATS and av[1] == _MAXREPEAT and _contains_unbounded(av[2]):
+            findings.append((CATASTROPHIC, "nested unbounded repeats can backtrack exponentially"))
+        if op is sre_constants.SUBPATTERN:
+            findings.extend(_lint(av[-1], False))
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                findings.extend(_lint(branch, False))
+        elif op in _REPEATS:
+            findings.extend(_lint(av[2], False))
+    if top_level:
+        unbounded = _ambiguous_repeats(items)
+        if unbounded >= 2:
+            findings.append((SLOW, f"{unbounded} overlapping unbounded repeats: up to O(n^{unbounded}) "
+                                   f"backtracking on long lines that almost match"))
+    return findings
+
+
+class PatternAnalysis:
+    """Lint findings and faster equivalent forms of one IGNORECASE rule.
+
+    ``lowered`` is a case-sensitive regex for ``line.lower()`` that gives
+    the same answer as the rule on ASCII lines (None if the rule uses
+    something that cannot be translated); ``chain`` is set for rules made
+    only of literals and ``.*``, which an ordered substring check answers in
+    linear time.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        items = list(sre_parse.parse(pattern, re.IGNORECASE))
+        self.findings = _lint(items)
+        core, stripped = _strip_wildcard_ends(items)
+        if stripped:
+            self.findings.append((NOTE, "leading/trailing .* is redundant in a search (removed)"))
+        self.lowered = _lower_source(core) if core else None
+        self.chain = _literal_chain(core) if core else None
+        if self.lowered is None:
+            self.findings.append((NOTE, "kept as an IGNORECASE regex (no case-folded rewrite)"))
+
+    @property
+    def risky(self):
+        return any(kind != NOTE for kind, _ in self.findings)
+
+    @property
+    def rewritten(self):
+        """Human-readable form that runs on ASCII lines"""
+        if self.lowered is not None:
+            return f"/{self.lowered}/ on the lowercased line"
+        return f"/{self.pattern}/i"
+
+    @property
+    def linear(self):
+        """Human-readable linear-time form for over-long lines, or None"""
+        if self.chain is None:
+            return None
+        return "ordered substrings " + " … ".join(repr(literal) for literal in self.chain)
+
+
+# pattern -> PatternAnalysis; rule packs seed it from their compiled cache
+_analyses = {}
+
+
+def analyze_pattern(pattern):
+    analysis = _analyses.get(pattern)
+    if analysis is None:
+        analysis = _analyses[pattern] = PatternAnalysis(pattern)
+    return analysis
+
+
+def seed_analyses(analyses):
+    """Reuse ``{pattern: PatternAnalysis}`` computed earlier (e.g. unpickled)"""
+    _analyses.update(analyses)
+
+
+def ordered_in(text, chain):
+    """True when the literals of ``chain`` occur in ``text`` in order without overlapping"""
+    position = 0
+    for literal in chain:
+        position = text.find(literal, position)
+        if position < 0:
+            return False
+        position += len(literal)
+    return True
@@ -0,0 +1,222 @@
+import heapq
+import os
+from array import array
+
+# Stored in place of a byte offset when the line text is kept in memory
+NO_OFFSET = -1
+
+
+class LevelView:
+    """Read-only sequence of the issues of one level in a :class:`ResultStore`.
+
+    It indexes the store through the level's offset column, so it never
+    copies issues and keeps growing as the store does.
+    """
+
+    def __init__(self, store, offsets):
+        self.store = store
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i):
+        return self.store[self.offsets[i]]
+
+    def __iter__(self):
+        return (self.store[offset] for offset in self.offsets)
+
+
+class ResultStore:
+    """Compact, columnar issue container with a per-level index.
+
+    Issues go in and come out as the usual dicts, but are kept as parallel
+    ``array`` columns: line number, byte offset of the line in ``path``,
+    interned level id and interned context id, about 27 bytes per issue
+    including the index.  Icon and message are looked up by level id and
+    the line text is read back from the file by offset when an issue is
+    accessed; issues without an offset (or a store without a ``path``, e.g.
+    for a log that may be rotated) keep their text in memory instead.
+    Context lines captured with a :class:`untils.context.ContextWindow` are
+    kept in memory for the issues that have them.
+
+    Each level also keeps an ``array`` of positions into the store, so
+    filtering by level and counting are O(1).
+    """
+
+    def __init__(self, path=None, issues=()):
+        self.path = os.path.abspath(path) if path is not None else None
+        self.line_nums = array('Q')
+        self.offsets = array('q')
+        self.level_ids = array('H')
+        self.context_ids = array('B')
+        self.lines = {}
+        # position -> (context_before, context_after)
+        self.context_lines = {}
+        # Interned (level, icon, message) and context labels
+        self.levels = []
+        self.contexts = []
+        self._level_ids = {}
+        self._context_ids = {}
+        self.index = {}
+        self.max_line_num = 0
+        # Number of lines analysed to produce these issues, when known
+        self.line_count = None
+        self._file = None
+        self.extend(issues)
+
+    def _intern_level(self, level, icon, message):
+        key = (level, icon, message)
+        level_id = self._level_ids.get(key)
+        if level_id is None:
+            level_id = self._level_ids[key] = len(self.levels)
+            self.levels.append(key)
+        return level_id
+
+    def _intern_context(self, context):
+        context_id = self._context_ids.get(context)
+        if context_id is None:
+            context_id = self._context_ids[context] = len(self.contexts)
+            self.contexts.append(context)
+        return context_id
+
+    def _positions(self, level):
+        positions = self.index.get(level)
+        if positions is None:
+            positions = self.index[level] = array('Q')
+        return positions
+
+    def append(self, issue):
+        position = len(self.line_nums)
+        offset = issue.get("offset") if self.path is not None else None
+        if offset is None:
+            offset = NO_OFFSET
+            self.lines[position] = issue["line"]
+        if "context_before" in issue:
+            self.context_lines[position] = (issue["context_before"], issue["context_after"])
+        self.line_nums.append(issue["line_num"])
+        self.offsets.append(offset)
+        self.level_ids.append(self._intern_level(issue["level"], issue["icon"], issue["message"]))
+        self.context_ids.append(self._intern_context(issue["context"]))
+        self._positions(issue["level"]).append(position)
+        if issue["line_num"] > self.max_line_num:
+            self.max_line_num = issue["line_num"]
+
+    def extend(self, issues):
+        # A store without a path keeps all its lines in memory, so its
+        # columns fit any store
+        if isinstance(issues, ResultStore) and issues.path in (self.path, None):
+            self._extend_store(issues)
+            return
+        for issue in issues:
+            self.append(issue)
+
+    def _extend_store(self, other):
+        """Append another store of the same file column by column"""
+        base = len(self.line_nums)
+        level_map = [self._intern_level(*key) for key in other.levels]
+        context_map = [self._intern_context(context) for context in other.contexts]
+
+        self.line_nums.extend(other.line_nums)
+        self.offsets.extend(other.offsets)
+        if level_map == list(range(len(level_map))):
+            self.level_ids.extend(other.level_ids)
+        else:
+            self.level_ids.extend(level_map[i] for i in other.level_ids)
+        if context_map == list(range(len(context_map))):
+            self.context_ids.extend(other.context_ids)
+        else:
+            self.context_ids.extend(context_map[i] for i in other.context_ids)
+        for position, line in other.lines.items():
+            self.lines[base + position] = line
+        for position, block in other.context_lines.items():
+            self.context_lines[base + position] = block
+        for level, positions in other.index.items():
+            mine = self._positions(level)
+            if base:
+                mine.extend(base + position for position in positions)
+            else:
+                mine.extend(positions)
+        self.max_line_num = max(self.max_line_num, other.max_line_num)
+
+    def clear(self):
+        self.close()
+        self.__init__(self.path)
+
+    def count(self, level):
+        positions = self.index.get(level)
+        return len(positions) if positions is not None else 0
+
+    def counts(self):
+        """Issues per level, in order of first appearance"""
+        return {level: len(positions) for level, positions in self.index.items() if positions}
+
+    def filtered(self, level=None):
+        """The whole store for None/"ALL", else a live view of one level"""
+        if level is None or level == "ALL":
+            return self
+        # Registered now so the view picks up issues that arrive later
+        return LevelView(self, self._positions(level))
+
+    def select(self, levels):
+        """Issues of any of ``levels``, in store order (a snapshot, not live)"""
+        columns = [self.index[level] for level in levels if self.index.get(level)]
+        if len(columns) == 1:
+            return LevelView(self, columns[0])
+        return LevelView(self, array('Q', heapq.merge(*columns)))
+
+    def line_at(self, position):
+        """Text of the issue's line, read from the file if not kept in memory"""
+        offset = self.offsets[position]
+        if offset == NO_OFFSET:
+            return self.lines[position]
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            self._file.seek(offset)
+            data = self._file.readline()
+        except OSError:
+            return ""
+        # Same decoding the byte scanner applied when the issue was found
+        return data.decode('utf-8', errors='ignore').strip()
+
+    def relocate(self, path):
+        """Read line text from ``path`` from now on, e.g. a copy of the analysed file"""
+        if self.path is not None:
+            self.close()
+            self.path = os.path.abspath(path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_file"] = None
+        return state
+
+    def __len__(self):
+        return len(self.line_nums)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self.line_nums)
+        level, icon, message = self.levels[self.level_ids[position]]
+        offset = self.offsets[position]
+        issue = {
+            "line_num": self.line_nums[position],
+            "line": self.line_at(position),
+            "level": level,
+            "icon": icon,
+            "message": message,
+            "context": self.contexts[self.context_ids[position]],
+            "offset": offset if offset != NO_OFFSET else None,
+        }
+        block = self.context_lines.get(position)
+        if block is not None:
+            issue["context_before"], issue["context_after"] = block
+        return issue
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self.line_nums)))
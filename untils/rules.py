@@ -0,0 +1,244 @@
+import json
+import os
+import re
+import sys
+
+from rom_detection_levels import SEVERITIES
+from untils import APP_DIR
+from untils.prefilter import required_literals, seed_required_literals
+from untils.regexlint import analyze_pattern, seed_analyses
+
+# Packs in here are loaded when no rule files are given explicitly
+RULES_DIR = os.path.join(APP_DIR, 'rules')
+RULE_FILE_SUFFIXES = ('.yaml', '.yml', '.toml', '.json')
+# Part of the compiled-rule cache key; bump when the cached form changes
+COMPILED_RULES_VERSION = 1
+
+DEFAULT_ICON = "🔎"
+DEFAULT_COLOR = "#636e72"
+
+_PACK_FIELDS = {"name", "description", "replace", "disable", "levels", "context"}
+_LEVEL_FIELDS = {"icon", "color", "keywords", "patterns", "message", "severity", "tips", "before"}
+
+
+class RuleFileError(ValueError):
+    """A rule pack that cannot be parsed or does not follow the pack format"""
+
+
+def _parse(path, data):
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise RuleFileError(f"{path}: YAML rule packs need the 'PyYAML' package (pip install pyyaml)")
+        return yaml.safe_load(data)
+    if suffix == '.toml':
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise RuleFileError(f"{path}: TOML rule packs need Python 3.11+ or the 'tomli' package")
+        return tomllib.loads(data.decode('utf-8'))
+    if suffix == '.json':
+        return json.loads(data)
+    raise RuleFileError(f"{path}: unknown rule file type (expected {', '.join(RULE_FILE_SUFFIXES)})")
+
+
+def _strings(path, where, value):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise RuleFileError(f"{path}: {where} must be a list of strings")
+    return value
+
+
+def _check_patterns(path, where, patterns):
+    for pattern in _strings(path, where, patterns):
+        try:
+            re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise RuleFileError(f"{path}: {where}: bad pattern {pattern!r}: {e}")
+    return patterns
+
+
+def validate_pack(path, pack):
+    """Check a parsed pack against the format and return it with defaults filled in"""
+    if not isinstance(pack, dict):
+        raise RuleFileError(f"{path}: a rule pack must be a mapping")
+    unknown = set(pack) - _PACK_FIELDS
+    if unknown:
+        raise RuleFileError(f"{path}: unknown field(s) {', '.join(sorted(unknown))}")
+
+    levels = pack.get("levels") or {}
+    if not isinstance(levels, dict):
+        raise RuleFileError(f"{path}: 'levels' must map level names to rules")
+    for level, spec in levels.items():
+        if not isinstance(spec, dict):
+            raise RuleFileError(f"{path}: level {level} must be a mapping")
+        unknown = set(spec) - _LEVEL_FIELDS
+        if unknown:
+            raise RuleFileError(f"{path}: level {level}: unknown field(s) {', '.join(sorted(unknown))}")
+        _strings(path, f"level {level} keywords", spec.get("keywords", []))
+        _check_patterns(path, f"level {level} patterns", spec.get("patterns", []))
+        _strings(path, f"level {level} tips", spec.get("tips", []))
+        for field in ("icon", "color", "message", "before"):
+            if not isinstance(spec.get(field, ""), str):
+                raise RuleFileError(f"{path}: level {level}: '{field}' must be a string")
+        if spec.get("before") == level:
+            raise RuleFileError(f"{path}: level {level}: 'before' must name another level")
+        if spec.get("severity", SEVERITIES[-1]) not in SEVERITIES:
+            raise RuleFileError(f"{path}: level {level}: severity must be one of {', '.join(SEVERITIES)}")
+
+    context = pack.get("context") or {}
+    if not isinstance(context, dict):
+        raise RuleFileError(f"{path}: 'context' must map level names to patterns")
+    for level, patterns in context.items():
+        _check_patterns(path, f"context {level}", patterns)
+
+    return {
+        "path": path,
+        "name": str(pack.get("name") or os.path.splitext(os.path.basename(path))[0]),
+        "replace": bool(pack.get("replace", False)),
+        "disable": _strings(path, "'disable'", pack.get("disable", [])),
+        "levels": levels,
+        "context": context,
+    }
+
+
+def compile_rule_file(path, data):
+    """Parse, validate and analyse one pack: the form stored in the compiled-rule cache"""
+    try:
+        parsed = _parse(path, data)
+    except RuleFileError:
+        raise
+    except Exception as e:
+        raise RuleFileError(f"{path}: {e}")
+    pack = validate_pack(path, parsed)
+    patterns = [p for spec in pack["levels"].values() for p in spec.get("patterns", [])]
+    patterns += [p for context_patterns in pack["context"].values() for p in context_patterns]
+    return {
+        "pack": pack,
+        "analyses": {p: analyze_pattern(p) for p in patterns},
+        "required_literals": {p: required_literals(p) for p in patterns},
+    }
+
+
+def load_rule_file(path, cache=None):
+    """Load one pack, from ``cache`` (a CompiledRuleCache) when the file is unchanged"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    compiled = key = None
+    if cache is not None:
+        key = cache.key_for(data, f"{COMPILED_RULES_VERSION} {sys.version}")
+        compiled = cache.get(key)
+    if compiled is None:
+        compiled = compile_rule_file(path, data)
+        if cache is not None:
+            cache.put(key, compiled)
+    # Later compiles of these patterns skip parsing them again
+    seed_analyses(compiled["analyses"])
+    seed_required_literals(compiled["required_literals"])
+    pack = dict(compiled["pack"])
+    pack["path"] = path
+    return pack
+
+
+def rule_files(paths):
+    """Expand files and directories (their rule files, sorted) into a list of files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(RULE_FILE_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def default_rule_files():
+    """Rule packs installed in RULES_DIR"""
+    return rule_files([RULES_DIR]) if os.path.isdir(RULES_DIR) else []
+
+
+def _extend_unique(target, items):
+    target.extend(item for item in items if item not in target)
+
+
+def _drop_level(ruleset, level):
+    for part in ruleset.values():
+        part.pop(level, None)
+
+
+def _place_before(levels, level, before, path):
+    if before not in levels:
+        raise RuleFileError(f"{path}: level {level}: 'before' names unknown level {before}")
+    config = levels.pop(level)
+    items = list(levels.items())
+    index = [name for name, _ in items].index(before)
+    items.insert(index, (level, config))
+    levels.clear()
+    levels.update(items)
+
+
+def merge_pack(ruleset, pack):
+    """Apply one validated pack to ``ruleset`` in place.
+
+    A ruleset holds ``levels``, ``context_patterns``, ``messages``,
+    ``severities`` and ``tips``.  Keywords, patterns and tips are added to
+    an existing level, the other fields replace its values; new levels go
+    last (lowest priority) unless ``before`` names the level they should
+    precede.  ``replace: true`` starts from an empty ruleset and
+    ``disable`` removes levels.
+    """
+    path = pack["path"]
+    if pack["replace"]:
+        for part in ruleset.values():
+            part.clear()
+    for level in pack["disable"]:
+        _drop_level(ruleset, level)
+
+    levels = ruleset["levels"]
+    for level, spec in pack["levels"].items():
+        config = levels.get(level)
+        if config is None:
+            if not spec.get("keywords") and not spec.get("patterns"):
+                raise RuleFileError(f"{path}: new level {level} needs keywords or patterns")
+            config = levels[level] = {"color": DEFAULT_COLOR, "icon": DEFAULT_ICON,
+                                      "keywords": [], "patterns": []}
+        else:
+            config = levels[level] = dict(config, keywords=list(config["keywords"]),
+                                          patterns=list(config["patterns"]))
+        for field in ("icon", "color"):
+            if field in spec:
+                config[field] = spec[field]
+        _extend_unique(config["keywords"], [kw.lower() for kw in spec.get("keywords", [])])
+        _extend_unique(config["patterns"], spec.get("patterns", []))
+        if "message" in spec:
+            ruleset["messages"][level] = spec["message"]
+        if "severity" in spec:
+            ruleset["severities"][level] = spec["severity"]
+        if spec.get("tips"):
+            tips = ruleset["tips"][level] = list(ruleset["tips"].get(level, []))
+            _extend_unique(tips, spec["tips"])
+        if spec.get("before"):
+            _place_before(levels, level, spec["before"], path)
+
+    for level, patterns in pack["context"].items():
+        if level not in levels:
+            raise RuleFileError(f"{path}: context level {level} is not a detection level")
+        context = ruleset["context_patterns"][level] = list(ruleset["context_patterns"].get(level, []))
+        _extend_unique(context, patterns)
+
+
+def build_ruleset(base, paths, cache=None):
+    """``base`` with the packs in ``paths`` (files or directories) layered on in order.
+
+    Returns ``(ruleset, files)``; ``base`` is not modified.
+    """
+    ruleset = {part: dict(values) for part, values in base.items()}
+    files = rule_files(paths)
+    for path in files:
+        merge_pack(ruleset, load_rule_file(path, cache))
+    return ruleset, files
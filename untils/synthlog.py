@@ -0,0 +1,166 @@
+import random
+
+# Paths, modules and identifiers the templates draw from
+_SOURCES = (
+    "frameworks/base/core/jni/android_util_Binder.cpp",
+    "frameworks/av/media/libstagefright/MPEG4Writer.cpp",
+    "system/core/init/service.cpp",
+    "hardware/qcom/display/sdm/libs/core/display_base.cpp",
+    "vendor/qcom/opensource/audio-hal/primary-hal/hal/audio_hw.c",
+    "device/xiaomi/sm8250-common/power/Power.cpp",
+    "external/skia/src/core/SkCanvas.cpp",
+    "art/runtime/class_linker.cc",
+)
+_KERNEL_OBJECTS = (
+    "drivers/gpu/drm/msm/msm_drv.o",
+    "drivers/net/wireless/ath/ath11k/core.o",
+    "arch/arm64/kernel/setup.o",
+    "fs/f2fs/super.o",
+    "kernel/sched/core.o",
+    "sound/soc/codecs/wcd938x/wcd938x.o",
+    "drivers/input/touchscreen/goodix/goodix_ts.o",
+)
+_MODULES = ("libbinder", "libstagefright", "libinput", "libhwui", "services.core", "framework-minus-apex",
+            "SystemUI", "Settings", "libaudiohal", "android.hardware.power-service")
+_IDENTIFIERS = ("mLock", "ALOGV", "kMaxBuffers", "sp<IBinder>", "status_t", "mDisplayId", "nullptr_t")
+_TAGS = ("ActivityManager", "PackageManager", "SurfaceFlinger", "init", "vold", "audio_hw_primary", "netd")
+_DOMAINS = ("init", "vendor_init", "hal_power_default", "system_server", "surfaceflinger", "mediaserver")
+_TYPES = ("vendor_file", "sysfs", "proc", "vendor_data_file", "default_prop", "device")
+_PERMS = ("read", "write", "open", "getattr", "search", "ioctl")
+
+
+def _ninja_progress(rng, state):
+    state["step"] += 1
+    step, total = state["step"], state["total"]
+    percent = step * 100 // total
+    module = rng.choice(_MODULES)
+    kind = rng.choice(("target  C++:", "target  C:", "target StaticLib:", "target Java:", "target Strip:"))
+    return f"[{percent:3d}% {step}/{total}] {kind} {module} <= {rng.choice(_SOURCES)}"
+
+
+def _kernel_build(rng, state):
+    return f"  {rng.choice(('CC', 'CC [M]', 'AR', 'LD', 'AS'))}      {rng.choice(_KERNEL_OBJECTS)}"
+
+
+def _logcat(rng, state):
+    state["pid"] += rng.randint(0, 3)
+    return (f"10-17 {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}."
+            f"{rng.randint(0, 999):03d}  {state['pid']}  {state['pid'] + rng.randint(0, 40)} "
+            f"{rng.choice('VDI')} {rng.choice(_TAGS)}: Start proc {rng.randint(1000, 9999)}:"
+            f"com.android.{rng.choice(('phone', 'systemui', 'settings'))}/u0a{rng.randint(10, 300)}")
+
+
+def _repo_fetch(rng, state):
+    done = rng.randint(1, 1134)
+    return f"Fetching: {done * 100 // 1134}% ({done}/1134) platform/{rng.choice(_SOURCES).rsplit('/', 1)[0]}"
+
+
+def _clang_error(rng, state):
+    path = rng.choice(_SOURCES)
+    line, column = rng.randint(10, 4000), rng.randint(1, 80)
+    identifier = rng.choice(_IDENTIFIERS)
+    return [
+        f"In file included from {path}:{line - 3}:",
+        f"{path}:{line}:{column}: error: use of undeclared identifier '{identifier}'",
+        f"    return {identifier}->transact(code, data, reply);",
+        "           ^",
+    ]
+
+
+def _clang_warning(rng, state):
+    path = rng.choice(_SOURCES)
+    return (f"{path}:{rng.randint(10, 4000)}:{rng.randint(1, 80)}: warning: unused variable "
+            f"'{rng.choice(_IDENTIFIERS)}' [-Wunused-variable]")
+
+
+def _avc_denial(rng, state):
+    return (f"[{rng.uniform(1, 900):12.6f}] type=1400 audit({rng.randint(1600000000, 1700000000)}."
+            f"{rng.randint(0, 999):03d}:{rng.randint(1, 9999)}): avc: denied {{ {rng.choice(_PERMS)} }} "
+            f"for pid={rng.randint(1, 32000)} comm=\"{rng.choice(_DOMAINS)}\" name=\"node{rng.randint(0, 99)}\" "
+            f"dev=\"dm-{rng.randint(0, 9)}\" ino={rng.randint(1, 99999)} scontext=u:r:{rng.choice(_DOMAINS)}:s0 "
+            f"tcontext=u:object_r:{rng.choice(_TYPES)}:s0 tclass=file permissive=0")
+
+
+def _make_failure(rng, state):
+    target = rng.choice(_KERNEL_OBJECTS)
+    return [
+        f"make[{rng.randint(1, 4)}]: *** [scripts/Makefile.build:{rng.randint(200, 600)}: {target}] Error 1",
+        f"make: *** [Makefile:{rng.randint(1000, 2000)}: {target.split('/')[0]}] Error 2",
+    ]
+
+
+def _ninja_failure(rng, state):
+    module = rng.choice(_MODULES)
+    return [
+        f"FAILED: out/target/product/generic/obj/SHARED_LIBRARIES/{module}_intermediates/{module}.so",
+        f"/bin/bash -c \"prebuilts/clang/host/linux-x86/clang-r450784d/bin/clang++ -o {module}.so\"",
+        "ninja: build stopped: subcommand failed.",
+    ]
+
+
+def _misc_issue(rng, state):
+    return rng.choice((
+        f"error: Cannot fetch platform/{rng.choice(_MODULES)} from https://android.googlesource.com",
+        f"ld.lld: error: undefined symbol: android::{rng.choice(_IDENTIFIERS)}",
+        f"FAILED: ninja: '{rng.choice(_SOURCES)}', needed by 'out/soong/build.ninja', missing and no known rule to make it",
+        "#### failed to build some targets (10:02 (mm:ss)) ####",
+        f"E/{rng.choice(_TAGS)}( {rng.randint(100, 9999)}): Permission denied opening /dev/{rng.choice(_TYPES)}",
+        "Killed",
+        f"dex2oatd E 10-17 12:00:00 {rng.randint(100, 9999)} Out of memory while compiling",
+    ))
+
+
+# (weight, template) for ordinary build output and for issue lines
+NOISE_TEMPLATES = ((60, _ninja_progress), (20, _kernel_build), (15, _logcat), (5, _repo_fetch))
+ISSUE_TEMPLATES = ((25, _clang_error), (25, _clang_warning), (20, _avc_denial), (10, _make_failure),
+                   (10, _ninja_failure), (10, _misc_issue))
+
+
+def _picker(rng, templates):
+    weights = [weight for weight, _ in templates]
+    functions = [template for _, template in templates]
+    return lambda: rng.choices(functions, weights)[0]
+
+
+def generate_lines(density=0.02, seed=0):
+    """Endless synthetic AOSP/kernel build log, one line at a time.
+
+    About ``density`` of the entries are issues (clang errors and warnings,
+    avc denials, ``make: ***`` and ninja ``FAILED:`` blocks, ...), the rest
+    ninja progress, kernel ``CC``/``LD`` lines, logcat and repo output.  The
+    same seed always yields the same log.
+    """
+    rng = random.Random(seed)
+    state = {"step": 0, "total": 120000, "pid": 1000}
+    noise = _picker(rng, NOISE_TEMPLATES)
+    issue = _picker(rng, ISSUE_TEMPLATES)
+    while True:
+        if state["step"] >= state["total"]:
+            state["step"] = 0
+        template = issue() if rng.random() < density else noise()
+        lines = template(rng, state)
+        if isinstance(lines, str):
+            yield lines
+        else:
+            yield from lines
+
+
+def write_log(f, size, density=0.02, seed=0):
+    """Write at least ``size`` bytes of synthetic log to binary file ``f``.
+
+    Returns ``(bytes_written, line_count)``.
+    """
+    written = 0
+    line_count = 0
+    batch = []
+    for line in generate_lines(density, seed):
+        batch.append(line)
+        if len(batch) == 4096:
+            data = ("\n".join(batch) + "\n").encode('utf-8')
+            f.write(data)
+            written += len(data)
+            line_count += len(batch)
+            batch = []
+            if written >= size:
+                break
+    return written, line_count
@@ -0,0 +1,40 @@
+import queue
+import threading
+
+from untils.analysis import AnalysisCancelled
+
+
+class AnalysisWorker(threading.Thread):
+    """Run an analysis job off the UI thread and report through a queue.
+
+    ``job(progress, cancel)`` runs in the thread with a progress callback of
+    the ``analyze_file`` kind and a ``threading.Event``.  Everything it
+    reports lands on ``messages`` as ``(kind, payload, position)`` tuples for
+    the UI to drain on a timer:
+
+    * ``("batch", issues, position)`` for every finished range
+    * ``("done", None, None)``, ``("cancelled", None, None)`` or
+      ``("error", message, None)`` once, at the end
+    """
+
+    def __init__(self, job):
+        super().__init__(daemon=True)
+        self.job = job
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _progress(self, issues, position):
+        self.messages.put(("batch", issues, position))
+
+    def run(self):
+        try:
+            self.job(self._progress, self.cancel_event)
+        except AnalysisCancelled:
+            self.messages.put(("cancelled", None, None))
+        except Exception as e:
+            self.messages.put(("error", str(e), None))
+        else:
+            self.messages.put(("done", None, None))